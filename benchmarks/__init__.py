@@ -0,0 +1,9 @@
+"""Performance benchmarks for chatbot_fifa_extension.
+
+Each module is runnable from the repository root, e.g.::
+
+    python -m benchmarks.import_time
+
+and prints its measurements as JSON, so results can be stored and compared
+across releases.
+"""
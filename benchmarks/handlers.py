@@ -0,0 +1,111 @@
+"""Time the hot tool handlers and the scoring/report engines at several scales.
+
+For every player count a synthetic tournament (see :mod:`benchmarks.synthetic`)
+is written to a temporary sqlite store, then each operation is run repeatedly
+and its median wall time reported in milliseconds:
+
+  * ``place_bet`` / ``get_next_match`` - a different player per run, through
+    the tool handlers like a bot would call them;
+  * ``standings_cold`` / ``standings_warm`` - with the in-process caches
+    dropped before each run, and reused;
+  * ``report_compute`` / ``report_markdown`` - the report pipeline;
+  * ``points_scorer_sort`` - ranking the twelve groups with random results
+    (independent of the player count).
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from chatbot_fifa_extension import fifa, report, tools
+
+from . import synthetic
+
+
+def timed(run, repeat, before=None):
+    """Median wall time in ms of run(i) for i in range(repeat).
+
+    before(i), when given, runs untimed ahead of each run.
+    """
+    timings = []
+    for i in range(repeat):
+        if before:
+            before(i)
+        start = time.perf_counter()
+        run(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def handler(ctx, now, name):
+    """Call tool name as player i: run(i, **params)."""
+    spec = tools.get_toolspec(name)
+
+    def run(i, **params):
+        return spec.handler(ctx.request(f"t{i:05}", now), spec.params(**params))
+    return run
+
+
+def scale(players, played, repeat):
+    """Median timings of every operation for one player count."""
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        ctx, now = synthetic.build(path, players, played)
+        setup = round((time.perf_counter() - start) * 1000, 1)
+        place_bet = handler(ctx, now, "place_bet")
+        next_match = handler(ctx, now, "get_next_match")
+        standings = handler(ctx, now, "standings")
+        result = report.compute(ctx)
+        step = max(players // repeat, 1)
+        return {
+            "players": players,
+            "setup_ms": setup,
+            "place_bet": timed(
+                lambda i: place_bet(i * step % players, home_score=1, away_score=0),
+                repeat),
+            "get_next_match": timed(lambda i: next_match(i * step % players), repeat),
+            "standings_cold": timed(lambda i: standings(i), repeat,
+                                    before=lambda i: ctx.cache.clear()),
+            "standings_warm": timed(lambda i: standings(i), repeat),
+            "report_compute": timed(lambda i: report.compute(ctx), repeat),
+            "report_markdown": timed(lambda i: report.to_markdown(*result), repeat),
+        }
+
+
+def points_scorer(repeat, seed=0):
+    """Median ms to rank all twelve groups with fifa.PointsScorer."""
+    rng = random.Random(seed)
+    matches = synthetic.schedule_2026()
+    tables = []
+    for teams in synthetic.groups(matches):
+        results = {f"{m.home} and {m.away}": [rng.randint(0, 3), rng.randint(0, 3)]
+                   for m in matches if m.stage == "group" and m.home in teams}
+        tables.append((fifa.PointsScorer(results), teams))
+    return timed(lambda i: [scorer.sort(teams) for scorer, teams in tables], repeat)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", default="100,1000",
+                        help="Comma-separated player counts (default 100,1000).")
+    parser.add_argument("--played", type=int, default=48,
+                        help="Matches with a result (default 48 of 104).")
+    parser.add_argument("--repeat", type=int, default=15,
+                        help="Runs per operation (default 15).")
+    args = parser.parse_args(argv)
+    counts = [int(n) for n in args.players.split(",") if n.strip()]
+    print(json.dumps({
+        "benchmark": "handlers", "repeat": args.repeat, "played": args.played,
+        "python": sys.version.split()[0],
+        "points_scorer_sort": points_scorer(args.repeat),
+        "median_ms": [scale(n, args.played, args.repeat) for n in counts],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
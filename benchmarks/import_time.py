@@ -0,0 +1,63 @@
+"""Measure package import time as seen by a freshly forked bot worker.
+
+Every scenario runs in a new interpreter (so nothing is cached in
+``sys.modules``) and is repeated; the median wall time is reported in
+milliseconds. The ``eager`` scenario reproduces what importing the package
+did before it went lazy - membank, the context and tools modules, and every
+params model's validator built at class creation - as the baseline the lazy
+package is compared against. JSON schemas were never built at import, so
+they aren't here either.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+SCENARIOS = {
+    "interpreter": "pass",
+    "package": "import chatbot_fifa_extension",
+    "toolspecs": "from chatbot_fifa_extension import get_toolspecs; get_toolspecs()",
+    "first_call": (
+        "from chatbot_fifa_extension import get_toolspecs\n"
+        "spec = next(s for s in get_toolspecs() if s.name == 'standings')\n"
+        "spec.params()"
+    ),
+    "eager": (
+        "import membank\n"
+        "from chatbot_fifa_extension import context, tools\n"
+        "for spec in tools.get_toolspecs():\n"
+        "    spec.params.model_rebuild()"
+    ),
+}
+
+
+def measure(code, repeat):
+    """Median wall time in ms of running code in a fresh interpreter."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7,
+                        help="Runs per scenario (default 7).")
+    args = parser.parse_args(argv)
+    results = {name: round(measure(code, args.repeat), 2)
+               for name, code in SCENARIOS.items()}
+    results["package_vs_eager_ms"] = round(results["eager"] - results["package"], 2)
+    print(json.dumps({"benchmark": "import_time", "repeat": args.repeat,
+                      "python": sys.version.split()[0], "median_ms": results},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Match-day load test: many sessions calling the tools at once.
+
+Simulates the minutes before a kickoff against a real sqlite store (a
+synthetic tournament, see :mod:`benchmarks.synthetic`): worker threads share
+one engine like a bot process does, and each call picks a random session and
+a tool by the weights in MIX, going through :func:`dispatch` with JSON
+arguments as a bot would. No network or LLM is involved.
+
+Reports overall and per-tool throughput, p50/p95/p99 latency in
+milliseconds, and failures - sqlite lock errors ("database is locked")
+counted apart from other exceptions - as JSON.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from chatbot_fifa_extension import dispatch
+
+from . import synthetic
+
+
+# relative call frequencies before a kickoff: mostly "what's next" and bets
+MIX = {
+    "get_next_match": 35,
+    "place_bet": 30,
+    "my_predictions": 10,
+    "standings": 10,
+    "tonight_picks": 5,
+    "whoami": 5,
+    "update_prediction": 5,
+}
+
+
+def arguments(name, rng, match):
+    """JSON arguments for a call of tool name (match: the next open Match)."""
+    if name == "place_bet":
+        return json.dumps({"home_score": rng.randint(0, 3),
+                           "away_score": rng.randint(0, 3)})
+    if name == "update_prediction":
+        return json.dumps({"home": match.home, "away": match.away,
+                           "home_score": rng.randint(0, 3),
+                           "away_score": rng.randint(0, 3)})
+    return "{}"
+
+
+def _percentiles(timings):
+    if len(timings) < 2:
+        value = round(timings[0], 3) if timings else None
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50": round(cuts[49], 3), "p95": round(cuts[94], 3),
+            "p99": round(cuts[98], 3)}
+
+
+def run(ctx, now, players, threads, seconds, mix=None, seed=0):
+    """Hammer ctx from threads for seconds; returns the JSON-ready results."""
+    mix = mix or MIX
+    names, weights = list(mix), list(mix.values())
+    match = next(m for m in sorted(ctx.store.get("match"), key=lambda m: m.number)
+                 if not m.result)
+    stats = {name: {"timings": [], "lock_errors": 0, "errors": 0} for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        local = {name: {"timings": [], "lock_errors": 0, "errors": 0}
+                 for name in names}
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            raw = arguments(name, rng, match)
+            talker = f"t{rng.randrange(players):05}"
+            start = time.perf_counter()
+            try:
+                dispatch(ctx, name, raw, talker=talker, now=now)
+            except Exception as exc:  # pylint: disable=broad-except
+                kind = "lock_errors" if "locked" in str(exc) else "errors"
+                local[name][kind] += 1
+                continue
+            local[name]["timings"].append((time.perf_counter() - start) * 1000)
+        with lock:
+            for name, row in local.items():
+                for key, value in row.items():
+                    stats[name][key] += value
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    tools = {}
+    for name, row in stats.items():
+        tools[name] = {"calls": len(row["timings"]),
+                       "per_second": round(len(row["timings"]) / elapsed, 1),
+                       "lock_errors": row["lock_errors"], "errors": row["errors"],
+                       **_percentiles(row["timings"])}
+    every = [t for row in stats.values() for t in row["timings"]]
+    return {
+        "seconds": round(elapsed, 3),
+        "calls": len(every),
+        "per_second": round(len(every) / elapsed, 1),
+        "lock_errors": sum(row["lock_errors"] for row in stats.values()),
+        "errors": sum(row["errors"] for row in stats.values()),
+        **_percentiles(every),
+        "tools": tools,
+    }
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=500,
+                        help="Registered players/sessions (default 500).")
+    parser.add_argument("--threads", type=int, default=16,
+                        help="Concurrent worker threads (default 16).")
+    parser.add_argument("--seconds", type=float, default=10.0,
+                        help="How long to run (default 10).")
+    parser.add_argument("--played", type=int, default=48,
+                        help="Matches with a result (default 48 of 104).")
+    parser.add_argument("--mix", default=None,
+                        help="Tool weights as JSON, e.g. '{\"place_bet\": 1}' "
+                        "(default: MIX).")
+    parser.add_argument("--write-behind", type=float, default=None,
+                        metavar="SECONDS",
+                        help="Batch store writes at this interval (see "
+                        "chatbot_fifa_extension.writebehind).")
+    args = parser.parse_args(argv)
+    mix = json.loads(args.mix) if args.mix else MIX
+    conf = {"write_behind": args.write_behind} if args.write_behind else None
+    with tempfile.TemporaryDirectory() as path:
+        ctx, now = synthetic.build(path, args.players, args.played, conf=conf)
+        results = run(ctx, now, args.players, args.threads, args.seconds, mix)
+        if ctx.writes is not None:
+            ctx.writes.close()
+    print(json.dumps({"benchmark": "load", "players": args.players,
+                      "threads": args.threads, "mix": mix,
+                      "write_behind": args.write_behind,
+                      "python": sys.version.split()[0], **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Synthetic tournaments for the benchmarks.
+
+Builds a real sqlite store (through :func:`build_context`, so migrations and
+indexes are the production ones) holding the full 104-match 2026 schedule -
+the shipped fixtures padded with placeholder knockout rounds - and any number
+of players with random predictions. The first ``played`` matches get random
+results; the returned clock sits an hour before the next kickoff, so players
+still have open matches to predict.
+"""
+
+from datetime import datetime, timedelta, timezone
+import json
+import random
+
+from chatbot_fifa_extension import memories, schedule, tools
+from chatbot_fifa_extension.context import build_context
+
+
+ADMIN_SECRET = "bench"
+# knockout rounds after the shipped round of 32, up to the 104th match
+KNOCKOUT = (("round16", 8), ("quarter", 4), ("semi", 2), ("third", 1), ("final", 1))
+
+
+def schedule_2026():
+    """The 104 matches of the 2026 tournament as Match records, no results."""
+    with open(tools.SCHEDULE_FILE, encoding="utf-8") as handle:
+        entries = json.load(handle)
+    matches = [memories.Match(number=e["number"], stage=e.get("stage", "group"),
+                              home=e["home"], away=e["away"], kickoff=e["kickoff"])
+               for e in entries]
+    last = max(schedule.kickoff_epoch(m) for m in matches)
+    number = len(matches)
+    for stage, count in KNOCKOUT:
+        for _ in range(count):
+            number += 1
+            last += 6 * 3600
+            matches.append(memories.Match(
+                number=number, stage=stage, home=f"Team {number}A",
+                away=f"Team {number}B",
+                kickoff=datetime.fromtimestamp(last, timezone.utc).isoformat()))
+    return matches
+
+
+def groups(matches):
+    """Teams of each group, found as the connected group-stage fixtures."""
+    owner = {}
+
+    def root(team):
+        while owner.setdefault(team, team) != team:
+            team = owner[team]
+        return team
+
+    for match in matches:
+        if match.stage == "group":
+            owner[root(match.home)] = root(match.away)
+    found = {}
+    for team in list(owner):
+        found.setdefault(root(team), []).append(team)
+    return sorted(found.values())
+
+
+def _score(rng):
+    return [rng.choice((0, 0, 1, 1, 1, 2, 2, 3)), rng.choice((0, 0, 1, 1, 2, 2, 3))]
+
+
+def populate(store, players, played=48, seed=0, pick_rate=0.9):
+    """Write the schedule and players into store; returns the matches.
+
+    :param players: number of players ("player00000", talker "t00000", ...).
+    :param played: how many matches (in schedule order) get a result.
+    :param pick_rate: chance a player predicted any given played match.
+    """
+    rng = random.Random(seed)
+    matches = schedule_2026()
+    for match in matches[:played]:
+        match.result = _score(rng)
+    for match in matches:
+        store.put(match)
+    for i in range(players):
+        predictions = {str(m.number): _score(rng) for m in matches[:played]
+                       if rng.random() < pick_rate}
+        store.put(memories.Player(name=f"player{i:05}", talker=f"t{i:05}",
+                                  predictions=predictions))
+    return matches
+
+
+def build(path, players, played=48, seed=0, conf=None):
+    """A context over a fresh store in directory path; returns (ctx, now).
+
+    now is an hour before the kickoff of the first match without a result.
+    conf adds config keys (e.g. ``write_behind``) to the returned context;
+    the store is populated without them.
+    """
+    base = {"database_path": path, "admin_secret": ADMIN_SECRET}
+    ctx = build_context(base)
+    matches = populate(ctx.store, players, played, seed)
+    ctx.changed("match", ctx.topic("player"))
+    if conf:
+        ctx = build_context({**base, **conf})
+    kickoff = schedule.kickoff_epoch(matches[played])
+    return ctx, datetime.fromtimestamp(kickoff, timezone.utc) - timedelta(hours=1)
@@ -10,17 +10,57 @@ Typical use from a host::
     from chatbot_fifa_extension import build_context, get_toolspecs
     ctx = build_context(conf["chatbot_fifa_extension"])
     for spec in get_toolspecs():
-        ...  # adapt spec to the host's tool format, calling spec.handler(ctx, params)
+        ...  # adapt spec to the host's tool format (spec.json_schema)
+
+    # then, for each tool call the model makes (safe from many threads):
+    reply = dispatch(ctx, call.name, call.arguments, talker=session_id)
+    # or, binding handlers directly:
+    reply = spec.handler(ctx.request(talker=session_id), params)
+
+Public names are loaded lazily (PEP 562): importing the package is cheap, and
+membank/pydantic are only imported when the attribute that needs them is
+first used. This keeps short-lived worker startup fast.
 """
 
-from .context import FifaContext, build_context
-from .tools import ToolSpec, TOOLSPECS, get_toolspecs
+import importlib
+
+
+_LAZY = {
+    "FifaContext": "context",
+    "RequestContext": "context",
+    "build_context": "context",
+    "ToolSpec": "tools",
+    "TOOLSPECS": "tools",
+    "get_toolspecs": "tools",
+    "get_toolspec": "tools",
+    "dispatch": "dispatcher",
+    "report_main": "report",
+}
+_SOURCE_NAMES = {"report_main": "main"}
 
 
 __all__ = [
     "FifaContext",
+    "RequestContext",
     "build_context",
     "ToolSpec",
     "TOOLSPECS",
     "get_toolspecs",
+    "get_toolspec",
+    "dispatch",
+    "report_main",
 ]
+
+
+def __getattr__(name):
+    """Import the submodule behind a public name on first access."""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_LAZY[name]}", __name__)
+    value = getattr(module, _SOURCE_NAMES.get(name, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
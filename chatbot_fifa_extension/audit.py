@@ -0,0 +1,188 @@
+"""Append-only audit trail of prediction and result changes.
+
+Picks and results are overwritten in place on their records, so the store
+alone can't say who changed what when. Every tool that sets a pick or a
+result therefore also adds an :class:`memories.AuditEvent` - who, from which
+session, through which tool, the match, old -> new and the request time -
+that is never updated or deleted.
+
+Events are ordinary store records, written in the same transaction as the
+record they describe (:func:`storage.put_together`), so neither lands
+without the other; with write-behind batching on (see :mod:`.writebehind`)
+the two are queued as one and share a batch. History queries filter by pool and
+player or match, both indexed (:data:`storage.INDEXES`).
+
+The trail also rebuilds state: :class:`Replay` applies events in commit
+order (their ``seq``) - incrementally, picking up after the last one
+applied, which no event committed later can precede - into the picks and
+results they add up to, which :meth:`Replay.totals` scores and
+:func:`verify` compares with the store.
+
+Run ``python -m chatbot_fifa_extension.audit --db DIR [--player NAME |
+--match N] [--verify]`` on the host for the same from the command line.
+"""
+
+import argparse
+from types import SimpleNamespace
+import time
+import uuid
+
+from . import memories, snapshot, storage
+
+
+_indexed = set()  # ids of the engines whose audit indexes are known to exist
+
+
+def _event_id():
+    return f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+
+
+def record(ctx, item, tool, match, old, new, player="", topics=()):
+    """Write item and log the change of player's pick in it (or of the result).
+
+    :param item: the changed Player (or Match, without a player) record.
+    :param tool: name of the tool making the change.
+    :param match: number of the match.
+    :param old: the previous (home, away), or None.
+    :param new: the new (home, away).
+    :param topics: store-version topics (of the request's pool) bumped in
+        the same commit.
+    :returns: the bumps, to pass as ``written`` to ``ctx.changed`` (see
+        :func:`storage.put_together`).
+    """
+    event = memories.AuditEvent(
+        id=_event_id(), at=ctx.now.isoformat(), kind="pick" if player else "result",
+        pool=ctx.pool, player=player, talker=ctx.talker, tool=tool, match=match,
+        old=list(old or []), new=list(new))
+    return storage.put_together(ctx.store, [item, event],
+                                [ctx.topic(topic) for topic in topics])
+
+
+def events(ctx, player=None, match=None, after=0):
+    """The request pool's events in commit order, optionally narrowed.
+
+    :param player: only this player's picks.
+    :param match: only this match number (picks and result).
+    :param after: only events committed after the one with this seq.
+    """
+    store = ctx.store
+    if id(storage.engine(store)) not in _indexed:
+        if "auditevent" not in storage.tables(store):
+            return []
+        storage.index(store, "auditevent")
+        _indexed.add(id(storage.engine(store)))
+    table = store.auditevent
+    filters = [table.pool == ctx.pool]
+    if player is not None:
+        filters.append(table.player == player)
+    if match is not None:
+        filters.append(table.match == match)
+    if after:
+        filters.append(table.seq > after)
+    return sorted(store.get("auditevent", *filters), key=lambda e: e.seq)
+
+
+def describe(event):
+    """One line of text for event."""
+    def fmt(score):
+        return f"{score[0]}:{score[1]}" if score else "-"
+    who = event.player or "result"
+    via = f"{event.tool}, {event.talker}" if event.talker else event.tool
+    return (f"{event.at[:16].replace('T', ' ')} #{event.match} {who}: "
+            f"{fmt(event.old)} -> {fmt(event.new)} ({via})")
+
+
+class Replay:
+    """Picks and results as the audit trail has them.
+
+    ``picks`` is {name: {number: (home, away)}}, ``results`` {number: (home,
+    away)}; ``last`` is the seq of the latest event applied, to pass as
+    ``after`` when fetching the next ones.
+    """
+
+    def __init__(self):
+        self.picks = {}
+        self.results = {}
+        self.last = 0
+
+    def apply(self, logged):
+        """Apply events newer than the latest applied, in order; returns self."""
+        for event in sorted(logged, key=lambda e: e.seq):
+            if event.seq <= self.last:
+                continue
+            if event.kind == "result":
+                self.results[event.match] = tuple(event.new)
+            else:
+                self.picks.setdefault(event.player, {})[event.match] = tuple(event.new)
+            self.last = event.seq
+        return self
+
+    def totals(self, rules, stages=None):
+        """{name: points} of the replayed picks against the replayed results.
+
+        :param rules: the :class:`scoring.ScoringRules` to score with.
+        :param stages: {match number: stage}, for stage-dependent rules.
+        """
+        stages = stages or {}
+        totals = dict.fromkeys(self.picks, 0)
+        for number, result in self.results.items():
+            picks = [(name, picks[number]) for name, picks in self.picks.items()
+                     if number in picks]
+            match = SimpleNamespace(result=result, stage=stages.get(number, "group"))
+            for name, (points, _note) in rules.score(match, picks).items():
+                totals[name] += points
+        return totals
+
+
+def verify(ctx, replay=None):
+    """Where the store disagrees with the audit trail, as lines of text.
+
+    Only picks and results that have events are compared; ones set before the
+    trail existed can't be checked.
+    """
+    replay = replay or Replay().apply(events(ctx))
+    snap = snapshot.tournament(ctx)
+
+    def fmt(score):
+        return f"{score[0]}:{score[1]}" if score else "none"
+    problems = []
+    for name, picks in sorted(replay.picks.items()):
+        player = snap.player(name)
+        for number, pick in sorted(picks.items()):
+            stored = player.pick(number) if player else None
+            if stored != pick:
+                problems.append(f"{name} #{number}: logged {fmt(pick)}, "
+                                f"stored {fmt(stored)}")
+    for number, result in sorted(replay.results.items()):
+        match = snap.by_number.get(number)
+        stored = match.result if match else None
+        if stored != result:
+            problems.append(f"result #{number}: logged {fmt(result)}, "
+                            f"stored {fmt(stored)}")
+    return problems
+
+
+def main(argv=None):
+    """Command-line entry point: print history, or check the store against it."""
+    from .context import build_context
+    parser = argparse.ArgumentParser(description="Show the prediction audit trail.")
+    parser.add_argument("--db", default=".",
+                        help="Directory holding the membank 'db' file.")
+    parser.add_argument("--pool", default="", help="Pool (default: the default pool).")
+    parser.add_argument("--player", default=None, help="Only this player's picks.")
+    parser.add_argument("--match", type=int, default=None, help="Only this match.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compare the store with the trail instead.")
+    args = parser.parse_args(argv)
+    ctx = build_context({"database_path": args.db}).request(pool=args.pool)
+    if args.verify:
+        problems = verify(ctx)
+        print("\n".join(problems) if problems else "The store matches the audit trail.")
+        return 1 if problems else 0
+    for event in events(ctx, args.player, args.match):
+        print(describe(event))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+"""Consistent online snapshots of the whole store, and restoring them.
+
+Copying the sqlite file while the bot writes to it can catch a half-written
+transaction. A snapshot here is taken through sqlite instead, in one of two
+formats picked by the file name:
+
+  * ``*.db`` - a sqlite copy made with sqlite's online backup API, page by
+    page; fastest, and a store in its own right;
+  * anything else (e.g. ``*.jsonl.gz``) - a gzip-compressed export: a header
+    line, then one JSON line per record of the :data:`TABLES`, all read in
+    one transaction (other workers' commits wait until the export is done).
+
+Both stream, so memory stays flat however large the pools are. Store
+versions aren't included; restoring bumps them instead.
+
+:func:`restore` reads either format back as one bulk transaction that
+replaces the :data:`TABLES` (rows are streamed in chunks, so it is bounded in
+memory too), then brings the schema up to date and drops every worker's
+caches. Writes made while a restore runs are lost, so stop the bot first.
+
+From the command line::
+
+    python -m chatbot_fifa_extension.backup --db DIR create backup.jsonl.gz
+    python -m chatbot_fifa_extension.backup --db DIR restore backup.jsonl.gz
+
+The ``backup_store`` admin tool writes snapshots into the ``backup_path``
+directory.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+
+from . import memories, storage
+from .context import pool_topic
+
+
+FORMAT = "chatbot-fifa-extension-backup"
+VERSION = 1
+COMPRESSLEVEL = 6  # gzip's default 9 is ~8x slower for ~20% smaller files
+KINDS = {
+    "group": memories.Group,
+    "match": memories.Match,
+    "player": memories.Player,
+    "admin": memories.Admin,
+    "auditevent": memories.AuditEvent,
+}
+TABLES = tuple(KINDS)
+
+
+def _database(store):
+    database = storage.engine(store).url.database
+    if not database or database == ":memory:":
+        return None
+    return database
+
+
+def _replace_atomically(path, write):
+    """Call write(tmp path), then move the finished file to path."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                               prefix=".backup-")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def create(ctx, path):
+    """Snapshot the whole store to path; returns {table: records}.
+
+    Pending write-behind batches are committed first. A ``.db`` path needs a
+    file store; anything else gets the compressed export.
+    """
+    if ctx.writes is not None:
+        ctx.writes.flush()
+    store = ctx.store
+    if path.endswith(".db"):
+        database = _database(store)
+        if database is None:
+            raise ValueError("An in-memory store can only be exported, not copied.")
+
+        def copy(tmp):
+            source, target = sqlite3.connect(database), sqlite3.connect(tmp)
+            try:
+                source.backup(target, pages=1024)
+            finally:
+                target.close()
+                source.close()
+        _replace_atomically(path, copy)
+        return {**dict.fromkeys(TABLES, 0), **storage.counts(_open(path), TABLES)}
+
+    written = dict.fromkeys(TABLES, 0)
+
+    def export(tmp):
+        with gzip.open(tmp, "wt", compresslevel=COMPRESSLEVEL, encoding="utf-8") as out:
+            out.write(json.dumps({"format": FORMAT, "version": VERSION,
+                                  "created": datetime.now(timezone.utc).isoformat()})
+                      + "\n")
+            for table, row in storage.dump(store, TABLES):
+                out.write(json.dumps({"table": table, "row": row}) + "\n")
+                written[table] += 1
+    _replace_atomically(path, export)
+    return written
+
+
+def _open(path):
+    import membank
+    return membank.LoadMemory(f"sqlite://{os.path.abspath(path)}")
+
+
+def _exported(path):
+    """Stream (table, row) out of a compressed export."""
+    with gzip.open(path, "rt", encoding="utf-8") as lines:
+        header = json.loads(next(lines, "{}"))
+        if header.get("format") != FORMAT or header.get("version", 0) > VERSION:
+            raise ValueError(f"{path} is not a backup this version can read")
+        for line in lines:
+            entry = json.loads(line)
+            if entry["table"] in KINDS:
+                yield entry["table"], entry["row"]
+
+
+def restore(ctx, path):
+    """Replace the store's records with the snapshot at path; returns counts.
+
+    Runs as one transaction: if anything fails, the store is left as it was.
+    """
+    if ctx.writes is not None:
+        ctx.writes.flush()
+    store = ctx.store
+    if path.endswith(".db"):
+        rows = storage.dump(_open(path), TABLES)
+    else:
+        rows = _exported(path)
+    existing = storage.tables(store)
+    for table, kind in KINDS.items():
+        if table not in existing:
+            storage.create(store, kind)
+    pools = set()
+
+    def noting_pools(rows):
+        for table, row in rows:
+            if table in ("player", "admin"):
+                pools.add(row.get("pool") or "")
+            yield table, row
+    counts = storage.replace(store, TABLES, noting_pools(rows))
+    storage.migrate(store)
+    topics = {"group", "match"} | {pool_topic(name, pool) for pool in pools | {""}
+                                   for name in ("admin", "player", "scores")}
+    ctx.changed(*sorted(topics))
+    ctx.admins.refresh()
+    return counts
+
+
+def _summary(counts):
+    return ", ".join(f"{rows} {table}" for table, rows in counts.items())
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    from .context import build_context
+    parser = argparse.ArgumentParser(description="Back up or restore the store.")
+    parser.add_argument("--db", default=".",
+                        help="Directory holding the membank 'db' file.")
+    parser.add_argument("action", choices=("create", "restore"))
+    parser.add_argument("path", help="Snapshot file (.db for a sqlite copy, "
+                        "else a compressed export).")
+    args = parser.parse_args(argv)
+    ctx = build_context({"database_path": args.db})
+    if args.action == "create":
+        print(f"Wrote {args.path}: {_summary(create(ctx, args.path))}")
+    else:
+        print(f"Restored {args.path}: {_summary(restore(ctx, args.path))}")
+
+
+if __name__ == "__main__":
+    main()
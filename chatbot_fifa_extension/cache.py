@@ -0,0 +1,124 @@
+"""In-process caches of store-derived views, kept coherent across processes.
+
+Cached values are tagged with the store topics they were built from ("match",
+"player", "group", "admin", "scores"). Writers bump the topic's :class:`StoreVersion`
+counter in the shared store; every request reads the counters (one query of a
+handful of rows) and drops only the entries built from a topic that moved.
+
+A writer that has already applied its own change to a cached value can ask
+to keep that entry; it survives as long as no other worker wrote the same
+topics in between (otherwise it is dropped like the rest).
+"""
+
+import threading
+
+from . import storage
+
+
+TOPICS = ("admin", "group", "match", "player", "scores")
+
+
+def read_versions(store):
+    """Return {topic: counter} for every topic written so far."""
+    return {row.topic: row.counter for row in store.get("storeversion")}
+
+
+def bump_versions(store, topics):
+    """Advance the counters of topics; returns {topic: (previous, new)}.
+
+    Each bump is atomic (:func:`storage.bump_versions`): previous is the
+    counter it replaced, whatever other workers did meanwhile. The new value
+    is at least the wall clock in nanoseconds.
+    """
+    return storage.bump_versions(store, topics)
+
+
+class StoreCache:
+    """Topic-tagged cache of values derived from the store."""
+
+    def __init__(self):
+        self._entries = {}
+        self._versions = None
+        self._drops = {}  # topic -> number of invalidations so far
+        self._lock = threading.Lock()
+
+    def get(self, key, topics, build):
+        """Return the cached value for key, calling build() on a miss.
+
+        :param topics: the store topics build reads; a write to any of them
+            drops the entry. A value whose topics were invalidated while it
+            was being built is returned but not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[1]
+        topics = frozenset(topics)
+        drops = [self._drops.get(t, 0) for t in topics]
+        value = build()
+        with self._lock:
+            if drops == [self._drops.get(t, 0) for t in topics]:
+                self._entries[key] = (topics, value)
+        return value
+
+    def peek(self, key):
+        """Return the cached value for key without building it, or None."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def update(self, key, value):
+        """Replace the cached value of key (a no-op when it isn't cached).
+
+        For writers that bring an entry up to date and pass key as keep.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], value)
+
+    def invalidate(self, *topics, keep=()):
+        """Drop every entry built from any of topics, except the keys in keep."""
+        topics = set(topics)
+        with self._lock:
+            for topic in topics:
+                self._drops[topic] = self._drops.get(topic, 0) + 1
+            for key in [k for k, (deps, _) in self._entries.items()
+                        if deps & topics and k not in keep]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            topics = set(TOPICS).union(*(deps for deps, _ in self._entries.values()))
+        self.invalidate(*topics)
+
+    def sync(self, versions):
+        """Adopt the store's current versions, dropping entries they outdate.
+
+        Returns the set of topics that moved since the last sync (every topic
+        on the first sync, which also drops everything cached before it).
+        """
+        with self._lock:
+            previous, self._versions = self._versions, dict(versions)
+        if previous is None:
+            self.clear()
+            return set(TOPICS) | set(versions)
+        changed = {t for t in set(previous) | set(versions)
+                   if previous.get(t) != versions.get(t)}
+        if changed:
+            self.invalidate(*changed)
+        return changed
+
+    def written(self, bumps, keep=()):
+        """Record this process's own bumps; drops entries of those topics.
+
+        :param bumps: {topic: (previous, new)} from :func:`bump_versions`.
+        :param keep: keys the writer already brought up to date in place; kept
+            only if every previous counter is the one this cache last saw.
+        """
+        with self._lock:
+            seen = self._versions or {}
+            clean = self._versions is not None and all(
+                seen.get(t) == previous for t, (previous, _) in bumps.items())
+            if self._versions is not None:
+                self._versions.update({t: new for t, (_, new) in bumps.items()})
+        self.invalidate(*bumps, keep=keep if clean else ())
@@ -3,14 +3,91 @@
 This module deliberately depends only on the persistence layer (membank). It
 must never import an LLM/agent SDK so that the betting capability can be bound
 to any front-end (OpenAI Agents SDK, MCP, REST, ...).
+
+State is split in two: one immutable :class:`FifaContext` (the shared engine:
+store, config, in-process caches) per process, and a cheap
+:class:`RequestContext` per tool call carrying who is calling and when. The
+engine is never mutated per request, so a single one can serve concurrent
+sessions from a thread pool.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from .cache import StoreCache, bump_versions, read_versions
+from .scoring import DEFAULT_RULES, ScoringRules
+
+if TYPE_CHECKING:  # membank (sqlalchemy, alembic) is imported by build_context
+    import membank
+    from .instrument import Instruments
+    from .writebehind import WriteBehindStore
+
+
+# store topics that are kept per pool; "scores" moves with the player writes
+# that change the rank history (see :func:`scoring.history`)
+POOL_TOPICS = ("admin", "player", "scores")
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def pool_topic(name, pool):
+    """Store-version topic of name in pool (shared topics ignore the pool)."""
+    return f"{name}@{pool}" if pool and name in POOL_TOPICS else name
+
+
+class AdminSessions:
+    """In-process set of the (pool, talker) sessions recorded as administrators.
+
+    Loaded from the store in one query and then consulted without touching
+    sqlite, so bulk admin work costs no extra reads per call. A hit is always
+    trusted (admin sessions are never revoked); a miss reloads the set only
+    once it is older than ``ttl`` seconds, which is how sessions authenticated
+    by another worker process become visible. Call :meth:`refresh` to force it.
 
-import membank
+    A reload holds a lock that :meth:`add` takes too, so a reload that read
+    the store before a new session was saved can't drop it afterwards.
+    """
+
+    def __init__(self, store, ttl=60.0):
+        self._store = store
+        self.ttl = ttl
+        self._talkers = frozenset()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reload the admin sessions from the store."""
+        with self._lock:
+            self._talkers = frozenset((a.pool or "", a.talker)
+                                      for a in self._store.get("admin"))
+            self._loaded_at = time.monotonic()
+
+    def expire(self):
+        """Make the next miss reload the set (another process changed it)."""
+        self._loaded_at = None
+
+    def add(self, session):
+        """Record a (pool, talker) session as admin (the caller persists it)."""
+        with self._lock:
+            self._talkers = self._talkers | {session}
+
+    def __contains__(self, session):
+        if not session[1]:
+            return False
+        if session in self._talkers:
+            return True
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+            self.refresh()
+            return session in self._talkers
+        return False
 
 
-@dataclass
+@dataclass(frozen=True)
 class FifaContext:
     """Holds the persistence store and config the betting tools operate on.
 
@@ -18,22 +95,222 @@ class FifaContext:
     :param admin_secret: secret that authorizes administrative tools (setting up
         groups/teams, and later results and the knockout layout). When empty,
         administrative tools refuse to run.
+    :param cache: in-process derived views of the store (e.g. the schedule
+        index), rebuilt on demand and dropped when the store versions of the
+        topics they were built from move (see :mod:`.cache`).
+    :param admins: cached admin sessions; created over store when omitted.
+    :param admin_secrets: per-pool admin secrets; pools not listed use
+        admin_secret.
+    :param rules: the :class:`ScoringRules` standings and reports score with.
+    :param instruments: measures tool calls made through :func:`dispatch`
+        when set (see :mod:`.instrument`); the store should then be wrapped
+        with ``instruments.wrap``.
+    :param writes: the :class:`WriteBehindStore` batching the store's writes,
+        when enabled (see :mod:`.writebehind`); store is then built over it.
+    :param backup_path: directory the ``backup_store`` tool writes snapshots
+        to (see :mod:`.backup`); "" disables the tool.
+    :param matrix_path: directory where each pool's predictions are mirrored
+        to a memory-mapped matrix file (see :mod:`.matrix`); "" to not.
+
+    One engine serves every pool in the store; the pool is chosen per request.
     """
 
-    store: membank.LoadMemory
+    store: "membank.LoadMemory"
     admin_secret: str = ""
-    talker: str = ""  # the current caller's session identity (set per request)
+    cache: StoreCache = field(default_factory=StoreCache, repr=False, compare=False)
+    admins: AdminSessions = field(default=None, repr=False, compare=False)
+    admin_secrets: dict = field(default_factory=dict, repr=False)
+    rules: ScoringRules = field(default=DEFAULT_RULES, repr=False)
+    instruments: "Instruments | None" = field(default=None, repr=False,
+                                              compare=False)
+    writes: "WriteBehindStore | None" = field(default=None, repr=False,
+                                              compare=False)
+    backup_path: str = ""
+    matrix_path: str = ""
+
+    def __post_init__(self):
+        if self.admins is None:
+            object.__setattr__(self, "admins", AdminSessions(self.store))
+
+    # An engine has no caller: handlers given one directly act anonymously,
+    # in the default pool.
+    talker = ""
+    pool = ""
+
+    @property
+    def now(self) -> datetime:
+        """Current UTC time (a request pins this once per call instead)."""
+        return _utcnow()
+
+    def secret_for(self, pool: str) -> str:
+        """The admin secret of pool."""
+        return self.admin_secrets.get(pool, self.admin_secret)
+
+    def topic(self, name: str) -> str:
+        """Store-version topic of name as seen from the default pool."""
+        return pool_topic(name, "")
+
+    def sync(self):
+        """Drop the caches outdated by writes from any process (one query)."""
+        changed = self.cache.sync(read_versions(self.store))
+        if any(t.partition("@")[0] == "admin" for t in changed):
+            self.admins.expire()
+
+    def changed(self, *topics, keep=(), pick=None, written=None):
+        """Announce a write to topics: bump their store versions, drop caches.
+
+        keep names cache keys the writer has already updated in place (see
+        :meth:`StoreCache.written`). With a ``matrix_path``, the matrix files
+        are brought up to date too; pick, the (name, number, home, away) of a
+        write that only set one prediction, lets them be patched in place.
+
+        written holds the bumps the write already made in its own commit
+        (see :func:`audit.record`); topics it lacks were acknowledged before
+        their commit, so their caches are dropped and keep is ignored.
+        Without it the topics are bumped here - behind the queued writes
+        when they are batched.
+        """
+        if written is None:
+            written = (self.writes.put_many((), bump=topics) if self.writes is not None
+                       else bump_versions(self.store, topics))
+        unknown = set(topics) - set(written)
+        if unknown:
+            self.cache.invalidate(*unknown)
+            keep = ()
+        self.cache.written(written, keep)
+        if self.matrix_path:
+            from . import matrix
+            matrix.changed(self, {topic: written.get(topic) for topic in topics}, pick)
+
+    def request(self, talker: str = "", now: datetime | None = None,
+                pool: str = "") -> "RequestContext":
+        """Return the per-call context for talker in pool, clocked at now.
+
+        Syncs the caches with the store versions first, so the call never
+        reads a view another worker has since written over.
+        """
+        self.sync()
+        return RequestContext(self, talker, now or _utcnow(), pool)
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    """One tool call: the shared engine plus the caller and the call's clock.
+
+    :param engine: the shared :class:`FifaContext`.
+    :param talker: the caller's session identity.
+    :param now: the moment the call is evaluated at; kickoff locks compare
+        against it, so a call sees one consistent time throughout.
+    :param pool: the prediction pool the call acts in ("" is the default).
+    """
+
+    engine: FifaContext
+    talker: str = ""
+    now: datetime = field(default_factory=_utcnow)
+    pool: str = ""
+
+    @property
+    def store(self) -> "membank.LoadMemory":
+        """The engine's store."""
+        return self.engine.store
+
+    @property
+    def admin_secret(self) -> str:
+        """The admin secret of the request's pool."""
+        return self.engine.secret_for(self.pool)
+
+    @property
+    def cache(self) -> StoreCache:
+        """The engine's shared in-process caches."""
+        return self.engine.cache
+
+    @property
+    def admins(self) -> AdminSessions:
+        """The engine's cached admin sessions."""
+        return self.engine.admins
+
+    @property
+    def rules(self) -> ScoringRules:
+        """The engine's scoring rules."""
+        return self.engine.rules
+
+    @property
+    def instruments(self) -> "Instruments | None":
+        """The engine's instrumentation, None when off."""
+        return self.engine.instruments
+
+    @property
+    def writes(self) -> "WriteBehindStore | None":
+        """The engine's write-behind queue, None when writes aren't batched."""
+        return self.engine.writes
+
+    @property
+    def backup_path(self) -> str:
+        """The engine's backup directory, "" when off."""
+        return self.engine.backup_path
+
+    @property
+    def matrix_path(self) -> str:
+        """The engine's matrix file directory, "" when off."""
+        return self.engine.matrix_path
+
+    def topic(self, name: str) -> str:
+        """Store-version topic of name for the request's pool."""
+        return pool_topic(name, self.pool)
+
+    def changed(self, *topics, keep=(), pick=None, written=None):
+        """Announce a write to topics in the request's pool.
+
+        See :meth:`FifaContext.changed`; pool-scoped topics only drop the
+        caches of this pool.
+        """
+        self.engine.changed(*(self.topic(t) for t in topics), keep=keep, pick=pick,
+                            written=written)
 
 
-def build_context(conf: dict) -> FifaContext:
+def build_context(conf: dict, instruments: "Instruments | None" = None) -> FifaContext:
     """Build a :class:`FifaContext` from a configuration mapping.
 
-    :param conf: mapping with a ``database_path`` key and an optional
-        ``admin_secret`` key, matching the ``[chatbot_fifa_extension]`` config
-        section. The sqlite url scheme is kept identical to previous releases so
-        existing data keeps working.
+    :param conf: mapping with a ``database_path`` key and optional
+        ``admin_secret``, ``admin_secrets`` (a {pool: secret} table),
+        ``admin_cache_ttl`` (seconds, default 60), ``scoring`` (the
+        :class:`ScoringRules` settings) and ``instrumentation`` (sink names,
+        see :mod:`.instrument`; ``instrumentation_ring_size`` sets the ring
+        length), ``write_behind`` (batching interval in seconds, see
+        :mod:`.writebehind`; ``write_behind_max_wait`` bounds acknowledgements)
+        ``backup_path`` (see :mod:`.backup`) and ``matrix_path`` (see
+        :mod:`.matrix`) keys, matching the
+        ``[chatbot_fifa_extension]`` config section. The sqlite url scheme is
+        kept identical to previous releases, and older stores are migrated in
+        place, so existing data keeps working (as the default pool).
+    :param instruments: ready-made instrumentation, used instead of the
+        configured one.
     """
     if "database_path" not in conf:
         raise RuntimeError("FIFA tools require 'database_path' in config")
+    import membank
+    from . import storage
     store = membank.LoadMemory(f"sqlite://{conf['database_path']}/db")
-    return FifaContext(store=store, admin_secret=conf.get("admin_secret", ""))
+    storage.migrate(store)
+    writes = None
+    if conf.get("write_behind"):
+        from .writebehind import WriteBehindStore
+        max_wait = conf.get("write_behind_max_wait")
+        store = writes = WriteBehindStore(
+            store, float(conf["write_behind"]),
+            None if max_wait is None else float(max_wait))
+    if instruments is None and conf.get("instrumentation"):
+        from . import instrument
+        instruments = instrument.from_conf(
+            conf["instrumentation"], int(conf.get("instrumentation_ring_size", 256)))
+    if instruments is not None:
+        store = instruments.wrap(store)
+    admins = AdminSessions(store, ttl=float(conf.get("admin_cache_ttl", 60)))
+    admins.refresh()
+    return FifaContext(store=store, admin_secret=conf.get("admin_secret", ""),
+                       admins=admins,
+                       admin_secrets=dict(conf.get("admin_secrets", {})),
+                       rules=ScoringRules.from_conf(conf.get("scoring", {})),
+                       instruments=instruments, writes=writes,
+                       backup_path=conf.get("backup_path", ""),
+                       matrix_path=conf.get("matrix_path", ""))
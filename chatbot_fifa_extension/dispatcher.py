@@ -0,0 +1,43 @@
+"""Single entry point for hosts executing LLM tool calls.
+
+A host hands over the tool name, the raw JSON arguments exactly as the model
+produced them, and the caller's session id. The spec is found by name, the
+arguments are validated straight from bytes by the spec's compiled validator,
+and the handler runs on its own :class:`RequestContext`, so concurrent calls
+never see each other's talker. With instrumentation on, each call (request
+setup included) is measured as one invocation; handlers bound directly are
+measured too, from the handler on (see :mod:`.instrument`).
+"""
+
+from datetime import datetime
+
+import pydantic
+
+from . import tools
+from .context import FifaContext
+
+
+def dispatch(ctx: FifaContext, name: str, raw: bytes | str, talker: str = "",
+             now: datetime | None = None, pool: str = "") -> str:
+    """Run tool name with raw JSON arguments on behalf of talker in pool.
+
+    now pins the request clock (defaults to the current time).
+
+    Like the handlers, problems the model can fix (unknown tool, invalid
+    arguments) are returned as text rather than raised.
+    """
+    spec = tools.get_toolspec(name)
+    if spec is None:
+        return f"Unknown tool '{name}'."
+    try:
+        params = spec.validate_json(raw)
+    except pydantic.ValidationError as exc:
+        problems = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'arguments'}: {err['msg']}"
+            for err in exc.errors()
+        )
+        return f"Invalid arguments for {name}: {problems}"
+    if ctx.instruments is None:
+        return spec.handler(ctx.request(talker, now, pool), params)
+    with ctx.instruments.invocation(name, pool):
+        return spec.handler(ctx.request(talker, now, pool), params)
@@ -0,0 +1,286 @@
+"""Opt-in instrumentation of tool calls and store access.
+
+When a context is built with instrumentation, its store is wrapped in an
+:class:`InstrumentedStore` and every tool handler runs inside an
+:class:`Instruments.invocation` - whether called by :func:`dispatch` (which
+also measures the request setup) or bound directly by the host. Each
+invocation records its wall time and,
+per store operation (get/put/delete), the call count, time spent, rows
+materialized and approximate bytes serialized (the JSON size of the records
+written). Handler time not spent in the store is scoring and formatting.
+
+Finished invocations go to pluggable sinks, chosen by the ``instrumentation``
+config list:
+
+  * ``logging``    - one line per call on the ``chatbot_fifa_extension.metrics``
+    logger;
+  * ``prometheus`` - cumulative counters, rendered in the Prometheus text
+    format by :meth:`PrometheusSink.render` for the host to serve;
+  * ``ring``       - the latest calls in memory, read by the ``recent_calls``
+    admin tool.
+
+Without instrumentation nothing is wrapped, so there is no overhead.
+"""
+
+import collections
+import contextlib
+import contextvars
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+import threading
+import time
+
+from . import storage
+
+
+OPS = ("get", "put", "delete")
+_current = contextvars.ContextVar("fifa_invocation", default=None)
+
+
+@dataclass
+class StoreOps:
+    """Totals of one kind of store operation within an invocation."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class Invocation:
+    """Measurements of one tool call."""
+
+    tool: str
+    pool: str = ""
+    started: float = 0.0  # epoch seconds
+    seconds: float = 0.0
+    error: str = ""  # exception type name when the handler raised
+    store: dict = field(default_factory=lambda: {op: StoreOps() for op in OPS})
+
+    @property
+    def store_calls(self):
+        """Store operations of any kind."""
+        return sum(ops.calls for ops in self.store.values())
+
+    @property
+    def store_seconds(self):
+        """Time spent in the store."""
+        return sum(ops.seconds for ops in self.store.values())
+
+
+def _record(op, start, rows, size=None):
+    invocation = _current.get()
+    if invocation is None:  # store access outside a tool call
+        return
+    ops = invocation.store[op]
+    ops.calls += 1
+    ops.seconds += time.perf_counter() - start
+    ops.rows += rows
+    if size is not None:
+        ops.bytes += size()
+
+
+def _size(item):
+    return len(json.dumps(asdict(item), default=str))
+
+
+class _Get:
+    """Wraps membank's ``store.get`` (both call forms) to count rows."""
+
+    def __init__(self, get):
+        self._get = get
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self._get(*args, **kwargs)
+        _record("get", start, len(rows))
+        return rows
+
+    def __getattr__(self, table):
+        lookup = getattr(self._get, table)
+
+        def get_one(*args, **kwargs):
+            start = time.perf_counter()
+            row = lookup(*args, **kwargs)
+            _record("get", start, 0 if row is None else 1)
+            return row
+        return get_one
+
+
+class InstrumentedStore:
+    """A membank store whose get/put/delete are measured.
+
+    Everything else (query fields such as ``store.player.pool``, the engine)
+    is passed through to the wrapped store.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self.get = _Get(store.get)
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def put(self, item):
+        """Store item, counting its serialized size."""
+        start = time.perf_counter()
+        self._store.put(item)
+        _record("put", start, 1, lambda: _size(item))
+
+    def put_many(self, items, bump=()):
+        """Store items in one transaction (:func:`storage.put_together`)."""
+        items = list(items)
+        start = time.perf_counter()
+        bumped = storage.put_together(self._store, items, bump)
+        _record("put", start, len(items), lambda: sum(_size(item) for item in items))
+        return bumped
+
+    def delete(self, item):
+        """Delete item."""
+        start = time.perf_counter()
+        self._store.delete(item)
+        _record("delete", start, 1)
+
+
+class LoggingSink:
+    """Logs one line per invocation."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("chatbot_fifa_extension.metrics")
+        self.level = level
+
+    def record(self, invocation):
+        """Log invocation."""
+        rows = sum(ops.rows for ops in invocation.store.values())
+        size = sum(ops.bytes for ops in invocation.store.values())
+        self.logger.log(
+            self.level,
+            "tool=%s pool=%s ms=%.2f store_calls=%d store_ms=%.2f rows=%d "
+            "bytes=%d error=%s", invocation.tool, invocation.pool,
+            invocation.seconds * 1000, invocation.store_calls,
+            invocation.store_seconds * 1000, rows, size, invocation.error or "-")
+
+
+class PrometheusSink:
+    """Cumulative per-tool counters in the Prometheus text exposition format."""
+
+    HELP = {
+        "fifa_tool_calls_total": "Tool invocations.",
+        "fifa_tool_errors_total": "Tool invocations that raised.",
+        "fifa_tool_seconds_total": "Wall time spent in tool invocations.",
+        "fifa_store_calls_total": "Store operations made by tools.",
+        "fifa_store_seconds_total": "Wall time spent in store operations.",
+        "fifa_store_rows_total": "Rows read or written by store operations.",
+        "fifa_store_bytes_total": "Approximate bytes serialized by store writes.",
+    }
+
+    def __init__(self):
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def record(self, invocation):
+        """Add invocation to the counters."""
+        tool = invocation.tool
+        with self._lock:
+            values = self._values
+            values["fifa_tool_calls_total", (tool,)] += 1
+            values["fifa_tool_errors_total", (tool,)] += bool(invocation.error)
+            values["fifa_tool_seconds_total", (tool,)] += invocation.seconds
+            for op, ops in invocation.store.items():
+                if not ops.calls:
+                    continue
+                values["fifa_store_calls_total", (tool, op)] += ops.calls
+                values["fifa_store_seconds_total", (tool, op)] += ops.seconds
+                values["fifa_store_rows_total", (tool, op)] += ops.rows
+                values["fifa_store_bytes_total", (tool, op)] += ops.bytes
+
+    def render(self):
+        """The counters as Prometheus text (one HELP/TYPE block per metric)."""
+        with self._lock:
+            values = dict(self._values)
+        lines = []
+        for metric, text in self.HELP.items():
+            samples = sorted((labels, v) for (m, labels), v in values.items()
+                             if m == metric)
+            if not samples:
+                continue
+            lines += [f"# HELP {metric} {text}", f"# TYPE {metric} counter"]
+            for labels, value in samples:
+                names = ("tool", "op")[:len(labels)]
+                tags = ",".join(f'{n}="{v}"' for n, v in zip(names, labels))
+                lines.append(f"{metric}{{{tags}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class RingSink:
+    """Keeps the latest size invocations in memory."""
+
+    def __init__(self, size=256):
+        self._calls = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, invocation):
+        """Remember invocation, forgetting the oldest beyond size."""
+        with self._lock:
+            self._calls.append(invocation)
+
+    def recent(self, count):
+        """Up to count latest invocations, newest first."""
+        with self._lock:
+            return list(self._calls)[::-1][:count]
+
+
+SINKS = {"logging": LoggingSink, "prometheus": PrometheusSink, "ring": RingSink}
+
+
+class Instruments:
+    """Measures invocations and hands them to sinks."""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    @contextlib.contextmanager
+    def invocation(self, tool, pool=""):
+        """Measure the tool call run inside the with block.
+
+        Inside another invocation (a handler run by :func:`dispatch`) the
+        outer one goes on measuring; nothing extra is recorded.
+        """
+        if _current.get() is not None:
+            yield _current.get()
+            return
+        invocation = Invocation(tool, pool, time.time())
+        token = _current.set(invocation)
+        start = time.perf_counter()
+        try:
+            yield invocation
+        except BaseException as exc:
+            invocation.error = type(exc).__name__
+            raise
+        finally:
+            invocation.seconds = time.perf_counter() - start
+            _current.reset(token)
+            for sink in self.sinks:
+                sink.record(invocation)
+
+    def wrap(self, store):
+        """store, instrumented."""
+        return InstrumentedStore(store)
+
+    def sink(self, kind):
+        """The first sink of class kind, or None."""
+        return next((s for s in self.sinks if isinstance(s, kind)), None)
+
+
+def from_conf(names, ring_size=256):
+    """Instruments with the sinks listed by name; ValueError if unknown."""
+    if isinstance(names, str):
+        names = [names]
+    sinks = []
+    for name in names:
+        if name not in SINKS:
+            raise ValueError(f"Unknown instrumentation sink '{name}'")
+        sinks.append(RingSink(ring_size) if name == "ring" else SINKS[name]())
+    return Instruments(sinks)
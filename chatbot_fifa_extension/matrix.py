@@ -0,0 +1,330 @@
+"""The predictions matrix as a memory-mapped file for out-of-process readers.
+
+Reports, dashboards and simulations need every pick of a pool; reading them
+from sqlite means deserializing every Player record. When the context has a
+``matrix_path`` directory, the bot also keeps each pool's picks in a flat
+file there that readers map zero-copy:
+
+    header   magic "FIFAPM2\\0", generation (u64), players, size, match
+             count and names length (u32 each), then the store versions of
+             the pool's player topic and of the match topic (u64 each, 0
+             for never written), little-endian - 48 bytes
+    numbers  the scheduled match numbers (u16 each)
+    names    the player names, NUL-separated UTF-8 (row order)
+    matrix   players x size x 2 int8 goals; ``matrix[(row * size + number) * 2
+             + k]``, NO_PICK (-1) where there is no pick
+
+Sections start 8-byte aligned. The matrix layout is the one of
+:class:`snapshot.Tournament`, so a rebuild is one copy of its bytes.
+
+Every write announced with ``ctx.changed`` keeps the files current
+(:func:`changed`): a prediction write updates its two cells in place and
+bumps the generation (through a writable map each process keeps open per
+pool, see :func:`close`); any other change of the pool's players, or of the
+schedule, rewrites the file atomically from a fresh store read, as does a
+pick the file has no cell for or that doesn't follow the player version the
+file records. A rewrite carries the generation on, so it never goes back.
+Patches and rewrites hold an ``flock`` on a ``.lock`` file next to the
+matrix file, so workers sharing the directory take turns.
+
+Readers notice the replaced file with :meth:`MatrixFile.replaced`, and
+check with :meth:`MatrixFile.current` that no write since is missing from
+it (a worker without ``matrix_path`` writes the store alone); run
+``python -m chatbot_fifa_extension.matrix`` to regenerate from the store.
+"""
+
+import argparse
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from . import snapshot, views
+from .cache import read_versions
+
+
+MAGIC = b"FIFAPM2\x00"
+HEADER = struct.Struct("<8sQIIIIQQ")
+
+_writers = {}  # path -> MatrixFile this process patches picks through
+_lock = threading.Lock()  # guards _writers and orders patches vs rewrites
+
+
+def _pad(length):
+    return -length % 8
+
+
+def _pools(directory):
+    """The pools that have a matrix file in directory."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return set()
+    pools = set()
+    for name in names:
+        if name == "predictions.i8":
+            pools.add("")
+        elif name.startswith("predictions-") and name.endswith(".i8"):
+            pools.add(name[len("predictions-"):-len(".i8")])
+    return pools
+
+
+def path_for(directory, pool=""):
+    """The matrix file of pool inside directory."""
+    return os.path.join(directory, f"predictions-{pool}.i8" if pool else "predictions.i8")
+
+
+def stamp(versions, pool=""):
+    """The (player, match) counters of pool in versions, as files record them.
+
+    :param versions: {topic: counter}, see :func:`cache.read_versions`.
+    """
+    from .context import pool_topic
+    return (versions.get(pool_topic("player", pool)) or 0, versions.get("match") or 0)
+
+
+def write(path, tournament, generation=0, versions=(0, 0)):
+    """Write tournament's predictions matrix to path atomically.
+
+    :param versions: the :func:`stamp` of the store state tournament was read at.
+    """
+    names = "\0".join(p.name for p in tournament.players).encode("utf-8")
+    numbers = struct.pack(f"<{len(tournament.numbers)}H", *tournament.numbers)
+    parts = [
+        HEADER.pack(MAGIC, generation, len(tournament.players), tournament.size,
+                    len(tournament.numbers), len(names), *versions),
+        numbers, b"\0" * _pad(len(numbers)),
+        names, b"\0" * _pad(len(names)),
+        tournament.matrix.tobytes(),
+    ]
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".matrix-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            for part in parts:
+                handle.write(part)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class MatrixFile:
+    """A mapped matrix file; read-only unless writable.
+
+    Use as a context manager, or :meth:`close` when done.
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        with open(path, "r+b" if writable else "rb") as handle:
+            self._inode = os.fstat(handle.fileno()).st_ino
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._map = mmap.mmap(handle.fileno(), 0, access=access)
+        magic, _, players, size, count, names_len, *_ = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a predictions matrix file")
+        offset = HEADER.size
+        self.numbers = struct.unpack_from(f"<{count}H", self._map, offset)
+        offset += 2 * count + _pad(2 * count)
+        raw = bytes(self._map[offset:offset + names_len])
+        self.names = raw.decode("utf-8").split("\0") if players else []
+        offset += names_len + _pad(names_len)
+        self.size = size
+        self.rows = {name: i for i, name in enumerate(self.names)}
+        self.matrix = memoryview(self._map)[offset:offset + players * size * 2].cast("b")
+
+    @property
+    def generation(self):
+        """Counter bumped by every in-place update."""
+        return HEADER.unpack_from(self._map)[1]
+
+    @property
+    def versions(self):
+        """The (player, match) store versions the file is current with."""
+        return tuple(HEADER.unpack_from(self._map)[6:])
+
+    def current(self, versions, pool=""):
+        """Whether the file holds the store state of versions for pool.
+
+        :param versions: {topic: counter}, see :func:`cache.read_versions`.
+        """
+        return self.versions == stamp(versions, pool)
+
+    def replaced(self):
+        """True when the file at path has been rewritten since it was mapped."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def row(self, name):
+        """The 2 * size int8 picks of name (a view into the map), or None."""
+        i = self.rows.get(name)
+        if i is None:
+            return None
+        width = 2 * self.size
+        return self.matrix[i * width:(i + 1) * width]
+
+    def pick(self, name, number):
+        """The (home, away) pick of name for match number, or None."""
+        row = self.row(name)
+        if row is None or not 0 <= number < self.size or row[2 * number] == views.NO_PICK:
+            return None
+        return (row[2 * number], row[2 * number + 1])
+
+    def set(self, name, number, home, away, version=None):
+        """Write one pick in place; False when the file has no cell for it.
+
+        version, when given, becomes the recorded player version.
+        """
+        row = self.row(name)
+        if row is None or not 0 <= number < self.size:
+            return False
+        row[2 * number] = home
+        row[2 * number + 1] = away
+        struct.pack_into("<Q", self._map, 8, self.generation + 1)
+        if version is not None:
+            struct.pack_into("<Q", self._map, HEADER.size - 16, version)
+        return True
+
+    def close(self):
+        """Unmap the file."""
+        self.matrix.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _generation(path):
+    """The generation of the file at path, -1 when there is none."""
+    try:
+        with open(path, "rb") as handle:
+            magic, generation, *_ = HEADER.unpack(handle.read(HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return -1
+    return generation if magic == MAGIC else -1
+
+
+@contextlib.contextmanager
+def _locked(path):
+    """Hold the cross-process lock of the matrix file at path."""
+    with open(path + ".lock", "ab") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def _release(path):
+    mapped = _writers.pop(path, None)
+    if mapped is not None:
+        mapped.close()
+
+
+def close():
+    """Unmap the files this process keeps open for patching picks."""
+    with _lock:
+        for path in list(_writers):
+            _release(path)
+
+
+def _rewrite(ctx, path):
+    """Rewrite path from the store; the caller holds both locks."""
+    versions = stamp(read_versions(ctx.store), ctx.pool)  # first: never too new
+    tournament = snapshot.load(ctx)
+    _release(path)
+    write(path, tournament, _generation(path) + 1, versions)
+
+
+def rebuild(ctx):
+    """Rewrite the request pool's matrix file from the store (if configured)."""
+    if not ctx.matrix_path:
+        return
+    path = path_for(ctx.matrix_path, ctx.pool)
+    with _lock, _locked(path):
+        _rewrite(ctx, path)
+
+
+def picked(ctx, name, number, home, away, bump=None):
+    """Reflect a saved pick in the pool's matrix file (if configured).
+
+    Call after the write has been announced, so a rebuild reads the new state.
+    bump is the (previous, new) counter of the pool's player topic from that
+    announcement: the pick is patched in only when the file recorded
+    previous, i.e. held every earlier write, else (or without bump) the file
+    is rewritten.
+    """
+    if not ctx.matrix_path:
+        return
+    path = path_for(ctx.matrix_path, ctx.pool)
+    with _lock, _locked(path):
+        mapped = _writers.get(path)
+        if mapped is None or mapped.replaced():
+            _release(path)
+            try:
+                mapped = _writers[path] = MatrixFile(path, writable=True)
+            except (FileNotFoundError, ValueError):
+                mapped = None
+        if mapped is not None and bump is not None:
+            previous, new = (counter or 0 for counter in bump)
+            recorded = mapped.versions[0]
+            if recorded == new:  # rewritten since, with the pick
+                return
+            if recorded == previous and mapped.set(name, number, home, away, new):
+                return
+        _rewrite(ctx, path)
+
+
+def changed(engine, bumps, pick=None):
+    """Bring the matrix files up to date with a write (if configured).
+
+    Called by :meth:`FifaContext.changed` with its store-version bumps,
+    {topic: (previous, new)} (None when not known yet, which rewrites the
+    file instead of patching it). A player topic rewrites its pool's file; the
+    match topic every file there is. pick is the (name, number, home, away)
+    of a lone prediction write, which is patched in place instead.
+    """
+    if not engine.matrix_path:
+        return
+    from .context import RequestContext
+    pools = set()
+    for topic in bumps:
+        name, _, pool = topic.partition("@")
+        if name == "player":
+            pools.add(pool)
+        elif name == "match":
+            pools |= _pools(engine.matrix_path)
+    for pool in sorted(pools):
+        ctx = RequestContext(engine, pool=pool)
+        if pick is None:
+            rebuild(ctx)
+        else:
+            picked(ctx, *pick, bump=bumps.get(ctx.topic("player")))
+
+
+def main(argv=None):
+    """Command-line entry point: (re)write matrix files from a store."""
+    from .context import build_context
+    parser = argparse.ArgumentParser(description="Write the predictions matrix file.")
+    parser.add_argument("--db", default=".",
+                        help="Directory holding the membank 'db' file.")
+    parser.add_argument("--out", default=None,
+                        help="Directory for the matrix files (default: --db).")
+    parser.add_argument("--pool", action="append", default=None,
+                        help="Pool to write (repeatable; default: the default pool).")
+    args = parser.parse_args(argv)
+    ctx = build_context({"database_path": args.db, "matrix_path": args.out or args.db})
+    for pool in args.pool or [""]:
+        rebuild(ctx.request(pool=pool))
+        print(f"Wrote {path_for(ctx.matrix_path, pool)}")
+
+
+if __name__ == "__main__":
+    main()
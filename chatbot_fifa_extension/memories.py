@@ -1,7 +1,18 @@
-"""Permanent memory objects."""
+"""Permanent memory objects.
+
+Players and admin sessions belong to a pool (one prediction contest; "" is
+the default pool), so one store can host many pools. They are keyed by a
+composite ``id`` of pool and natural key (see :func:`pool_id`). The schedule -
+groups and matches - is shared by every pool in the store.
+"""
 import dataclasses
 
 
+def pool_id(pool, key):
+    """Composite record id of key (a player name or talker) within pool."""
+    return f"{pool or ''}:{key}"
+
+
 @dataclasses.dataclass()
 class Group:
     """A tournament group and the teams competing in it.
@@ -31,26 +42,78 @@ class Match:
 
 @dataclasses.dataclass()
 class Admin:
-    """A session/device that has authenticated as a tournament administrator.
+    """A session/device that has authenticated as a pool administrator.
 
     talker is the caller's session identity (the same id players are resolved
     by). Once recorded, admin-gated tools authorize this talker without the
     secret being re-supplied, so it survives the conversation history window.
+    Admin rights are per pool.
     """
-    talker: str = dataclasses.field(default=None, metadata={"key": True})
+    talker: str = None
+    pool: str = ""
+    id: str = dataclasses.field(default="", metadata={"key": True})
+
+    def __post_init__(self):
+        self.pool = self.pool or ""
+        self.id = self.id or pool_id(self.pool, self.talker)
 
 
 @dataclasses.dataclass()
 class Player:
     """A player and their per-match score predictions.
 
-    name is the display name (key). talker links the player to a browser/session
-    identity (from the conversation); betting actions resolve the player by
-    talker, so the player never has to re-state their name. An admin can repoint
-    talker if the player loses their session (cleared cookies).
+    name is the display name, unique within the player's pool. talker links the
+    player to a browser/session identity (from the conversation); betting
+    actions resolve the player by talker, so the player never has to re-state
+    their name. An admin can repoint talker if the player loses their session
+    (cleared cookies).
     predictions maps str(match number) -> [home_goals, away_goals].
+    timezone is the player's preferred IANA zone for kickoff times ("" = UTC).
     """
-    name: str = dataclasses.field(default=None, metadata={"key": True})
+    name: str = None
     talker: str = ""  # legacy single-session field (kept so old links still match)
     talkers: list = dataclasses.field(default_factory=list)  # linked session ids
     predictions: dict = dataclasses.field(default_factory=dict)
+    pool: str = ""
+    id: str = dataclasses.field(default="", metadata={"key": True})
+    timezone: str = ""
+
+    def __post_init__(self):
+        self.pool = self.pool or ""
+        self.id = self.id or pool_id(self.pool, self.name)
+        self.timezone = self.timezone or ""
+
+
+@dataclasses.dataclass()
+class StoreVersion:
+    """Write counter for one topic of the store ("match", "player", ...).
+
+    Every tool that writes a topic bumps its counter, so worker processes
+    sharing the sqlite file can tell from one small read whether their cached
+    views of that topic are stale.
+    """
+    topic: str = dataclasses.field(default=None, metadata={"key": True})
+    counter: int = 0
+
+
+@dataclasses.dataclass()
+class AuditEvent:
+    """One change of a prediction or a result, as logged in the audit trail.
+
+    Events are only ever added. id is unique (nanosecond clock plus a random
+    suffix); seq numbers the events in commit order, assigned as they are
+    written (see :func:`storage.put_many`); at is the request clock the change
+    was accepted at. player is "" for results; old is [] when there was
+    nothing before.
+    """
+    id: str = dataclasses.field(default=None, metadata={"key": True})
+    seq: int = dataclasses.field(default=0, metadata={"sequence": True})
+    at: str = ""
+    kind: str = "pick"  # "pick" or "result"
+    pool: str = ""
+    player: str = ""
+    talker: str = ""
+    tool: str = ""
+    match: int = 0
+    old: list = dataclasses.field(default_factory=list)
+    new: list = dataclasses.field(default_factory=list)
@@ -0,0 +1,93 @@
+"""Who still owes a pick, per upcoming match.
+
+Reminders and the admin overview need "players without a prediction for
+match N" for the next few matches. Scanning every player's predictions per
+match on each ask costs players x matches; instead a :class:`MissingPicks`
+set per pending match is built once per pool and then kept current in place
+by the tools that add picks or players, so reading a match's list costs the
+size of that list.
+
+The sets live in the context's :class:`StoreCache` under the pool's player
+topic and the shared match topic. Writers patch the cached sets and keep them
+across their own version bump; a write from another worker (or any schedule
+change) drops them for a rebuild on the next ask.
+"""
+
+from bisect import bisect_left
+import threading
+
+from . import schedule, snapshot, views
+
+
+class MissingPicks:
+    """Names of the players without a pick, for every pending match.
+
+    :param index: the :class:`schedule.PendingIndex` of matches to track.
+    :param players: the players of the pool (records or views).
+    """
+
+    def __init__(self, index, players):
+        self.index = index
+        self.missing = {match.number: set() for match in index.matches}
+        self._lock = threading.Lock()
+        for player in players:
+            self.joined(player)
+
+    def joined(self, player):
+        """Count player as missing every tracked match they haven't predicted."""
+        player = views.player_views([player])[0]
+        with self._lock:
+            for number, names in self.missing.items():
+                if player.pick(number) is None:
+                    names.add(player.name)
+
+    def picked(self, name, number):
+        """Record that the player called name now has a pick for match number."""
+        with self._lock:
+            names = self.missing.get(number)
+            if names is not None:
+                names.discard(name)
+
+    def window(self, start, horizon):
+        """[(match, sorted names), ...] kicking off in [start, horizon).
+
+        Both bounds are epoch seconds; matches come in kickoff order.
+        """
+        lo = bisect_left(self.index.epochs, start)
+        hi = bisect_left(self.index.epochs, horizon)
+        with self._lock:
+            return [(match, sorted(self.missing[match.number]))
+                    for match in self.index.matches[lo:hi]]
+
+
+def _key(ctx):
+    return ("missing", ctx.pool)
+
+
+def missing_picks(ctx):
+    """The request pool's cached :class:`MissingPicks`, building it once."""
+    def build():
+        players = snapshot.tournament(ctx).players
+        return MissingPicks(schedule.pending_index(ctx), players)
+    return ctx.cache.get(_key(ctx), (ctx.topic("player"), "match"), build)
+
+
+def picked(ctx, name, number):
+    """Apply a new pick to the cached sets, if built; returns the keys to keep.
+
+    Pass the result as ``keep`` to the write's ``ctx.changed("player")``.
+    """
+    current = ctx.cache.peek(_key(ctx))
+    if current is None:
+        return ()
+    current.picked(name, number)
+    return (_key(ctx),)
+
+
+def joined(ctx, player):
+    """Apply a new (or re-linked) player to the cached sets; see :func:`picked`."""
+    current = ctx.cache.peek(_key(ctx))
+    if current is None:
+        return ()
+    current.joined(player)
+    return (_key(ctx),)
@@ -1,6 +1,7 @@
 """Generate a prediction-pool scoring report.
 
-Writes a Markdown report always, and a PDF too if ``reportlab`` is installed.
+Writes a PDF if ``reportlab`` is installed, plus optional Markdown and
+machine-readable exports (JSON Lines, CSV, and Parquet/Arrow via ``pyarrow``).
 
 Run it on the host (reads the live db path from your config; read-only):
 
@@ -8,151 +9,164 @@ Run it on the host (reads the live db path from your config; read-only):
         --conf /home/juris/py-programs/kolumbs/conf.toml \
         --pdf report.pdf --md report.md [--exclude Name1,Name2] [--from 7]
 
+Add --jsonl PATH, --csv PATH, --parquet PATH or --arrow PATH to export the same
+data as flat rows (one schema for every section, see COLUMNS) for dashboards
+and analytics that shouldn't re-run the scoring.
+
 --from N produces an "update" report: only matches from match #N onward are
 detailed, and each player's total is split into a black "Before" baseline
 (matches before #N) and a green "+Since #N" delta (matches from #N onward).
 
 For PDF output install reportlab once:  pip install reportlab
 (or install this package with the extra:  pip install -e ".[report]")
+Parquet/Arrow exports need pyarrow:  pip install -e ".[export]"
+
+With --matrix DIR the players' picks are mapped from the bot's predictions
+matrix file in DIR (see :mod:`.matrix`) instead of being loaded from the
+store; the matches still come from the store. A file that misses writes
+the store has (see :meth:`matrix.MatrixFile.current`) is ignored with a note.
+
+To find out where a slow report spends its time, add --timings (wall time,
+store time and rows per stage, plus peak memory via tracemalloc) and/or
+--profile PATH (a cProfile dump, loadable with pstats or snakeviz).
 """
 
 import argparse
-import tomllib
+import contextlib
+import csv
+import json
 from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
 
-from . import fifa
+from . import instrument, matrix, picks, schedule, scoring, snapshot
+from .cache import read_versions
 from .context import build_context
 
 
-SCORING = (
-    "Scoring: 6 points for an exact score; 3 points for the correct outcome; "
-    "on a match nobody predicted exactly, the closest correct prediction earns "
-    "+2 (or +1 each if several tie)."
-)
+SCORING = scoring.DEFAULT_RULES.describe()
 GREEN = "#1a7f37"
-
-
-def _preds(player):
-    return player.predictions if isinstance(player.predictions, dict) else {}
-
-
-def _kickoff(match):
-    try:
-        moment = datetime.fromisoformat(match.kickoff)
-    except (ValueError, TypeError):
-        return None
-    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+# Flat export schema shared by every section (standings, match, upcoming,
+# missing, rank);
+# columns that don't apply to a section are left empty (None).
+COLUMNS = (
+    "section", "rank", "player", "before", "delta", "total",
+    "match", "stage", "home", "away", "kickoff", "home_goals", "away_goals",
+    "pick_home", "pick_away", "note", "points",
+)
+BATCH_ROWS = 4096  # rows buffered per columnar (Parquet/Arrow) record batch
 
 
 def _fmt_kickoff(match, tz=timezone.utc):
     """Format a match kickoff in the given timezone for display."""
-    moment = _kickoff(match)
-    if moment is None:
-        return match.kickoff
-    return moment.astimezone(tz).strftime("%Y-%m-%d %H:%M %Z")
+    return schedule.format_kickoff(match, tz)
+
+
+def _tournament(ctx, pool):
+    """The pool's cached :class:`snapshot.Tournament`."""
+    return snapshot.tournament(ctx.request(pool=pool))
 
 
-def upcoming(ctx, exclude=(), hours=36):
+def upcoming(ctx, exclude=(), hours=36, pool=""):
     """Preview matches without a final result yet, up to `hours` ahead.
 
     Includes any match that has no result and kicks off before the horizon -
     so already-started matches still awaiting their result are not missed, as
     well as not-yet-played matches within the window. Returns
-    [(match, [(name, pick), ...]), ...]. No scoring (results aren't in yet).
+    [(match, [(name, pick), ...]), ...] in kickoff order, for the players of
+    pool. No scoring (results aren't in yet). Uses the context's pending-match index, so only matches
+    inside the window are visited.
     """
-    exclude = set(exclude)
-    players = [
-        p for p in sorted(ctx.store.get("player"), key=lambda p: p.name)
-        if p.name not in exclude
-    ]
+    players = _tournament(ctx, pool).excluding(exclude)
     horizon = datetime.now(timezone.utc) + timedelta(hours=hours)
-    rows = []
-    for match in sorted(ctx.store.get("match"), key=lambda m: m.number):
-        if match.result:
-            continue
-        moment = _kickoff(match)
-        if moment is None or moment >= horizon:
-            continue
-        picks = []
-        for player in players:
-            pred = _preds(player).get(str(match.number))
-            picks.append((player.name, f"{pred[0]}:{pred[1]}" if pred else "—"))
-        rows.append((match, picks))
-    return rows
+    return schedule.preview(schedule.pending_index(ctx), players,
+                            horizon.timestamp())
+
+
+def missing(ctx, exclude=(), hours=36, pool=""):
+    """Players still without a pick, per match kicking off in the next hours.
+
+    Returns [(match, [name, ...]), ...] in kickoff order for the players of
+    pool, read from the pool's maintained missing-picks sets (see
+    :mod:`picks`). Matches that already kicked off are left out - their picks
+    are locked.
+    """
+    exclude = set(exclude)
+    now = datetime.now(timezone.utc)
+    rows = picks.missing_picks(ctx.request(pool=pool)).window(
+        now.timestamp(), (now + timedelta(hours=hours)).timestamp())
+    return [(match, [n for n in names if n not in exclude])
+            for match, names in rows]
 
 
-def compute(ctx, exclude=(), since=None):
-    """Score the store.
+def rank_history(ctx, exclude=(), pool=""):
+    """The pool's :class:`scoring.RankHistory` (rank per player per result).
+
+    The cached history when nobody is excluded, else one built for the
+    remaining players.
+    """
+    if not exclude:
+        return scoring.history(ctx.request(pool=pool))
+    snap = _tournament(ctx, pool)
+    return scoring.RankHistory(snap.excluding(exclude), snap.matches, ctx.rules)
+
+
+def rank_series(hist):
+    """Chart-ready rank history of a :class:`scoring.RankHistory`.
+
+    Returns {"matches": [number, ...], "series": {name: [rank, ...]}} with one
+    rank per scored match, aligned with matches.
+    """
+    return {"matches": list(hist.events),
+            "series": {name: list(hist.ranks[name]) for name in hist.names}}
+
+
+def compute(ctx, exclude=(), since=None, pool=""):
+    """Score the pool's snapshot (see :mod:`snapshot`) with the context's rules.
 
     Returns (ranking, before, delta, match_rows):
       ranking: player names sorted by grand total (before+delta), high to low.
       before:  {name: points from matches before #since} (all points if no since).
       delta:   {name: points from matches >= #since} (zeros if no since).
       match_rows: [(match, [(name, pick, note, points), ...]), ...] for every
-        played+predicted match (the renderer filters by since for display).
+        played+predicted match (the renderer filters by since for display);
+        matches are :class:`views.MatchView`.
     """
-    exclude = set(exclude)
-    players = [
-        p for p in sorted(ctx.store.get("player"), key=lambda p: p.name)
-        if p.name not in exclude
-    ]
-    matches = sorted(ctx.store.get("match"), key=lambda m: m.number)
+    snap = _tournament(ctx, pool)
+    matches, players = snap.matches, snap.excluding(exclude)
+    score = ctx.rules.score
     before = {p.name: 0 for p in players}
     delta = {p.name: 0 for p in players}
     match_rows = []
     for match in matches:
         if not match.result:
             continue
-        if all(_preds(p).get(str(match.number)) is None for p in players):
+        number = match.number
+        picks = {p.name: pick for p in players
+                 if (pick := p.pick(number)) is not None}
+        if not picks:
             continue
-        info = {}
-        perfect = False
-        for player in players:
-            pred = _preds(player).get(str(match.number))
-            if not pred:
-                info[player.name] = (None, None, None)
-                continue
-            correct, diff = fifa.get_score_bet(match.result, pred)
-            info[player.name] = (pred, correct, diff)
-            if correct and diff == 0:
-                perfect = True
-        cands = [(n, d) for n, (pr, c, d) in info.items() if pr and c and d > 0]
-        closest = []
-        if cands:
-            mind = min(d for _, d in cands)
-            closest = [n for n, d in cands if d == mind]
-        is_since = since is not None and match.number >= since
+        scored = score(match, picks.items())
+        is_since = since is not None and number >= since
         rows = []
         for player in players:
-            pred, correct, diff = info[player.name]
-            if not pred:
+            if player.name not in scored:
                 rows.append((player.name, "—", "no pick", 0))
                 continue
-            pick = f"{pred[0]}:{pred[1]}"
-            if correct and diff == 0:
-                pts, note = 6, "exact score"
-            elif correct:
-                pts, note = 3, "correct outcome"
-                if not perfect and player.name in closest:
-                    bonus = 2 if len(closest) == 1 else 1
-                    pts += bonus
-                    note += f" +{bonus} (closest)"
-            else:
-                pts, note = 0, "wrong"
+            pred = picks[player.name]
+            pts, note = scored[player.name]
             (delta if is_since else before)[player.name] += pts
-            rows.append((player.name, pick, note, pts))
+            rows.append((player.name, f"{pred[0]}:{pred[1]}", note, pts))
         match_rows.append((match, rows))
     ranking = sorted(before, key=lambda n: (-(before[n] + delta[n]), n))
     return ranking, before, delta, match_rows
 
 
 def to_markdown(ranking, before, delta, match_rows, since=None,
-                upcoming_rows=(), hours=36, tz=timezone.utc):
+                upcoming_rows=(), hours=36, tz=timezone.utc, missing_rows=(),
+                series=None, rules_text=SCORING):
     """Render the report as Markdown text."""
     gen = datetime.now(tz).strftime("%Y-%m-%d %H:%M %Z")
     lines = ["# World Cup 2026 — Predictions",
-             f"_Generated {gen}_", "", f"**{SCORING}**", "", "## Standings"]
+             f"_Generated {gen}_", "", f"**{rules_text}**", "", "## Standings"]
     if since:
         lines += ["| # | Player | Total |", "|---|--------|------:|"]
         for i, n in enumerate(ranking, 1):
@@ -186,11 +200,44 @@ def to_markdown(ranking, before, delta, match_rows, since=None,
             for name, pick in picks:
                 lines.append(f"| {name} | {pick} |")
             lines.append("")
+    if missing_rows:
+        lines += ["", "## Missing picks"]
+        for match, names in missing_rows:
+            owed = ", ".join(names) if names else "everyone has picked"
+            lines.append(f"- #{match.number} {match.home} vs {match.away} "
+                         f"({_fmt_kickoff(match, tz)}): {owed}")
+    if series and series["matches"]:
+        matches = series["matches"]
+        lines += ["", "## Rank after each result",
+                  "| Player | " + " | ".join(f"#{n}" for n in matches) + " |",
+                  "|--------|" + "---:|" * len(matches)]
+        for name, ranks in sorted(series["series"].items(),
+                                  key=lambda kv: (kv[1][-1], kv[0])):
+            lines.append(f"| {name} | " + " | ".join(map(str, ranks)) + " |")
     return "\n".join(lines)
 
 
+def _rank_chart(series, width, height):
+    """reportlab line chart of ranks per result (rank 1 on top)."""
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.shapes import Drawing
+    drawing = Drawing(width, height)
+    plot = LinePlot()
+    plot.x, plot.y = 30, 20
+    plot.width, plot.height = width - 40, height - 30
+    count = max((max(r) for r in series["series"].values()), default=1)
+    plot.data = [[(i, count + 1 - rank) for i, rank in enumerate(ranks, 1)]
+                 for ranks in series["series"].values()]
+    plot.xValueAxis.valueMin, plot.xValueAxis.valueMax = 1, max(len(series["matches"]), 2)
+    plot.yValueAxis.valueMin, plot.yValueAxis.valueMax = 0, count + 1
+    plot.yValueAxis.visibleLabels = False
+    drawing.add(plot)
+    return drawing
+
+
 def to_pdf(ranking, before, delta, match_rows, since, path,
-           upcoming_rows=(), hours=36, tz=timezone.utc):
+           upcoming_rows=(), hours=36, tz=timezone.utc, missing_rows=(),
+           series=None, rules_text=SCORING):
     """Write the report as a styled PDF (requires reportlab)."""
     from reportlab.lib.pagesizes import A4
     from reportlab.lib import colors
@@ -220,7 +267,7 @@ def to_pdf(ranking, before, delta, match_rows, since, path,
     el = [
         Paragraph("World Cup 2026 — Predictions", styles["Title"]),
         Paragraph(f"Generated {gen}", styles["Normal"]), Spacer(1, 0.3 * cm),
-        Paragraph(SCORING, styles["Normal"]), Spacer(1, 0.4 * cm),
+        Paragraph(rules_text, styles["Normal"]), Spacer(1, 0.4 * cm),
         Paragraph("Standings", styles["Heading2"]),
     ]
     if since:
@@ -264,12 +311,190 @@ def to_pdf(ranking, before, delta, match_rows, since, path,
                 styles["Heading4"]))
             el.append(styled([["Player", "Pick"]] + [[n, pk] for n, pk in picks],
                              [9.2 * cm, 4.6 * cm], amber))
+    if missing_rows:
+        el += [Spacer(1, 0.5 * cm), Paragraph("Missing picks", styles["Heading2"])]
+        data = [["Match", "Kickoff", "Players"]] + [
+            [f"#{m.number} {m.home} vs {m.away}", _fmt_kickoff(m, tz),
+             Paragraph(", ".join(names) or "everyone has picked", cell)]
+            for m, names in missing_rows]
+        el.append(styled(data, [5 * cm, 3.8 * cm, 5 * cm],
+                         colors.HexColor("#9c6500")))
+    if series and len(series["matches"]) > 1:
+        el += [Spacer(1, 0.5 * cm),
+               Paragraph("Rank after each result", styles["Heading2"]),
+               _rank_chart(series, 13.8 * cm, 6 * cm)]
     SimpleDocTemplate(path, pagesize=(15 * cm, A4[1]),
                       leftMargin=0.6 * cm, rightMargin=0.6 * cm,
                       topMargin=0.6 * cm, bottomMargin=0.6 * cm,
                       title="World Cup 2026 — Predictions").build(el)
 
 
+def _split_pick(pick):
+    """Split a rendered "h:a" pick into ints; (None, None) when there's none."""
+    try:
+        home, away = pick.split(":")
+        return int(home), int(away)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def records(ranking, before, delta, match_rows, since=None, upcoming_rows=(),
+            missing_rows=(), hist=None):
+    """Yield the report as flat dicts keyed by COLUMNS, one per output row.
+
+    Sections, in order: "standings" (one row per ranked player), "match" (one
+    row per player per detailed match, honouring since like the renderers),
+    "upcoming" (one row per player per previewed match), "missing" (one row
+    per player still owing a pick) and "rank" (rank and running total of each
+    player after each scored match, from a :class:`scoring.RankHistory`).
+    Rows are produced lazily so the writers can stream them.
+    """
+    blank = dict.fromkeys(COLUMNS)
+    for i, name in enumerate(ranking, 1):
+        yield {**blank, "section": "standings", "rank": i, "player": name,
+               "before": before[name], "delta": delta[name],
+               "total": before[name] + delta[name]}
+    for match, rows in match_rows:
+        if since and match.number < since:
+            continue
+        head = {**blank, "section": "match", "match": match.number,
+                "stage": match.stage, "home": match.home, "away": match.away,
+                "kickoff": match.kickoff, "home_goals": match.result[0],
+                "away_goals": match.result[1]}
+        for name, pick, note, pts in rows:
+            pick_home, pick_away = _split_pick(pick)
+            yield {**head, "player": name, "pick_home": pick_home,
+                   "pick_away": pick_away, "note": note, "points": pts}
+    for match, picks in upcoming_rows:
+        head = {**blank, "section": "upcoming", "match": match.number,
+                "stage": match.stage, "home": match.home, "away": match.away,
+                "kickoff": match.kickoff}
+        for name, pick in picks:
+            pick_home, pick_away = _split_pick(pick)
+            yield {**head, "player": name, "pick_home": pick_home,
+                   "pick_away": pick_away}
+    for match, names in missing_rows:
+        head = {**blank, "section": "missing", "match": match.number,
+                "stage": match.stage, "home": match.home, "away": match.away,
+                "kickoff": match.kickoff}
+        for name in names:
+            yield {**head, "player": name}
+    for name in (hist.names if hist else ()):
+        for number, total, rank in hist.timeline(name):
+            yield {**blank, "section": "rank", "player": name, "match": number,
+                   "rank": rank, "total": total}
+
+
+def to_jsonl(rows, path):
+    """Write rows (from :func:`records`) as JSON Lines; returns the row count."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for row in rows:
+            handle.write(json.dumps(row, ensure_ascii=False))
+            handle.write("\n")
+            count += 1
+    return count
+
+
+def to_csv(rows, path):
+    """Write rows (from :func:`records`) as CSV with a COLUMNS header."""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _arrow_schema(pa):
+    """Arrow schema for COLUMNS (nullable int32 counts, strings otherwise)."""
+    ints = {"rank", "before", "delta", "total", "match", "home_goals",
+            "away_goals", "pick_home", "pick_away", "points"}
+    return pa.schema([(c, pa.int32() if c in ints else pa.string())
+                      for c in COLUMNS])
+
+
+def to_columnar(rows, path, fmt="parquet", batch_rows=BATCH_ROWS):
+    """Stream rows (from :func:`records`) into a Parquet or Arrow IPC file.
+
+    Rows are buffered column-wise in record batches of ``batch_rows``, so
+    memory stays bounded however large the pool is. Requires pyarrow
+    (ImportError otherwise, like :func:`to_pdf` with reportlab).
+    """
+    import pyarrow as pa
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        open_writer = pq.ParquetWriter
+    elif fmt == "arrow":
+        open_writer = pa.ipc.new_file
+    else:
+        raise ValueError(f"Unknown columnar format '{fmt}'")
+    schema = _arrow_schema(pa)
+    columns = {c: [] for c in COLUMNS}
+    count = 0
+
+    def flush(writer):
+        writer.write_batch(pa.record_batch(
+            [columns[c] for c in COLUMNS], schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    with open_writer(path, schema) as writer:
+        for row in rows:
+            for column in COLUMNS:
+                columns[column].append(row[column])
+            count += 1
+            if count % batch_rows == 0:
+                flush(writer)
+        if count % batch_rows or not count:
+            flush(writer)
+    return count
+
+
+class StageTimings:
+    """Per-stage measurements of a report run (``--timings``).
+
+    Each stage is one :class:`instrument.Invocation`, so store time and rows
+    are split out of its wall time; peak memory comes from tracemalloc,
+    started by :meth:`start`.
+    """
+
+    def __init__(self):
+        self.ring = instrument.RingSink(64)
+        self.instruments = instrument.Instruments([self.ring])
+
+    def start(self):
+        """Begin tracing memory allocations."""
+        import tracemalloc
+        tracemalloc.start()
+
+    def stage(self, name):
+        """Measure the with block as stage name."""
+        return self.instruments.invocation(name)
+
+    def render(self):
+        """Stage table and the tracemalloc peak, as text (stops tracing)."""
+        import tracemalloc
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines = [f"{'stage':<10} {'ms':>9} {'store ms':>9} {'calls':>6} {'rows':>8}"]
+        for call in reversed(self.ring.recent(64)):
+            rows = sum(ops.rows for ops in call.store.values())
+            failed = f"  ({call.error})" if call.error else ""
+            lines.append(
+                f"{call.tool:<10} {call.seconds * 1000:>9.1f} "
+                f"{call.store_seconds * 1000:>9.1f} {call.store_calls:>6} "
+                f"{rows:>8}{failed}")
+        lines.append(f"Peak traced memory: {peak / 2 ** 20:.1f} MiB")
+        return "\n".join(lines)
+
+
+def _unmeasured(_name):
+    return contextlib.nullcontext()
+
+
 def main(argv=None):
     """Command-line entry point."""
     parser = argparse.ArgumentParser(
@@ -279,14 +504,26 @@ def main(argv=None):
         help="Directory holding the membank 'db' file (default: current dir).")
     parser.add_argument(
         "--conf", default=None,
-        help="Read the database path from this conf.toml instead of --db.")
+        help="Read the database path (and scoring rules) from this conf.toml "
+        "instead of --db.")
     parser.add_argument("--pdf", default="report.pdf",
                         help="Output PDF path (skipped if reportlab missing).")
     parser.add_argument("--md", default=None,
                         help="Optional Markdown output path (off by default).")
+    parser.add_argument("--jsonl", default=None,
+                        help="Optional JSON Lines export path.")
+    parser.add_argument("--csv", default=None,
+                        help="Optional CSV export path.")
+    parser.add_argument("--parquet", default=None,
+                        help="Optional Parquet export path (needs pyarrow).")
+    parser.add_argument("--arrow", default=None,
+                        help="Optional Arrow IPC export path (needs pyarrow).")
     parser.add_argument("--tz", default=None,
                         help="Timezone for displayed kickoff times, e.g. "
                         "Europe/Riga (default UTC).")
+    parser.add_argument("--pool", default="",
+                        help="Prediction pool to report on (default: the "
+                        "default pool).")
     parser.add_argument("--exclude", default="",
                         help="Comma-separated player names to leave out.")
     parser.add_argument(
@@ -295,35 +532,124 @@ def main(argv=None):
         "and split standings into Before (black) + Since (green).")
     parser.add_argument(
         "--upcoming", type=int, default=36,
-        help="Hours ahead to preview not-yet-played matches' predictions "
-        "(default 36; 0 to disable).")
+        help="Hours ahead to preview not-yet-played matches' predictions and "
+        "list missing picks (default 36; 0 to disable).")
+    parser.add_argument(
+        "--matrix", default=None, metavar="DIR",
+        help="Map the picks from the predictions matrix file in DIR (the "
+        "bot's matrix_path) instead of loading the players from the store.")
+    parser.add_argument(
+        "--timings", action="store_true",
+        help="Print wall time, store time and rows per stage and the peak "
+        "memory (tracemalloc slows the run down).")
+    parser.add_argument(
+        "--profile", default=None, metavar="PATH",
+        help="Write a cProfile dump of the run to PATH and print the top "
+        "functions by cumulative time.")
     args = parser.parse_args(argv)
+    timings = StageTimings() if args.timings else None
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if timings:
+        timings.start()
+    if profiler:
+        profiler.enable()
+    try:
+        _run(args, timings)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            import pstats
+            print(f"\nProfile written to {args.profile}; top functions:")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        if timings:
+            print("\nTimings:")
+            print(timings.render())
+
+
+def _run(args, timings=None):
+    """Generate the report for parsed command-line args."""
+    stage = timings.stage if timings else _unmeasured
 
     tz = timezone.utc
     if args.tz:
         try:
-            tz = ZoneInfo(args.tz)
-        except Exception:
+            tz = schedule.zone(args.tz)
+        except ValueError:
             print(f"Unknown timezone '{args.tz}', using UTC.")
 
     if args.conf:
+        import tomllib
         with open(args.conf, "rb") as handle:
-            database_path = tomllib.load(handle)["chatbot_fifa_extension"]["database_path"]
+            section = tomllib.load(handle)["chatbot_fifa_extension"]
+        conf = {"database_path": section["database_path"],
+                "scoring": section.get("scoring", {})}
     else:
-        database_path = args.db
-    ctx = build_context({"database_path": database_path})
+        conf = {"database_path": args.db}
+    with contextlib.ExitStack() as stack:
+        with stage("open"):
+            ctx = build_context(conf, timings.instruments if timings else None)
+            if args.matrix:
+                path = matrix.path_for(args.matrix, args.pool)
+                mapped = stack.enter_context(matrix.MatrixFile(path))
+                if mapped.current(read_versions(ctx.store), args.pool):
+                    request = ctx.request(pool=args.pool)
+                    snapshot.prime(request, snapshot.Tournament.mapped(
+                        request.store.get("match"), mapped, args.pool))
+                    stack.callback(ctx.cache.clear)  # release the views first
+                else:
+                    print(f"{path} is behind the store; reading the picks "
+                          "from the store instead.")
+        _report(args, ctx, tz, stage)
+
+
+def _report(args, ctx, tz, stage):
+    rules_text = ctx.rules.describe()
     exclude = [x.strip() for x in args.exclude.split(",") if x.strip()]
-    ranking, before, delta, match_rows = compute(ctx, exclude, args.since)
-    upcoming_rows = upcoming(ctx, exclude, args.upcoming) if args.upcoming else []
+    with stage("compute"):
+        ranking, before, delta, match_rows = compute(ctx, exclude, args.since,
+                                                     args.pool)
+    with stage("upcoming"):
+        upcoming_rows = (upcoming(ctx, exclude, args.upcoming, args.pool)
+                         if args.upcoming else [])
+        missing_rows = (missing(ctx, exclude, args.upcoming, args.pool)
+                        if args.upcoming else [])
+    with stage("history"):
+        hist = rank_history(ctx, exclude, args.pool)
 
     if args.md:
-        with open(args.md, "w", encoding="utf-8") as handle:
+        with stage("markdown"), open(args.md, "w", encoding="utf-8") as handle:
             handle.write(to_markdown(ranking, before, delta, match_rows,
-                                     args.since, upcoming_rows, args.upcoming, tz))
+                                     args.since, upcoming_rows, args.upcoming, tz,
+                                     missing_rows, rank_series(hist), rules_text))
         print(f"Wrote {args.md}")
+
+    def rows():
+        return records(ranking, before, delta, match_rows, args.since,
+                       upcoming_rows, missing_rows, hist)
+
+    for path, write in ((args.jsonl, to_jsonl), (args.csv, to_csv)):
+        if path:
+            with stage(write.__name__[3:]):
+                count = write(rows(), path)
+            print(f"Wrote {path} ({count} rows)")
+    for path, fmt in ((args.parquet, "parquet"), (args.arrow, "arrow")):
+        if not path:
+            continue
+        try:
+            with stage(fmt):
+                count = to_columnar(rows(), path, fmt)
+            print(f"Wrote {path} ({count} rows)")
+        except ImportError:
+            print(f"pyarrow not installed - {fmt} skipped. Install: pip install pyarrow")
     try:
-        to_pdf(ranking, before, delta, match_rows, args.since, args.pdf,
-               upcoming_rows, args.upcoming, tz)
+        with stage("pdf"):
+            to_pdf(ranking, before, delta, match_rows, args.since, args.pdf,
+                   upcoming_rows, args.upcoming, tz, missing_rows, rank_series(hist),
+                   rules_text)
         print(f"Wrote {args.pdf}")
     except ImportError:
         print("reportlab not installed - PDF skipped. Install: pip install reportlab")
@@ -0,0 +1,116 @@
+"""Time-indexed views over the loaded match schedule.
+
+Kickoffs are parsed once into epoch seconds when an index is built, so time
+window queries are a bisect over a sorted array instead of a sort and a
+datetime parse per match per call. Parsing and local-time rendering are
+memoized by value (kickoff string, epoch and timezone), so they never need
+invalidating and repeated rows in large reports cost a dict lookup.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+import functools
+
+
+KICKOFF_FORMAT = "%Y-%m-%d %H:%M %Z"
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_epoch(kickoff):
+    try:
+        moment = datetime.fromisoformat(kickoff)
+    except (ValueError, TypeError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def kickoff_epoch(match):
+    """Kickoff as integer epoch seconds (naive times are UTC), or None."""
+    return _parse_epoch(match.kickoff)
+
+
+@functools.lru_cache(maxsize=256)
+def zone(name):
+    """The tzinfo called name ("" or "UTC" for UTC); ValueError if unknown."""
+    if not name or name.upper() == "UTC":
+        return timezone.utc
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"Unknown timezone '{name}'") from exc
+
+
+@functools.lru_cache(maxsize=8192)
+def _format_epoch(epoch, tz):
+    return datetime.fromtimestamp(epoch, tz).strftime(KICKOFF_FORMAT)
+
+
+def format_kickoff(match, tz=timezone.utc):
+    """Kickoff rendered in tz (memoized per kickoff and zone).
+
+    Falls back to the stored string when it can't be parsed.
+    """
+    epoch = kickoff_epoch(match)
+    if epoch is None:
+        return match.kickoff
+    return _format_epoch(epoch, tz)
+
+
+class PendingIndex:
+    """Matches without a result, sorted by kickoff (then number).
+
+    Matches with an unparseable kickoff are left out, as they can't fall in
+    any time window.
+    """
+
+    def __init__(self, matches):
+        pending = []
+        for match in matches:
+            if match.result:
+                continue
+            epoch = kickoff_epoch(match)
+            if epoch is not None:
+                pending.append((epoch, match.number, match))
+        pending.sort(key=lambda row: row[:2])
+        self.epochs = [epoch for epoch, _, _ in pending]
+        self.matches = [match for _, _, match in pending]
+
+    def __len__(self):
+        return len(self.matches)
+
+    def before(self, horizon):
+        """Pending matches kicking off before ``horizon`` (epoch seconds).
+
+        Includes already-started matches still awaiting their result.
+        """
+        return self.matches[:bisect_left(self.epochs, horizon)]
+
+
+def pending_index(ctx):
+    """Return the context's cached :class:`PendingIndex`, building it once.
+
+    Rebuilt after any write to matches (schedule loads, results).
+    """
+    return ctx.cache.get("pending", ("match",),
+                         lambda: PendingIndex(ctx.store.get("match")))
+
+
+def preview(index, players, horizon):
+    """Picks for every pending match kicking off before ``horizon``.
+
+    players are :class:`views.PlayerView` (e.g. from the pool's snapshot).
+    Returns [(match, [(name, pick), ...]), ...] with pick rendered "h:a", or
+    "—" when the player hasn't predicted. Costs one array lookup per player
+    per match in the window.
+    """
+    rows = []
+    for match in index.before(horizon):
+        picks = []
+        for player in players:
+            pred = player.pick(match.number)
+            picks.append((player.name, f"{pred[0]}:{pred[1]}" if pred else "—"))
+        rows.append((match, picks))
+    return rows
@@ -0,0 +1,162 @@
+"""Kickoff-driven events for hosts that want to act ahead of time.
+
+Predictions lock lazily (a tool call after kickoff is refused), which is all
+the tools need. Hosts that want to push reminders, warn admins about missing
+results or pre-warm caches before a kickoff surge can instead run a
+:class:`KickoffScheduler`: a heap of upcoming event times built from the
+loaded schedule, firing registered hooks as each moment passes.
+
+Event kinds, per scheduled match (offsets configurable):
+
+  * ``warm``       - shortly before the reminder, to pre-build caches;
+  * ``reminder``   - T-minus reminder before kickoff;
+  * ``lock``       - kickoff: predictions are now locked for players;
+  * ``result_due`` - some time after kickoff, fired only if no result has been
+    entered by then.
+"""
+
+from dataclasses import dataclass
+import heapq
+import logging
+import threading
+import time
+
+from . import schedule
+from .cache import read_versions
+from .writebehind import flush_hook
+
+
+LOG = logging.getLogger("chatbot_fifa_extension.scheduler")
+
+KINDS = ("warm", "reminder", "lock", "result_due")
+_UNLOADED = object()
+
+
+@dataclass(frozen=True, order=True)
+class Event:
+    """One scheduled moment: at (epoch seconds), kind and match number."""
+
+    at: int
+    kind: str
+    match: int
+
+
+class KickoffScheduler:
+    """Heap of upcoming schedule events with hooks per event kind.
+
+    :param ctx: the :class:`FifaContext` whose store holds the schedule.
+    :param reminder: seconds before kickoff for the ``reminder`` event.
+    :param warm: seconds before the reminder for the ``warm`` event.
+    :param result_due: seconds after kickoff for the ``result_due`` event.
+
+    The heap is rebuilt whenever the store's match version moves (schedule
+    loaded or cleared, results entered), checked on every :meth:`run_due`.
+    When ctx batches its writes (:mod:`.writebehind`), every ``lock`` event
+    first commits what is queued (:func:`writebehind.flush_hook`).
+    """
+
+    def __init__(self, ctx, reminder=3600, warm=300, result_due=2 * 3600 + 1800):
+        self.ctx = ctx
+        self.offsets = {"warm": -(reminder + warm), "reminder": -reminder,
+                        "lock": 0, "result_due": result_due}
+        self.hooks = {kind: [] for kind in KINDS}
+        if ctx.writes is not None:
+            self.on("lock", flush_hook(ctx))
+        self._heap = []
+        self._version = _UNLOADED
+        self._cursor = None  # events up to this time have been handled
+        self._lock = threading.Lock()
+
+    def on(self, kind, hook):
+        """Call hook(event, match) whenever an event of kind fires."""
+        if kind not in self.hooks:
+            raise ValueError(f"Unknown event kind '{kind}'")
+        self.hooks[kind].append(hook)
+        return hook
+
+    def load(self, now=None):
+        """Rebuild the heap with every event still ahead of now (epoch secs).
+
+        Events at or before now count as handled and will not fire.
+        """
+        now = time.time() if now is None else now
+        events = []
+        for match in self.ctx.store.get("match"):
+            kickoff = schedule.kickoff_epoch(match)
+            if kickoff is None:
+                continue
+            for kind, offset in self.offsets.items():
+                if kind == "result_due" and match.result:
+                    continue
+                if kickoff + offset > now:
+                    events.append(Event(kickoff + offset, kind, match.number))
+        heapq.heapify(events)
+        with self._lock:
+            self._heap = events
+            self._version = read_versions(self.ctx.store).get("match")
+            self._cursor = now
+
+    def _refresh(self, now):
+        if self._version is _UNLOADED:
+            self.load(now)
+        elif read_versions(self.ctx.store).get("match") != self._version:
+            self.load(self._cursor)  # keep events not handled yet
+
+    def next_at(self):
+        """Epoch seconds of the next event, or None when nothing is scheduled."""
+        with self._lock:
+            return self._heap[0].at if self._heap else None
+
+    def run_due(self, now=None):
+        """Fire every event due by now; returns the events that fired.
+
+        A ``result_due`` event is dropped if the result was entered meanwhile.
+        A hook that raises is logged and skipped; the other hooks and events
+        still run.
+        """
+        now = time.time() if now is None else now
+        self._refresh(now)
+        fired = []
+        try:
+            while True:
+                with self._lock:
+                    if not self._heap or self._heap[0].at > now:
+                        break
+                    event = heapq.heappop(self._heap)
+                match = self.ctx.store.get.match(number=event.match)
+                if match is None or (event.kind == "result_due" and match.result):
+                    continue
+                fired.append(event)
+                for hook in self.hooks[event.kind]:
+                    try:
+                        hook(event, match)
+                    except Exception:  # pylint: disable=broad-except
+                        LOG.exception("%s hook %r for match %d failed",
+                                      event.kind, hook, event.match)
+        finally:
+            with self._lock:
+                self._cursor = max(self._cursor, now)
+        return fired
+
+    def run(self, stop, idle=60.0):
+        """Fire events as they come due until the threading.Event stop is set.
+
+        Sleeps until the next event, but at most idle seconds so schedule
+        changes made by other workers are picked up. A pass that fails (e.g.
+        the store is unreachable) is logged and retried after the wait.
+        """
+        while not stop.is_set():
+            try:
+                self.run_due()
+            except Exception:  # pylint: disable=broad-except
+                LOG.exception("kickoff scheduler pass failed")
+            upcoming = self.next_at()
+            wait = idle if upcoming is None else min(idle, upcoming - time.time())
+            stop.wait(max(wait, 0.0))
+
+
+def warm_caches(ctx):
+    """Hook-friendly cache pre-warm: builds the shared schedule index."""
+    def hook(_event, _match):
+        schedule.pending_index(ctx)
+    return hook
@@ -0,0 +1,329 @@
+"""Scoring of predictions against results, and the ranking history.
+
+The scheme is a declarative :class:`ScoringRules` (by default the original
+one: 6 points for an exact score, 3 for the correct outcome; on a match
+nobody predicted exactly, the closest correct prediction, by goal difference,
+earns +2, or +1 each if several tie). Pools may add per-stage multipliers and
+a knockout bonus for the winning team, from the ``scoring`` config table.
+The rules compile once into a plain scoring function shared by the tools and
+the report.
+
+Results are replayed in kickoff order into a :class:`RankHistory` - each
+player's running total and rank after every scored match - so "how much did
+I move", "biggest movers" and rank timelines are lookups instead of two full
+standings recomputes. The history is cached per pool under the ``scores``
+topic - bumped by the writes that change who is ranked or a pick on a started
+match - and the shared match topic; picks on upcoming matches leave it be, and
+a new result is replayed onto it in place (see :func:`scored`).
+"""
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field, fields
+import functools
+import heapq
+
+from . import fifa, snapshot, views
+
+
+def _sign(home, away):
+    return (home > away) - (home < away)
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """How a match's predictions are scored; the defaults are the original scheme.
+
+    :param exact: points for the exact score.
+    :param outcome: points for the correct outcome (winner, or a draw).
+    :param closest: bonus for the single closest correct pick on a match
+        nobody predicted exactly.
+    :param closest_shared: bonus each when several picks tie for closest.
+    :param advance: knockout-stage bonus for picking the winning (advancing)
+        team. Only decisive results earn it: penalty shootouts aren't
+        recorded, so a drawn knockout result has no known winner.
+    :param stage_weights: {stage: multiplier} applied to all of a match's
+        points (rounded to whole points); unlisted stages weigh 1.
+    :param group_stages: stages that are not knockout rounds.
+
+    Build from the ``scoring`` config table with :meth:`from_conf`; score
+    with :attr:`score`, compiled once per rules object.
+    """
+
+    exact: int = 6
+    outcome: int = 3
+    closest: int = 2
+    closest_shared: int = 1
+    advance: int = 0
+    stage_weights: dict = field(default_factory=dict)
+    group_stages: tuple = ("group",)
+
+    def __post_init__(self):
+        bad = [f"{stage}={weight!r}" for stage, weight in dict(self.stage_weights).items()
+               if isinstance(weight, bool) or not isinstance(weight, (int, float))
+               or not weight >= 0]
+        if bad:
+            raise ValueError("Stage weights must be non-negative numbers: "
+                             + ", ".join(bad))
+        object.__setattr__(self, "group_stages", tuple(self.group_stages))
+        object.__setattr__(self, "score", self._compile())
+
+    @classmethod
+    def from_conf(cls, conf):
+        """Rules from a config mapping; ValueError on unknown keys or bad weights."""
+        names = {f.name for f in fields(cls)}
+        unknown = set(conf) - names
+        if unknown:
+            raise ValueError(f"Unknown scoring setting(s): {', '.join(sorted(unknown))}")
+        return cls(**conf)
+
+    def describe(self):
+        """The rules as one human-readable sentence (or a few)."""
+        text = (
+            f"Scoring: {self.exact} points for an exact score; {self.outcome} "
+            "points for the correct outcome; on a match nobody predicted "
+            f"exactly, the closest correct prediction earns +{self.closest} "
+            f"(or +{self.closest_shared} each if several tie)."
+        )
+        if self.advance:
+            text += (f" Knockout matches: +{self.advance} for the winning team "
+                     "(decided in play).")
+        weights = {s: w for s, w in self.stage_weights.items() if w != 1}
+        if weights:
+            text += " Stage multipliers: " + ", ".join(
+                f"{stage} x{weight:g}" for stage, weight in weights.items()) + "."
+        return text
+
+    def _compile(self):
+        """Bind the rules into a scoring closure (no attribute lookups per pick)."""
+        exact, outcome, advance = self.exact, self.outcome, self.advance
+        closest_one, closest_shared = self.closest, self.closest_shared
+        weights = {s: w for s, w in self.stage_weights.items() if w != 1}
+        group = frozenset(self.group_stages)
+        grade = fifa.get_score_bet
+
+        def score(match, picks):
+            """Score one match: {name: (points, note)} for every name with a pick.
+
+            :param match: a played match (record or :class:`views.MatchView`).
+            :param picks: iterable of (name, (home, away)) predictions.
+            """
+            result = tuple(match.result)
+            graded = {}
+            perfect = False
+            for name, pred in picks:
+                correct, diff = grade(result, tuple(pred))
+                graded[name] = (correct, diff, pred)
+                perfect = perfect or (correct and diff == 0)
+            closest = ()
+            if not perfect:
+                diffs = [d for c, d, _ in graded.values() if c]
+                if diffs:
+                    best = min(diffs)
+                    closest = [n for n, (c, d, _) in graded.items() if c and d == best]
+            bonus = closest_one if len(closest) == 1 else closest_shared
+            winner = (_sign(*result) if advance and match.stage not in group
+                      else 0)
+            weight = weights.get(match.stage)
+            points = {}
+            for name, (correct, diff, pred) in graded.items():
+                if not correct:
+                    points[name] = (0, "wrong")
+                    continue
+                if diff == 0:
+                    pts, note = exact, "exact score"
+                else:
+                    pts, note = outcome, "correct outcome"
+                    if name in closest:
+                        pts += bonus
+                        note += f" +{bonus} (closest)"
+                if winner and _sign(*pred) == winner:
+                    pts += advance
+                    note += f" +{advance} (winner)"
+                if weight is not None:
+                    pts = round(pts * weight)
+                    note += f" x{weight:g}"
+                points[name] = (pts, note)
+            return points
+        return score
+
+
+DEFAULT_RULES = ScoringRules()
+
+
+def _kickoff(match):
+    return (match.epoch is None, match.epoch or 0, match.number)
+
+
+def played_matches(matches):
+    """Views of the matches with a result, in kickoff order (then number)."""
+    return sorted((m for m in views.match_views(matches) if m.result), key=_kickoff)
+
+
+class Leaderboard:
+    """Point queries over a {name: points} scoreboard.
+
+    :param totals: {name: points}.
+    :param desc: the negated points in ascending order, when the caller has
+        them sorted already (:class:`RankHistory` does); otherwise they are
+        sorted on the first :meth:`rank` lookup.
+
+    Pages come from a heap selection (O(players log k) for the top k) and are
+    ranked from it; a name's rank is a bisect over desc. Ranks are
+    competition ranks; equal totals list alphabetically.
+    """
+
+    def __init__(self, totals, desc=None):
+        self.totals = totals
+        self._desc = desc
+
+    def __len__(self):
+        return len(self.totals)
+
+    def top(self, count, offset=0):
+        """[(rank, name, points), ...] for places offset+1 .. offset+count."""
+        best = heapq.nsmallest(offset + count, self.totals.items(),
+                               key=lambda kv: (-kv[1], kv[0]))
+        rows, rank = [], 0
+        for place, (name, points) in enumerate(best, 1):
+            if place == 1 or points != best[place - 2][1]:
+                rank = place  # everyone with more points is placed before
+            if place > offset:
+                rows.append((rank, name, points))
+        return rows
+
+    def rank(self, name):
+        """Competition rank of name (KeyError if not on the board)."""
+        if self._desc is None:
+            self._desc = array("l", sorted((-p for p in self.totals.values())))
+        return bisect_left(self._desc, -self.totals[name]) + 1
+
+
+class RankHistory:
+    """Running totals and ranks of every player after each scored match.
+
+    :param players: the players to rank (records or :class:`views.PlayerView`).
+    :param matches: all matches; those with a result are replayed in kickoff
+        order (see :func:`played_matches`).
+    :param rules: the :class:`ScoringRules` to score with.
+
+    Ranks are competition ranks (ties share a rank, the next rank skips).
+    ``events`` lists the match numbers, ``totals[name][i]`` and
+    ``ranks[name][i]`` the state after ``events[i]``. Each result sorts the
+    running totals once to rank every player; the latest sorted totals back
+    :attr:`leaderboard`, so its lookups don't sort again.
+    """
+
+    def __init__(self, players, matches, rules=DEFAULT_RULES):
+        matches = list(matches)
+        players = sorted(views.player_views(players, matches), key=lambda p: p.name)
+        self.names = [p.name for p in players]
+        self.events = []
+        self.totals = {name: array("l") for name in self.names}
+        self.ranks = {name: array("H") for name in self.names}
+        self._last = None  # kickoff order key of the latest event
+        self._desc = array("l", [0]) * len(self.names)  # -totals, ascending
+        for match in played_matches(matches):
+            self._replay(match, players, rules)
+
+    def _replay(self, match, players, rules):
+        number = match.number
+        picks = [(p.name, pick) for p in players
+                 if p.name in self.totals and (pick := p.pick(number)) is not None]
+        running = {name: self.total(name) for name in self.names}
+        for name, (points, _) in rules.score(match, picks).items():
+            running[name] += points
+        self.events.append(number)
+        self._last = _kickoff(match)
+        self._desc = array("l", sorted(-total for total in running.values()))
+        rank_of = {}
+        for i, total in enumerate(self._desc, 1):
+            rank_of.setdefault(-total, i)
+        for name in self.names:
+            self.totals[name].append(running[name])
+            self.ranks[name].append(rank_of[running[name]])
+
+    def follows(self, match):
+        """Whether match kicks off after every event (so it can extend the history)."""
+        return self._last is None or _kickoff(match) > self._last
+
+    def extended(self, match, players, rules=DEFAULT_RULES):
+        """A copy of the history with one more result replayed at the end.
+
+        :param match: the newly scored match (a :class:`views.MatchView`); it
+            must :meth:`follow <follows>` the history.
+        :param players: the same players, with their picks.
+        """
+        copy = RankHistory((), ())
+        copy.names = self.names
+        copy.events = list(self.events)
+        copy.totals = {name: array("l", series) for name, series in self.totals.items()}
+        copy.ranks = {name: array("H", series) for name, series in self.ranks.items()}
+        copy._replay(match, players, rules)  # pylint: disable=protected-access
+        return copy
+
+    def __len__(self):
+        return len(self.events)
+
+    def total(self, name):
+        """Points of name after the latest scored match."""
+        series = self.totals[name]
+        return series[-1] if series else 0
+
+    def rank(self, name, event=-1):
+        """Rank of name after events[event] (1 for everyone before any result)."""
+        series = self.ranks[name]
+        if not series or event < -len(series):
+            return 1
+        return series[event]
+
+    def delta(self, name):
+        """Places gained (positive) or lost by name with the latest result."""
+        return self.rank(name, -2) - self.rank(name)
+
+    def movers(self, count=3):
+        """The count names that moved most with the latest result, with deltas.
+
+        Only players who moved are listed, biggest moves first.
+        """
+        moved = [(name, self.delta(name)) for name in self.names]
+        return heapq.nsmallest(count, (row for row in moved if row[1]),
+                               key=lambda row: (-abs(row[1]), -row[1], row[0]))
+
+    def timeline(self, name):
+        """[(match number, total, rank), ...] for name, one per scored match."""
+        return list(zip(self.events, self.totals[name], self.ranks[name]))
+
+    @functools.cached_property
+    def leaderboard(self):
+        """:class:`Leaderboard` of the totals after the latest result."""
+        return Leaderboard({name: self.total(name) for name in self.names}, self._desc)
+
+
+def _key(ctx):
+    return ("ranks", ctx.pool)
+
+
+def history(ctx):
+    """The request pool's cached :class:`RankHistory`, built from its snapshot."""
+    def build():
+        snap = snapshot.tournament(ctx)
+        return RankHistory(snap.players, snap.matches, ctx.rules)
+    return ctx.cache.get(_key(ctx), (ctx.topic("scores"), "match"), build)
+
+
+def scored(ctx, match, old):
+    """Replay a new result into the cached history, if built; returns the keys to keep.
+
+    Pass the result as ``keep`` to set_result's ``ctx.changed("match")``.
+    Only a first result (old is None) for a match kicking off after every
+    scored one extends the history; a correction or an out-of-order result
+    leaves it to be rebuilt.
+    """
+    current = ctx.cache.peek(_key(ctx))
+    match = views.match_views([match])[0]
+    if current is None or old or not current.follows(match):
+        return ()
+    players = snapshot.tournament(ctx).players
+    ctx.cache.update(_key(ctx), current.extended(match, players, ctx.rules))
+    return (_key(ctx),)
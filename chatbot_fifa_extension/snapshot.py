@@ -0,0 +1,124 @@
+"""One columnar, read-only snapshot of a pool's tournament per store version.
+
+The read paths - standings and the rank history, the player list, the picks
+preview, the report - all need every match and every player of a pool.
+Rather than each reloading the store and walking the records its own way,
+they share a :class:`Tournament`: the matches as columns (number, stage,
+kickoff epoch, result) plus :class:`views.MatchView` rows, and the players'
+predictions as one dense int8 matrix (players x match numbers x 2) whose
+rows back the :class:`views.PlayerView` of each player.
+
+A snapshot is built on first read and cached until the pool's players or the
+schedule change, so one deserialization of the store serves every read in
+between. Out-of-process readers get the same object over a mapped
+:mod:`.matrix` file with :meth:`Tournament.mapped`.
+"""
+
+from array import array
+
+from . import views
+
+
+NO_EPOCH = -1  # epochs column value for an unparseable kickoff
+
+
+class Tournament:
+    """Columns of the matches and the dense predictions matrix of one pool.
+
+    :param matches: every match (records).
+    :param players: the pool's players (records).
+
+    ``matrix[(row * size + number) * 2 + k]`` is goal k of the pick of the
+    player in ``players[row]`` for match number, NO_PICK when missing; players
+    are sorted by name.
+    """
+
+    def __init__(self, matches, players):
+        self._columns(matches)
+        self.size = (self.matches[-1].number + 1) if self.matches else 0
+        records = sorted(players, key=lambda p: p.name)
+        width = 2 * self.size
+        self.matrix = array("b", [views.NO_PICK]) * (len(records) * width)
+        rows = memoryview(self.matrix)
+        self.players = [views.PlayerView(p, self.size, rows[i * width:(i + 1) * width])
+                        for i, p in enumerate(records)]
+        self.rows = {p.name: i for i, p in enumerate(self.players)}
+
+    @classmethod
+    def mapped(cls, matches, mapped, pool=""):
+        """A Tournament whose matrix is a :class:`matrix.MatrixFile`'s, uncopied.
+
+        :param matches: every match (records or views).
+        :param mapped: the open matrix file; keep it open while this is used.
+        :param pool: the pool the file belongs to, for the player views.
+        """
+        self = cls.__new__(cls)
+        self._columns(matches)
+        self.size = mapped.size
+        self.matrix = mapped.matrix
+        self.players = [views.PlayerView.packed(name, mapped.row(name), pool)
+                        for name in mapped.names]
+        self.rows = dict(mapped.rows)
+        return self
+
+    def _columns(self, matches):
+        self.matches = views.match_views(matches)
+        self.numbers = array("H", (m.number for m in self.matches))
+        self.stages = [m.stage for m in self.matches]
+        self.epochs = array("q", (NO_EPOCH if m.epoch is None else m.epoch
+                                  for m in self.matches))
+        self.results = array("b", (goal for m in self.matches
+                                   for goal in (m.result or (views.NO_PICK,) * 2)))
+        self.by_number = {m.number: m for m in self.matches}
+
+    def player(self, name):
+        """The :class:`views.PlayerView` called name, or None."""
+        row = self.rows.get(name)
+        return None if row is None else self.players[row]
+
+    def column(self, number):
+        """Home goals picked by every player (in row order) for match number.
+
+        A strided view into the matrix; the away goals follow each entry.
+        """
+        width = 2 * self.size
+        return memoryview(self.matrix)[2 * number::width] if width else memoryview(b"")
+
+    def pick_count(self, number):
+        """How many players have a pick for match number."""
+        if not 0 <= number < self.size:
+            return 0
+        return sum(1 for goal in self.column(number) if goal != views.NO_PICK)
+
+    def excluding(self, names):
+        """The player views, leaving out names."""
+        names = set(names)
+        return [p for p in self.players if p.name not in names]
+
+
+def _key(ctx):
+    return ("tournament", ctx.pool)
+
+
+def _topics(ctx):
+    return (ctx.topic("player"), "match")
+
+
+def load(ctx):
+    """A :class:`Tournament` of the request pool read from the store (uncached)."""
+    players = ctx.store.get("player", ctx.store.player.pool == ctx.pool)
+    return Tournament(ctx.store.get("match"), players)
+
+
+def tournament(ctx):
+    """The request pool's cached :class:`Tournament`, building it once."""
+    return ctx.cache.get(_key(ctx), _topics(ctx), lambda: load(ctx))
+
+
+def prime(ctx, snap):
+    """Serve snap as the request pool's snapshot until the pool is written.
+
+    For readers with a faster source than the store, e.g. a mapped matrix
+    file (:meth:`Tournament.mapped`); call before the pool's first read.
+    """
+    ctx.cache.get(_key(ctx), _topics(ctx), lambda: snap)
@@ -0,0 +1,301 @@
+"""Direct sqlite maintenance for what membank's record API doesn't cover.
+
+membank reads and writes whole dataclass records, one commit each; schema
+upkeep - backfilling new key columns and creating indexes - and batched
+writes need plain SQL on the same engine.
+It is kept in this one module so the rest of the package only ever talks to
+the store through membank.
+"""
+
+import dataclasses
+import logging
+import time
+
+
+LOG = logging.getLogger("chatbot_fifa_extension.storage")
+
+# table -> columns worth an index (lookups the tools filter by)
+INDEXES = {
+    "player": (("id",), ("pool",)),
+    "admin": (("id",), ("pool",)),
+    "auditevent": (("pool", "player"), ("pool", "match"), ("pool", "seq")),
+}
+
+
+def engine(store):
+    """The sqlalchemy engine behind a membank store."""
+    return store._get_engine()  # pylint: disable=protected-access
+
+
+def tables(store):
+    """Names of the tables in the store."""
+    import sqlalchemy as sa
+    return set(sa.inspect(engine(store)).get_table_names())
+
+
+def migrate(store):
+    """Bring an existing store up to the current schema (idempotent).
+
+    Records written before pools existed get the default pool and their
+    composite id (the SQL twin of :func:`memories.pool_id`), audit events
+    from before their sequence get one in id order, goals above
+    :data:`views.MAX_GOALS` (accepted before the tools bounded them) are
+    lowered to it with a warning each, and the :data:`INDEXES` are created
+    for the tables that exist. Safe to run from several workers at once.
+
+    The tables only ever written through SQL here - the audit trail and the
+    store versions - are created up front: membank creates a table with the
+    first record of its kind and then re-reads the schema, which requests
+    running at that moment would see as an empty store.
+    """
+    import sqlalchemy as sa
+    from . import memories
+    existing = tables(store)
+    for table, kind in (("auditevent", memories.AuditEvent),
+                        ("storeversion", memories.StoreVersion)):
+        if table not in existing:
+            create(store, kind)
+            existing.add(table)
+    natural = {"player": "name", "admin": "talker"}
+    for table, key in natural.items():
+        if table not in existing:
+            continue
+        store.get(table)  # lets membank add columns new to the dataclass
+        with engine(store).begin() as conn:
+            conn.execute(sa.text(
+                f"UPDATE {table} SET pool = COALESCE(pool, ''), "
+                f"id = COALESCE(pool, '') || ':' || {key} WHERE id IS NULL"))
+    store.get("auditevent")
+    with engine(store).begin() as conn:
+        conn.execute(sa.text(
+            "UPDATE auditevent SET seq = numbered.n + "
+            "(SELECT COALESCE(MAX(seq), 0) FROM auditevent) "
+            "FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM auditevent "
+            "WHERE seq IS NULL) AS numbered WHERE auditevent.id = numbered.id"))
+    _cap_goals(store, existing)
+    for table in INDEXES:
+        if table in existing:
+            index(store, table)
+
+
+def _cap_goals(store, existing):
+    """Lower picks and results above views.MAX_GOALS, which int8 can't hold."""
+    import sqlalchemy as sa
+    from .views import MAX_GOALS
+
+    def capped(score):
+        return [min(goals, MAX_GOALS) for goals in score]
+    found = {
+        "player": ("id", "predictions", "SELECT DISTINCT p.id FROM player AS p, "
+                   "json_each(p.predictions) AS e, json_each(e.value) AS g "
+                   "WHERE g.value > :max"),
+        "match": ("number", "result", "SELECT DISTINCT m.number FROM match AS m, "
+                  "json_each(m.result) AS g WHERE g.value > :max"),
+    }
+    for name, (key, column, query) in found.items():
+        if name not in existing:
+            continue
+        table = store._get_sql_table(name)  # pylint: disable=protected-access
+        with engine(store).begin() as conn:
+            keys = conn.execute(sa.text(query), {"max": MAX_GOALS}).scalars().all()
+            for row in conn.execute(sa.select(table.c[key], table.c[column])
+                                    .where(table.c[key].in_(keys))):
+                value = row[1]
+                if name == "player":
+                    fixed = {number: capped(pick) if pick else pick
+                             for number, pick in value.items()}
+                else:
+                    fixed = capped(value)
+                conn.execute(table.update().where(table.c[key] == row[0])
+                             .values({column: fixed}))
+                LOG.warning("%s %s: goals above %d lowered to it (%s -> %s)",
+                            name, row[0], MAX_GOALS, value, fixed)
+
+
+def index(store, table):
+    """Create the :data:`INDEXES` of table (idempotent; the table must exist)."""
+    import sqlalchemy as sa
+    with engine(store).begin() as conn:
+        for columns in INDEXES[table]:
+            conn.execute(sa.text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{'_'.join(columns)} "
+                f"ON {table} ({', '.join(columns)})"))
+
+
+def create(store, kind):
+    """Create the (missing) table of the record class kind.
+
+    membank only creates a table with the first record of its kind, so a
+    default record is put and deleted again.
+    """
+    probe = kind()
+    for field in dataclasses.fields(probe):
+        if getattr(probe, field.name) is None:
+            setattr(probe, field.name, field.type())
+    store.put(probe)
+    store.delete(probe)
+
+
+def table_name(item):
+    """The membank table of a record (records read back use a look-alike class)."""
+    from membank import datamapper
+    return datamapper.assert_table_name(item)
+
+
+def key_field(item):
+    """Name of the record's key field, or None when it has none."""
+    return next((f.name for f in dataclasses.fields(item) if f.metadata.get("key")),
+                None)
+
+
+def sequence_field(item):
+    """Name of the record's sequence field, or None when it has none."""
+    return next((f.name for f in dataclasses.fields(item) if f.metadata.get("sequence")),
+                None)
+
+
+def put_many(store, items, bumps=()):
+    """Upsert records with a key field in one transaction.
+
+    The batched twin of membank's ``put``: one commit for the lot instead of
+    one per record. Their tables must exist already (membank creates a table
+    on the first ``put`` of its kind).
+
+    A record's sequence field (metadata ``sequence``) is set on insert to one
+    past the table's highest; sqlite holds the write lock from there to the
+    commit, so the numbers follow commit order. Updates leave it alone.
+
+    :param bumps: groups of store-version topics to advance in the same
+        transaction, one :func:`bump_versions` each.
+    :returns: the {topic: (previous, new)} of each group, in order.
+    """
+    import sqlalchemy as sa
+    with engine(store).begin() as conn:
+        for item in items:
+            table = store._get_sql_table(table_name(item))  # pylint: disable=protected-access
+            key, seq = key_field(item), sequence_field(item)
+            values = {f.name: getattr(item, f.name) for f in dataclasses.fields(item)
+                      if f.name != seq}
+            done = conn.execute(table.update().where(table.c[key] == values[key])
+                                .values(values))
+            if done.rowcount:
+                continue
+            if seq:
+                values[seq] = sa.select(
+                    sa.func.coalesce(sa.func.max(table.c[seq]), 0) + 1).scalar_subquery()
+            conn.execute(table.insert().values(values))
+        return [_bump(conn, topics) for topics in bumps]
+
+
+def _bump(conn, topics):
+    import sqlalchemy as sa
+    bumped = {}
+    for topic in topics:
+        while True:  # compare-and-swap, again if another connection won
+            previous = conn.execute(
+                sa.text("SELECT counter FROM storeversion WHERE topic = :topic"),
+                {"topic": topic}).scalar()
+            counter = max(0 if previous is None else previous + 1, time.time_ns())
+            if previous is None:
+                done = conn.execute(sa.text(
+                    "INSERT INTO storeversion (topic, counter) SELECT :topic, :counter "
+                    "WHERE NOT EXISTS (SELECT 1 FROM storeversion WHERE topic = :topic)"),
+                    {"topic": topic, "counter": counter})
+            else:
+                done = conn.execute(sa.text(
+                    "UPDATE storeversion SET counter = :counter "
+                    "WHERE topic = :topic AND counter = :previous"),
+                    {"topic": topic, "counter": counter, "previous": previous})
+            if done.rowcount:
+                bumped[topic] = (previous, counter)
+                break
+    return bumped
+
+
+def bump_versions(store, topics):
+    """Advance the store-version counters of topics in one transaction.
+
+    :returns: {topic: (previous, new)}; previous is the counter the bump
+        replaced (None for a new topic), checked by compare-and-swap, so two
+        workers bumping at once each get the value the other left.
+    """
+    with engine(store).begin() as conn:
+        return _bump(conn, topics)
+
+
+def put_together(store, items, bump=()):
+    """Upsert records with a key field as one write, whatever wraps the store.
+
+    Instrumented and write-behind stores (see :mod:`.instrument`,
+    :mod:`.writebehind`) take them through their ``put_many``; a plain
+    membank store gets :func:`put_many`.
+
+    :param bump: store-version topics advanced in the same commit.
+    :returns: {topic: (previous, new)} of bump; empty when a write-behind
+        store acknowledged the write before its commit.
+    """
+    import membank
+    if isinstance(store, membank.LoadMemory):
+        return put_many(store, items, [bump])[0]
+    return store.put_many(items, bump=bump)
+
+
+def dump(store, names, chunk=500):
+    """Yield (table, row dict) for every row of the tables in names.
+
+    All tables are read in one transaction, so the rows are one consistent
+    snapshot even while other connections write (their commits wait until
+    the rows are consumed); rows are fetched chunk at a time. Missing tables
+    are skipped.
+    """
+    import sqlalchemy as sa
+    existing = tables(store)
+    with engine(store).connect() as conn, conn.begin():
+        conn.exec_driver_sql("BEGIN")  # pysqlite sends none before SELECTs
+        for name in names:
+            if name not in existing:
+                continue
+            table = store._get_sql_table(name)  # pylint: disable=protected-access
+            result = conn.execution_options(yield_per=chunk).execute(sa.select(table))
+            for row in result:
+                yield name, row._asdict()
+
+
+def counts(store, names):
+    """{table: rows} of the tables in names that exist."""
+    import sqlalchemy as sa
+    existing = tables(store)
+    with engine(store).connect() as conn:
+        return {name: conn.execute(sa.text(f'SELECT COUNT(*) FROM "{name}"')).scalar()
+                for name in names if name in existing}
+
+
+def replace(store, names, rows, chunk=500):
+    """Replace the contents of the tables in names with rows in one transaction.
+
+    :param rows: iterable of (table, row dict), e.g. from :func:`dump`;
+        inserted chunk rows at a time, so it can stream. Columns the table
+        doesn't have are dropped.
+    :returns: {table: rows inserted}.
+
+    The tables must exist (see :func:`create`).
+    """
+    sql = {name: store._get_sql_table(name)  # pylint: disable=protected-access
+           for name in names}
+    pending = {name: [] for name in names}
+    inserted = dict.fromkeys(names, 0)
+    with engine(store).begin() as conn:
+        for table in sql.values():
+            conn.execute(table.delete())
+        for name, row in rows:
+            table, batch = sql[name], pending[name]
+            batch.append({k: v for k, v in row.items() if k in table.c})
+            if len(batch) >= chunk:
+                conn.execute(table.insert(), batch)
+                inserted[name] += len(batch)
+                batch.clear()
+        for name, batch in pending.items():
+            if batch:
+                conn.execute(sql[name].insert(), batch)
+                inserted[name] += len(batch)
+    return inserted
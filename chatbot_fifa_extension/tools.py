@@ -1,8 +1,10 @@
 """Framework-neutral FIFA World Cup betting capability.
 
 Operations are exposed as a list of :class:`ToolSpec` descriptors (name,
-description, a pydantic params model, and a ``(FifaContext, params) -> str``
-handler). No LLM/agent SDK is imported here.
+description, a pydantic params model, and a ``(RequestContext, params) -> str``
+handler). No LLM/agent SDK is imported here. Handlers read the caller and the
+clock from the request context only, so they are safe to run concurrently
+against one shared :class:`FifaContext`.
 
 The tournament is data-driven:
   * an administrator registers the groups and their teams, and loads the
@@ -17,30 +19,47 @@ handler, so the gate does not rely on the calling LLM).
 """
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import timedelta, timezone
+import functools
 import json
 import os
-from typing import Callable
+from typing import Callable, Literal
 
 import pydantic
 
-from . import fifa, memories
-from .context import FifaContext
+from . import (audit, backup, instrument, memories, picks, schedule, scoring,
+               snapshot, views)
+from .context import RequestContext
 
 
 SCHEDULE_FILE = os.path.join(
     os.path.dirname(__file__), "data", "wc2026_schedule.json"
 )
+# Pre-generated JSON schemas of every tool's params, keyed by tool name.
+# Regenerate after changing a params model: python -m chatbot_fifa_extension.tools
+SCHEMAS_FILE = os.path.join(
+    os.path.dirname(__file__), "data", "tool_schemas.json"
+)
 
 
 # --------------------------------------------------------------------------- #
 # Parameter schemas (pydantic = schema source of truth + validation)
 # --------------------------------------------------------------------------- #
-class NoArgs(pydantic.BaseModel):
+class Params(pydantic.BaseModel):
+    """Base for tool parameters.
+
+    Validators and JSON schemas are built on first use rather than at import,
+    so loading the tool registry stays cheap for short-lived workers.
+    """
+
+    model_config = pydantic.ConfigDict(defer_build=True)
+
+
+class NoArgs(Params):
     """No parameters."""
 
 
-class AdminAuth(pydantic.BaseModel):
+class AdminAuth(Params):
     """Base for administrative operations requiring the admin secret."""
 
     admin_secret: str = pydantic.Field(
@@ -67,8 +86,10 @@ class AdminSetPrediction(AdminAuth):
     player_name: str = pydantic.Field(description="The player whose pick to set.")
     home: str = pydantic.Field(description="Home team of the match (as scheduled).")
     away: str = pydantic.Field(description="Away team of the match (as scheduled).")
-    home_score: int = pydantic.Field(ge=0, description="Predicted home goals.")
-    away_score: int = pydantic.Field(ge=0, description="Predicted away goals.")
+    home_score: int = pydantic.Field(ge=0, le=views.MAX_GOALS,
+                                     description="Predicted home goals.")
+    away_score: int = pydantic.Field(ge=0, le=views.MAX_GOALS,
+                                     description="Predicted away goals.")
 
 
 class SetResult(AdminAuth):
@@ -76,11 +97,13 @@ class SetResult(AdminAuth):
 
     home: str = pydantic.Field(description="Home team of the match (as scheduled).")
     away: str = pydantic.Field(description="Away team of the match (as scheduled).")
-    home_score: int = pydantic.Field(ge=0, description="Actual home goals.")
-    away_score: int = pydantic.Field(ge=0, description="Actual away goals.")
+    home_score: int = pydantic.Field(ge=0, le=views.MAX_GOALS,
+                                     description="Actual home goals.")
+    away_score: int = pydantic.Field(ge=0, le=views.MAX_GOALS,
+                                     description="Actual away goals.")
 
 
-class RegisterPlayer(pydantic.BaseModel):
+class RegisterPlayer(Params):
     """Register under a player name."""
 
     name: str = pydantic.Field(
@@ -88,30 +111,117 @@ class RegisterPlayer(pydantic.BaseModel):
     )
 
 
-class PlayerRef(pydantic.BaseModel):
+class PlayerRef(Params):
     """Reference to a player by name."""
 
     player_name: str = pydantic.Field(description="Name of the player.")
 
 
-class PlaceBet(pydantic.BaseModel):
+class PlaceBet(Params):
     """Predicted score for the match currently awaiting the caller's bet."""
 
     home_score: int = pydantic.Field(
-        ge=0, description="Predicted goals for the home (first) team."
+        ge=0, le=views.MAX_GOALS,
+        description="Predicted goals for the home (first) team."
     )
     away_score: int = pydantic.Field(
-        ge=0, description="Predicted goals for the away (second) team."
+        ge=0, le=views.MAX_GOALS,
+        description="Predicted goals for the away (second) team."
     )
 
 
-class UpdatePrediction(pydantic.BaseModel):
+class UpdatePrediction(Params):
     """Correct the caller's prediction for a specific (not-yet-started) match."""
 
     home: str = pydantic.Field(description="Home team of the match to fix.")
     away: str = pydantic.Field(description="Away team of the match to fix.")
-    home_score: int = pydantic.Field(ge=0, description="Corrected home goals.")
-    away_score: int = pydantic.Field(ge=0, description="Corrected away goals.")
+    home_score: int = pydantic.Field(ge=0, le=views.MAX_GOALS,
+                                     description="Corrected home goals.")
+    away_score: int = pydantic.Field(ge=0, le=views.MAX_GOALS,
+                                     description="Corrected away goals.")
+
+
+class PicksWindow(Params):
+    """Time window for previewing everyone's picks on upcoming matches."""
+
+    hours: int = pydantic.Field(
+        default=12, ge=1, le=168,
+        description="How many hours ahead to look (default 12, i.e. tonight).",
+    )
+
+
+class MissingPicksWindow(AdminAuth):
+    """Admin: players still without a pick for the matches in the next hours."""
+
+    hours: int = pydantic.Field(
+        default=24, ge=1, le=168,
+        description="How many hours ahead to look (default 24).",
+    )
+
+
+class StandingsPage(Params):
+    """One page of the scoreboard."""
+
+    limit: int = pydantic.Field(
+        default=10, ge=1, le=50,
+        description="How many places to show (default 10).",
+    )
+    offset: int = pydantic.Field(
+        default=0, ge=0,
+        description="Places to skip, to page past the top (default 0).",
+    )
+
+
+class RankMoves(Params):
+    """How the standings moved with the latest result."""
+
+    top: int = pydantic.Field(
+        default=3, ge=1, le=20,
+        description="How many of the biggest movers to list (default 3).",
+    )
+
+
+class RecentCalls(AdminAuth):
+    """Admin: the latest measured tool calls."""
+
+    count: int = pydantic.Field(
+        default=10, ge=1, le=100,
+        description="How many of the latest calls to show (default 10).",
+    )
+
+
+class PickHistory(AdminAuth):
+    """Admin: the logged changes of picks and results, to settle disputes."""
+
+    player_name: str = pydantic.Field(
+        default="", description="Only this player's picks (default: everyone).")
+    home: str = pydantic.Field(
+        default="", description="Home team, to narrow to one match (with away).")
+    away: str = pydantic.Field(
+        default="", description="Away team, to narrow to one match (with home).")
+    limit: int = pydantic.Field(
+        default=20, ge=1, le=200,
+        description="How many of the latest changes to show (default 20).",
+    )
+
+
+class BackupStore(AdminAuth):
+    """Admin: write a consistent snapshot of the whole store."""
+
+    format: Literal["export", "sqlite"] = pydantic.Field(
+        default="export",
+        description="'export' for a compressed, portable export (default) or "
+        "'sqlite' for a copy of the database file.",
+    )
+
+
+class SetTimezone(Params):
+    """The caller's preferred timezone for kickoff times."""
+
+    timezone: str = pydantic.Field(
+        description="IANA timezone name, e.g. 'Europe/Riga' or 'America/New_York'. "
+        "Use 'UTC' to go back to UTC."
+    )
 
 
 class LinkDevice(AdminAuth):
@@ -133,41 +243,83 @@ class ToolSpec:
     name: str
     description: str
     params: type[pydantic.BaseModel]
-    handler: Callable[[FifaContext, pydantic.BaseModel], str]
+    handler: Callable[[RequestContext, pydantic.BaseModel], str]
 
+    @property
+    def json_schema(self) -> dict:
+        """JSON schema of params, from the shipped file when it has one.
 
-# --------------------------------------------------------------------------- #
-# Time / schedule helpers
-# --------------------------------------------------------------------------- #
-def _now():
-    """Current time as a timezone-aware UTC datetime."""
-    return datetime.now(timezone.utc)
+        Avoids building the pydantic schema at host startup; falls back to
+        generating (and caching) it for tools missing from the file.
+        """
+        schema = _shipped_schemas().get(self.name)
+        if schema is None:
+            schema = _generated_schema(self.params)
+        return schema
+
+    def __post_init__(self):
+        object.__setattr__(self, "handler", _measured(self.name, self.handler))
+
+    def validate(self, data: dict) -> pydantic.BaseModel:
+        """Validate already-decoded arguments into a params instance."""
+        return self.params.model_validate(data)
+
+    def validate_json(self, raw: bytes | str) -> pydantic.BaseModel:
+        """Validate the raw JSON arguments of an LLM tool call in one pass.
 
+        Parses straight into the params model (no intermediate dict).
+        """
+        return self.params.model_validate_json(raw or b"{}")
 
-def _kickoff(match):
-    """Parse a match kickoff into an aware datetime, or None if unparseable."""
+
+def _measured(name, handler):
+    """handler, run as one instrumented invocation when the context has instruments."""
+    @functools.wraps(handler)
+    def measured(ctx, params):
+        if ctx.instruments is None:
+            return handler(ctx, params)
+        with ctx.instruments.invocation(name, ctx.pool):
+            return handler(ctx, params)
+    return measured
+
+
+@functools.cache
+def _shipped_schemas():
+    """Load the pre-generated params schemas once ({} if not shipped)."""
     try:
-        moment = datetime.fromisoformat(match.kickoff)
-    except (ValueError, TypeError):
-        return None
-    if moment.tzinfo is None:
-        moment = moment.replace(tzinfo=timezone.utc)
-    return moment
+        with open(SCHEMAS_FILE, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
 
+@functools.cache
+def _generated_schema(params):
+    """Build a params model's JSON schema once per model."""
+    return params.model_json_schema()
 
-def _has_started(match):
-    """True if the match has kicked off (predictions locked for players)."""
-    moment = _kickoff(match)
-    return moment is not None and _now() >= moment
+
+def build_schemas(specs=None) -> dict:
+    """Generate {tool name: params JSON schema} (the SCHEMAS_FILE content)."""
+    return {spec.name: spec.params.model_json_schema()
+            for spec in (TOOLSPECS if specs is None else specs)}
+
+
+# --------------------------------------------------------------------------- #
+# Time / schedule helpers
+# --------------------------------------------------------------------------- #
+def _has_started(ctx, match):
+    """True if the match had kicked off at the request's time (picks locked)."""
+    epoch = schedule.kickoff_epoch(match)
+    return epoch is not None and ctx.now.timestamp() >= epoch
 
 
 def _ordered_matches(ctx):
     """All matches sorted by kickoff then number (unscheduled sort last)."""
-    far_future = datetime.max.replace(tzinfo=timezone.utc)
-    return sorted(
-        ctx.store.get("match"),
-        key=lambda m: (_kickoff(m) or far_future, m.number),
-    )
+    def key(match):
+        epoch = schedule.kickoff_epoch(match)
+        return (epoch is None, epoch or 0, match.number)
+    return sorted(ctx.store.get("match"), key=key)
 
 
 def _label(match):
@@ -175,9 +327,17 @@ def _label(match):
     return f"{match.home} vs {match.away}"
 
 
-def _describe(match):
-    """Label plus kickoff time."""
-    return f"{_label(match)} (kickoff {match.kickoff})"
+def _describe(match, player=None):
+    """Label plus kickoff time, in the player's preferred timezone if set."""
+    tz_name = getattr(player, "timezone", "") if player else ""
+    if tz_name:
+        try:
+            kickoff = schedule.format_kickoff(match, schedule.zone(tz_name))
+        except ValueError:
+            kickoff = match.kickoff
+    else:
+        kickoff = match.kickoff
+    return f"{_label(match)} (kickoff {kickoff})"
 
 
 def _next_open_match(ctx, player):
@@ -186,7 +346,7 @@ def _next_open_match(ctx, player):
     for match in _ordered_matches(ctx):
         if str(match.number) in preds:
             continue
-        if _has_started(match):
+        if _has_started(ctx, match):
             continue
         return match
     return None
@@ -219,21 +379,45 @@ def _is_linked(player):
     return bool(getattr(player, "talker", "")) or bool(getattr(player, "talkers", None))
 
 
+def _players(ctx):
+    """All players of the caller's pool (an indexed query)."""
+    return ctx.store.get("player", ctx.store.player.pool == ctx.pool)
+
+
+def _player_named(ctx, name):
+    """The player called exactly name in the caller's pool, or None."""
+    return ctx.store.get.player(id=memories.pool_id(ctx.pool, name))
+
+
+def _talker_index(ctx):
+    """{talker: player id} for the caller's pool, cached until players change.
+
+    Primary ``talker`` links take precedence over the ``talkers`` fallback
+    list (admin-approved extra devices), as in a lookup checking them first.
+    """
+    def build():
+        players = _players(ctx)
+        index = {}
+        for player in players:
+            if getattr(player, "talker", ""):
+                index.setdefault(player.talker, player.id)
+        for player in players:
+            for talker in getattr(player, "talkers", None) or []:
+                index.setdefault(talker, player.id)
+        return index
+    return ctx.cache.get(("talkers", ctx.pool), (ctx.topic("player"),), build)
+
+
 def _player_by_talker(ctx):
-    """Find the player for the caller's talker.
+    """Find the player for the caller's talker (in the caller's pool).
 
     Checks the primary ``talker`` first (the active session, usually right), then
     the ``talkers`` fallback list (admin-approved extra devices).
     """
     if not ctx.talker:
         return None
-    for player in ctx.store.get("player"):
-        if ctx.talker == getattr(player, "talker", ""):
-            return player
-    for player in ctx.store.get("player"):
-        if ctx.talker in (getattr(player, "talkers", None) or []):
-            return player
-    return None
+    player_id = _talker_index(ctx).get(ctx.talker)
+    return ctx.store.get.player(id=player_id) if player_id else None
 
 
 def _format_predictions(ctx, player):
@@ -255,14 +439,16 @@ def _format_predictions(ctx, player):
 # Admin: auth + setup
 # --------------------------------------------------------------------------- #
 def _is_admin_talker(ctx):
-    """True if the caller's session has been recorded as an administrator."""
-    return bool(ctx.talker and ctx.store.get.admin(talker=ctx.talker))
+    """True if the caller's session is recorded as an administrator of the pool."""
+    return (ctx.pool, ctx.talker) in ctx.admins
 
 
 def _remember_admin(ctx):
-    """Persist the caller's session as an administrator (idempotent)."""
-    if ctx.talker and not ctx.store.get.admin(talker=ctx.talker):
-        ctx.store.put(memories.Admin(talker=ctx.talker))
+    """Persist the caller's session as an administrator of the pool (idempotent)."""
+    if ctx.talker and (ctx.pool, ctx.talker) not in ctx.admins:
+        ctx.store.put(memories.Admin(talker=ctx.talker, pool=ctx.pool))
+        ctx.admins.add((ctx.pool, ctx.talker))
+        ctx.changed("admin")
 
 
 def _require_admin(ctx, token):
@@ -285,7 +471,7 @@ def _require_admin(ctx, token):
     )
 
 
-def authenticate_admin(ctx: FifaContext, args: AdminAuth) -> str:
+def authenticate_admin(ctx: RequestContext, args: AdminAuth) -> str:
     """Check the admin secret and remember this session as admin if correct."""
     err = _require_admin(ctx, args.admin_secret)
     if err:
@@ -293,7 +479,7 @@ def authenticate_admin(ctx: FifaContext, args: AdminAuth) -> str:
     return "Verified: you may manage the tournament (I'll remember this session)."
 
 
-def register_group(ctx: FifaContext, args: RegisterGroup) -> str:
+def register_group(ctx: RequestContext, args: RegisterGroup) -> str:
     """Register or overwrite a group and its teams."""
     err = _require_admin(ctx, args.admin_secret)
     if err:
@@ -301,10 +487,11 @@ def register_group(ctx: FifaContext, args: RegisterGroup) -> str:
     name = args.group.strip().upper()
     teams = [t.strip() for t in args.teams if t.strip()]
     ctx.store.put(memories.Group(name=name, teams=teams))
+    ctx.changed("group")
     return f"Registered group {name}: {', '.join(teams)}."
 
 
-def list_groups(ctx: FifaContext, _args: NoArgs) -> str:
+def list_groups(ctx: RequestContext, _args: NoArgs) -> str:
     """List the registered groups and their teams."""
     groups = sorted(ctx.store.get("group"), key=lambda g: g.name)
     if not groups:
@@ -312,7 +499,7 @@ def list_groups(ctx: FifaContext, _args: NoArgs) -> str:
     return "\n".join(f"Group {g.name}: {', '.join(g.teams)}" for g in groups)
 
 
-def load_schedule(ctx: FifaContext, args: AdminAuth) -> str:
+def load_schedule(ctx: RequestContext, args: AdminAuth) -> str:
     """Add any bundled fixtures that aren't loaded yet, leaving existing ones be.
 
     Matches already in the store are assumed correct and are never touched, so
@@ -345,10 +532,12 @@ def load_schedule(ctx: FifaContext, args: AdminAuth) -> str:
             )
         )
         added += 1
+    if added:
+        ctx.changed("match")
     return f"Added {added} new match(es); {len(existing)} already loaded."
 
 
-def clear_tournament(ctx: FifaContext, args: AdminAuth) -> str:
+def clear_tournament(ctx: RequestContext, args: AdminAuth) -> str:
     """Delete all registered groups and matches (use to redo setup)."""
     err = _require_admin(ctx, args.admin_secret)
     if err:
@@ -359,29 +548,37 @@ def clear_tournament(ctx: FifaContext, args: AdminAuth) -> str:
         ctx.store.delete(group)
     for match in matches:
         ctx.store.delete(match)
+    ctx.changed("group", "match")
     return f"Cleared {len(groups)} group(s) and {len(matches)} match(es)."
 
 
-def admin_set_prediction(ctx: FifaContext, args: AdminSetPrediction) -> str:
+def admin_set_prediction(ctx: RequestContext, args: AdminSetPrediction) -> str:
     """Override a player's prediction for a match (ignores the kickoff lock)."""
     err = _require_admin(ctx, args.admin_secret)
     if err:
         return err
-    player = ctx.store.get.player(name=args.player_name)
+    player = _player_named(ctx, args.player_name)
     if not player:
         return f"No player named '{args.player_name}'."
     match = _find_match(ctx, args.home, args.away)
     if not match:
         return f"No match '{args.home} vs {args.away}' in the schedule."
-    _ensure_predictions(player)[str(match.number)] = [args.home_score, args.away_score]
-    ctx.store.put(player)
+    preds = _ensure_predictions(player)
+    new = [args.home_score, args.away_score]
+    old = preds.get(str(match.number))
+    preds[str(match.number)] = new
+    written = audit.record(ctx, player, "admin_set_prediction", match.number, old,
+                           new, player.name, topics=("player", "scores"))
+    ctx.changed("player", "scores", keep=picks.picked(ctx, player.name, match.number),
+                pick=(player.name, match.number, args.home_score, args.away_score),
+                written=written)
     return (
         f"Set {args.player_name}'s prediction for {_label(match)} to "
         f"{args.home_score}:{args.away_score}."
     )
 
 
-def set_result(ctx: FifaContext, args: SetResult) -> str:
+def set_result(ctx: RequestContext, args: SetResult) -> str:
     """Record the actual final score of a match."""
     err = _require_admin(ctx, args.admin_secret)
     if err:
@@ -389,20 +586,23 @@ def set_result(ctx: FifaContext, args: SetResult) -> str:
     match = _find_match(ctx, args.home, args.away)
     if not match:
         return f"No match '{args.home} vs {args.away}' in the schedule."
-    if not _has_started(match):
+    if not _has_started(ctx, match):
         return (
             f"{_label(match)} hasn't kicked off yet (scheduled {match.kickoff}), "
             "so a result can't be recorded."
         )
-    match.result = [args.home_score, args.away_score]
-    ctx.store.put(match)
+    new = [args.home_score, args.away_score]
+    old, match.result = match.result, new
+    written = audit.record(ctx, match, "set_result", match.number, old, new,
+                           topics=("match",))
+    ctx.changed("match", keep=scoring.scored(ctx, match, old), written=written)
     return (
         f"Recorded result for {_label(match)}: "
         f"{args.home_score}:{args.away_score}."
     )
 
 
-def link_device(ctx: FifaContext, args: LinkDevice) -> str:
+def link_device(ctx: RequestContext, args: LinkDevice) -> str:
     """Approve an extra session/device for a player (added to the fallback list).
 
     Also covers cookie-clear recovery: add the player's new session id.
@@ -410,7 +610,7 @@ def link_device(ctx: FifaContext, args: LinkDevice) -> str:
     err = _require_admin(ctx, args.admin_secret)
     if err:
         return err
-    player = ctx.store.get.player(name=args.name)
+    player = _player_named(ctx, args.name)
     if not player:
         return f"No player named '{args.name}'."
     new = args.talker.strip()
@@ -420,37 +620,92 @@ def link_device(ctx: FifaContext, args: LinkDevice) -> str:
     talkers.append(new)
     player.talkers = talkers
     ctx.store.put(player)
+    ctx.changed("player")
     sessions = (1 if getattr(player, "talker", "") else 0) + len(player.talkers)
     return f"Added a device for {args.name} (now {sessions} session(s) linked)."
 
 
+def recent_calls(ctx: RequestContext, args: RecentCalls) -> str:
+    """List the latest instrumented tool calls with their store usage."""
+    err = _require_admin(ctx, args.admin_secret)
+    if err:
+        return err
+    ring = ctx.instruments.sink(instrument.RingSink) if ctx.instruments else None
+    if ring is None:
+        return "Call recording is not enabled on this bot."
+    calls = ring.recent(args.count)
+    if not calls:
+        return "No calls have been recorded yet."
+    lines = []
+    for call in calls:
+        rows = sum(ops.rows for ops in call.store.values())
+        size = sum(ops.bytes for ops in call.store.values())
+        failed = f" FAILED ({call.error})" if call.error else ""
+        lines.append(
+            f"{call.tool}{f' [{call.pool}]' if call.pool else ''}: "
+            f"{call.seconds * 1000:.1f} ms (store: {call.store_calls} call(s), "
+            f"{call.store_seconds * 1000:.1f} ms, {rows} row(s), {size} B){failed}")
+    return "\n".join(lines)
+
+
+def pick_history(ctx: RequestContext, args: PickHistory) -> str:
+    """List the latest logged pick and result changes, oldest first."""
+    err = _require_admin(ctx, args.admin_secret)
+    if err:
+        return err
+    number = None
+    if args.home or args.away:
+        match = _find_match(ctx, args.home, args.away)
+        if not match:
+            return f"No match '{args.home} vs {args.away}' in the schedule."
+        number = match.number
+    logged = audit.events(ctx, args.player_name.strip() or None, number)
+    if not logged:
+        return "No changes have been logged for that yet."
+    return "\n".join(audit.describe(event) for event in logged[-args.limit:])
+
+
+def backup_store(ctx: RequestContext, args: BackupStore) -> str:
+    """Snapshot the whole store into the configured backup directory."""
+    err = _require_admin(ctx, args.admin_secret)
+    if err:
+        return err
+    if not ctx.backup_path:
+        return "Backups are not configured on this bot."
+    suffix = ".db" if args.format == "sqlite" else ".jsonl.gz"
+    path = os.path.join(ctx.backup_path, f"fifa-{ctx.now:%Y%m%dT%H%M%S}{suffix}")
+    try:
+        counts = backup.create(ctx, path)
+    except (OSError, ValueError) as exc:
+        return f"The backup failed: {exc}"
+    summary = ", ".join(f"{rows} {table}" for table, rows in counts.items())
+    return f"Backup written to {path} ({summary})."
+
+
 # --------------------------------------------------------------------------- #
 # Lookup handlers (read-only; let the bot report real state, not guess)
 # --------------------------------------------------------------------------- #
-def list_players(ctx: FifaContext, _args: NoArgs) -> str:
+def list_players(ctx: RequestContext, _args: NoArgs) -> str:
     """List every registered player, their prediction count and link status."""
-    players = sorted(ctx.store.get("player"), key=lambda p: p.name)
+    players = snapshot.tournament(ctx).players
     if not players:
         return "No players are registered yet."
     lines = []
     for player in players:
-        preds = player.predictions if isinstance(player.predictions, dict) else {}
-        sessions = (1 if getattr(player, "talker", "") else 0) + len(
-            getattr(player, "talkers", None) or [])
-        linked = f"{sessions} session(s)" if sessions else "NOT linked"
-        lines.append(f"{player.name}: {len(preds)} prediction(s) ({linked})")
+        linked = f"{player.sessions} session(s)" if player.sessions else "NOT linked"
+        lines.append(f"{player.name}: {len(player)} prediction(s) ({linked})")
     return "\n".join(lines)
 
 
-def get_predictions(ctx: FifaContext, args: PlayerRef) -> str:
+def get_predictions(ctx: RequestContext, args: PlayerRef) -> str:
     """List all of a named player's saved predictions."""
-    player = ctx.store.get.player(name=args.player_name)
+    player = _player_named(ctx, args.player_name)
     if not player:
         return f"No player named '{args.player_name}'."
     return _format_predictions(ctx, player)
 
 
-def my_predictions(ctx: FifaContext, _args: NoArgs) -> str:
+def my_predictions(ctx: RequestContext, _args: NoArgs) -> str:
     """List the caller's own saved predictions."""
     me = _player_by_talker(ctx)
     if not me:
@@ -458,7 +713,7 @@ def my_predictions(ctx: FifaContext, _args: NoArgs) -> str:
     return _format_predictions(ctx, me)
 
 
-def whoami(ctx: FifaContext, _args: NoArgs) -> str:
+def whoami(ctx: RequestContext, _args: NoArgs) -> str:
     """Return the caller's session id (talker), e.g. for admin relinking."""
     if not ctx.talker:
         return "I can't see a session id for you."
@@ -467,55 +722,100 @@ def whoami(ctx: FifaContext, _args: NoArgs) -> str:
     return f"Your session id is: {ctx.talker}{who}"
 
 
-def standings(ctx: FifaContext, _args: NoArgs) -> str:
-    """Score all registered players against entered results and rank them.
+def standings(ctx: RequestContext, args: StandingsPage) -> str:
+    """Show one page of the ranked scoreboard, plus the caller's own place.
 
-    Scoring (the original scheme): 6 points for an exact score, 3 for the
-    correct outcome; on a match nobody predicted exactly, the closest correct
-    prediction (by goal difference) earns +2, or +1 each if several tie.
+    Reads the pool's cached :class:`scoring.RankHistory` (see :mod:`scoring`
+    for the scheme); only the requested page is selected and ranked. A
+    caller who is off the page is placed by a bisect over the totals the
+    history keeps sorted.
     """
-    players = list(ctx.store.get("player"))
-    if not players:
+    hist = scoring.history(ctx)
+    if not hist.names:
         return "No players are registered yet."
-    scores = {p.name: 0 for p in players}
-    played = [m for m in _ordered_matches(ctx) if m.result]
-    if not played:
+    if not len(hist):
         return "No match results have been entered yet."
-    for match in played:
-        perfect = False
-        closest = []
-        closest_diff = None
-        for player in players:
-            preds = player.predictions if isinstance(player.predictions, dict) else {}
-            prediction = preds.get(str(match.number))
-            if not prediction:
-                continue
-            correct, diff = fifa.get_score_bet(match.result, prediction)
-            if correct and diff == 0:
-                perfect = True
-                scores[player.name] += 6
-            elif correct:
-                scores[player.name] += 3
-                if closest_diff is None or diff < closest_diff:
-                    closest, closest_diff = [player.name], diff
-                elif diff == closest_diff:
-                    closest.append(player.name)
-        if not perfect and closest:
-            bonus = 2 if len(closest) == 1 else 1
-            for name in closest:
-                scores[name] += bonus
-    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
-    lines = [f"{i + 1}. {name} - {pts} pts" for i, (name, pts) in enumerate(ranked)]
-    return (
-        f"Standings (after {len(played)} played match(es)):\n"
-        + "\n".join(lines)
-    )
+    board = hist.leaderboard
+    rows = board.top(args.limit, args.offset)
+    if not rows:
+        return f"There are only {len(board)} player(s) in the standings."
+    lines = [f"{rank}. {name} - {pts} pts" for rank, name, pts in rows]
+    head = f"Standings (after {len(hist)} played match(es))"
+    if len(rows) < len(board):
+        head += f", places {args.offset + 1}-{args.offset + len(rows)} of {len(board)}"
+    me = _player_by_talker(ctx)
+    if me and me.name in board.totals and me.name not in {n for _, n, _ in rows}:
+        lines.append(f"You: {board.rank(me.name)}. {me.name} - "
+                     f"{board.totals[me.name]} pts")
+    if args.offset + len(rows) < len(board):
+        lines.append(f"(more: call standings with offset={args.offset + len(rows)})")
+    return f"{head}:\n" + "\n".join(lines)
+
+
+def _moved(delta):
+    return f"up {delta}" if delta > 0 else f"down {-delta}" if delta else "no change"
+
+
+def rank_movement(ctx: RequestContext, args: RankMoves) -> str:
+    """Show how the ranking moved with the latest result, and the caller's path."""
+    hist = scoring.history(ctx)
+    if not len(hist):
+        return "No match results have been entered yet."
+    match = ctx.store.get.match(number=hist.events[-1])
+    label = _label(match) if match else f"match {hist.events[-1]}"
+    lines = [f"After {label}:"]
+    me = _player_by_talker(ctx)
+    if me and me.name in hist.ranks:
+        lines.append(
+            f"You: rank {hist.rank(me.name)} ({_moved(hist.delta(me.name))}), "
+            f"{hist.total(me.name)} pts. Your rank after each result: "
+            + ", ".join(str(rank) for _, _, rank in hist.timeline(me.name)))
+    movers = hist.movers(args.top)
+    if movers:
+        lines.append("Biggest movers: " + ", ".join(
+            f"{name} {_moved(delta)} (now {hist.rank(name)})"
+            for name, delta in movers))
+    else:
+        lines.append("Nobody changed rank.")
+    return "\n".join(lines)
+
+
+def tonight_picks(ctx: RequestContext, args: PicksWindow) -> str:
+    """Show who picked what for every unresolved match in the next hours."""
+    horizon = (ctx.now + timedelta(hours=args.hours)).timestamp()
+    players = snapshot.tournament(ctx).players
+    rows = schedule.preview(schedule.pending_index(ctx), players, horizon)
+    me = _player_by_talker(ctx)
+    if not rows:
+        return f"No matches awaiting a result in the next {args.hours} hour(s)."
+    blocks = []
+    for match, chosen in rows:
+        listed = ", ".join(f"{name} {pick}" for name, pick in chosen)
+        blocks.append(f"{_describe(match, me)}: {listed or 'no players yet'}")
+    return "\n".join(blocks)
+
+
+def missing_picks(ctx: RequestContext, args: MissingPicksWindow) -> str:
+    """List the players without a pick for each match kicking off soon."""
+    err = _require_admin(ctx, args.admin_secret)
+    if err:
+        return err
+    start = ctx.now.timestamp()
+    horizon = (ctx.now + timedelta(hours=args.hours)).timestamp()
+    rows = picks.missing_picks(ctx).window(start, horizon)
+    if not rows:
+        return f"No matches kick off in the next {args.hours} hour(s)."
+    lines = []
+    for match, names in rows:
+        owed = ", ".join(names) if names else "everyone has picked"
+        lines.append(f"{_describe(match)}: {owed}")
+    return "\n".join(lines)
 
 
-def next_match_needing_result(ctx: FifaContext, _args: NoArgs) -> str:
+def next_match_needing_result(ctx: RequestContext, _args: NoArgs) -> str:
     """Return the next already-kicked-off match that has no result entered."""
     for match in _ordered_matches(ctx):
-        if _has_started(match) and not match.result:
+        if _has_started(ctx, match) and not match.result:
             return f"Next match needing a result: {_describe(match)}."
     return "Every match that has kicked off already has a result entered."
 
@@ -523,7 +823,7 @@ def next_match_needing_result(ctx: FifaContext, _args: NoArgs) -> str:
 # --------------------------------------------------------------------------- #
 # Player handlers
 # --------------------------------------------------------------------------- #
-def register_player(ctx: FifaContext, args: RegisterPlayer) -> str:
+def register_player(ctx: RequestContext, args: RegisterPlayer) -> str:
     """Link the caller's session to a display name (creating the player)."""
     if not list(ctx.store.get("match")):
         return (
@@ -536,9 +836,9 @@ def register_player(ctx: FifaContext, args: RegisterPlayer) -> str:
     if mine:
         return f"You're already registered as {mine.name}."
     name = args.name.strip()
-    existing = ctx.store.get.player(name=name)
+    existing = _player_named(ctx, name)
     if not existing:  # case-insensitive match, so re-linking won't duplicate
-        for player in ctx.store.get("player"):
+        for player in _players(ctx):
             if player.name.lower() == name.lower():
                 existing = player
                 break
@@ -552,30 +852,32 @@ def register_player(ctx: FifaContext, args: RegisterPlayer) -> str:
             )
         existing.talker = ctx.talker  # first device claims a previously unlinked record
         ctx.store.put(existing)
+        ctx.changed("player", keep=picks.joined(ctx, existing))
         player, verb = existing, "Welcome back,"
     else:
-        player = memories.Player(name=name, talker=ctx.talker)
+        player = memories.Player(name=name, talker=ctx.talker, pool=ctx.pool)
         ctx.store.put(player)
+        ctx.changed("player", "scores", keep=picks.joined(ctx, player))
         verb = "Registered"
     nxt = _next_open_match(ctx, player)
     if nxt:
-        return f"{verb} {player.name}. Next match to predict: {_describe(nxt)}."
+        return f"{verb} {player.name}. Next match to predict: {_describe(nxt, player)}."
     return (f"{verb} {player.name}. There are no upcoming matches to predict "
             "right now.")
 
 
-def get_next_match(ctx: FifaContext, _args: NoArgs) -> str:
+def get_next_match(ctx: RequestContext, _args: NoArgs) -> str:
     """Return the next match awaiting the caller's prediction, if any."""
     me = _player_by_talker(ctx)
     if not me:
         return NEED_NAME
     nxt = _next_open_match(ctx, me)
     if nxt:
-        return f"Next match awaiting your prediction: {_describe(nxt)}."
+        return f"Next match awaiting your prediction: {_describe(nxt, me)}."
     return "You have no upcoming matches to predict right now."
 
 
-def place_bet(ctx: FifaContext, args: PlaceBet) -> str:
+def place_bet(ctx: RequestContext, args: PlaceBet) -> str:
     """Record the caller's predicted score for their next upcoming match."""
     me = _player_by_talker(ctx)
     if not me:
@@ -583,17 +885,39 @@ def place_bet(ctx: FifaContext, args: PlaceBet) -> str:
     match = _next_open_match(ctx, me)
     if not match:
         return "You have no upcoming matches to predict right now."
-    _ensure_predictions(me)[str(match.number)] = [args.home_score, args.away_score]
-    ctx.store.put(me)
+    new = [args.home_score, args.away_score]
+    _ensure_predictions(me)[str(match.number)] = new
+    written = audit.record(ctx, me, "place_bet", match.number, None, new, me.name,
+                           topics=("player",))
+    ctx.changed("player", keep=picks.picked(ctx, me.name, match.number),
+                pick=(me.name, match.number, args.home_score, args.away_score),
+                written=written)
     nxt = _next_open_match(ctx, me)
-    tail = f" Next match: {_describe(nxt)}." if nxt else " That was the last open match."
+    tail = (f" Next match: {_describe(nxt, me)}." if nxt
+            else " That was the last open match.")
     return (
         f"Recorded your prediction for {_label(match)}: "
         f"{args.home_score}:{args.away_score}.{tail}"
     )
 
 
-def update_prediction(ctx: FifaContext, args: UpdatePrediction) -> str:
+def set_timezone(ctx: RequestContext, args: SetTimezone) -> str:
+    """Store the caller's preferred timezone for displayed kickoff times."""
+    me = _player_by_talker(ctx)
+    if not me:
+        return NEED_NAME
+    name = args.timezone.strip()
+    try:
+        tz = schedule.zone(name)
+    except ValueError:
+        return f"I don't know the timezone '{name}'. Use a name like 'Europe/Riga'."
+    me.timezone = "" if tz is timezone.utc else name
+    ctx.store.put(me)
+    ctx.changed("player")
+    return f"Kickoff times will be shown in {me.timezone or 'UTC'} for you."
+
+
+def update_prediction(ctx: RequestContext, args: UpdatePrediction) -> str:
     """Correct the caller's prediction for a specific not-yet-started match."""
     me = _player_by_talker(ctx)
     if not me:
@@ -601,13 +925,20 @@ def update_prediction(ctx: FifaContext, args: UpdatePrediction) -> str:
     match = _find_match(ctx, args.home, args.away)
     if not match:
         return f"No match '{args.home} vs {args.away}' in the schedule."
-    if _has_started(match):
+    if _has_started(ctx, match):
         return (
             f"{_label(match)} has already kicked off, so its prediction is "
             "locked. Only the admin can change it now."
         )
-    _ensure_predictions(me)[str(match.number)] = [args.home_score, args.away_score]
-    ctx.store.put(me)
+    preds = _ensure_predictions(me)
+    new = [args.home_score, args.away_score]
+    old = preds.get(str(match.number))
+    preds[str(match.number)] = new
+    written = audit.record(ctx, me, "update_prediction", match.number, old, new,
+                           me.name, topics=("player",))
+    ctx.changed("player", keep=picks.picked(ctx, me.name, match.number),
+                pick=(me.name, match.number, args.home_score, args.away_score),
+                written=written)
     return (
         f"Updated your prediction for {_label(match)} to "
         f"{args.home_score}:{args.away_score}."
@@ -682,6 +1013,32 @@ TOOLSPECS: list[ToolSpec] = [
         LinkDevice,
         link_device,
     ),
+    ToolSpec(
+        "recent_calls",
+        "ADMIN: list the latest tool calls with their duration and store "
+        "usage, when call recording is enabled. The admin secret is only needed "
+        "the first time this session acts as admin.",
+        RecentCalls,
+        recent_calls,
+    ),
+    ToolSpec(
+        "pick_history",
+        "ADMIN: show the logged changes of predictions and results (who, when, "
+        "old -> new), optionally for one player and/or one match - use it to "
+        "settle disputes. The admin secret is only needed the first time this "
+        "session acts as admin.",
+        PickHistory,
+        pick_history,
+    ),
+    ToolSpec(
+        "backup_store",
+        "ADMIN: write a consistent snapshot of the whole store (groups, "
+        "matches, players, admins and the change log) to the bot's backup "
+        "directory, safe while the bot is in use. The admin secret is only "
+        "needed the first time this session acts as admin.",
+        BackupStore,
+        backup_store,
+    ),
     # lookups (read-only) - use these to report real state instead of guessing
     ToolSpec(
         "list_players",
@@ -710,10 +1067,35 @@ TOOLSPECS: list[ToolSpec] = [
     ToolSpec(
         "standings",
         "Show the scoreboard, scoring all players' predictions against the "
-        "entered match results.",
-        NoArgs,
+        "entered match results. Shows the top 10 and the current player's own "
+        "place; use limit/offset to page further.",
+        StandingsPage,
         standings,
     ),
+    ToolSpec(
+        "rank_movement",
+        "Show how the standings moved with the latest result: the biggest "
+        "movers and, for the current player, their rank change and rank after "
+        "each result.",
+        RankMoves,
+        rank_movement,
+    ),
+    ToolSpec(
+        "tonight_picks",
+        "Show who picked what for the matches kicking off in the next few hours "
+        "(default 12) and any started match still awaiting its result.",
+        PicksWindow,
+        tonight_picks,
+    ),
+    ToolSpec(
+        "missing_picks",
+        "ADMIN: list the players who still have no prediction for each match "
+        "kicking off in the next few hours (default 24), e.g. to nudge them. "
+        "The admin secret is only needed the first time this session acts as "
+        "admin.",
+        MissingPicksWindow,
+        missing_picks,
+    ),
     ToolSpec(
         "next_match_needing_result",
         "Get the next already-played match that still needs its actual result "
@@ -750,9 +1132,31 @@ TOOLSPECS: list[ToolSpec] = [
         UpdatePrediction,
         update_prediction,
     ),
+    ToolSpec(
+        "set_timezone",
+        "Set the current player's timezone (IANA name such as 'Europe/Riga') "
+        "so kickoff times are shown in their local time.",
+        SetTimezone,
+        set_timezone,
+    ),
 ]
 
 
+TOOLS_BY_NAME: dict[str, ToolSpec] = {spec.name: spec for spec in TOOLSPECS}
+
+
 def get_toolspecs() -> list[ToolSpec]:
     """Return the list of available tool descriptors."""
     return list(TOOLSPECS)
+
+
+def get_toolspec(name: str) -> ToolSpec | None:
+    """Return the tool descriptor called name, or None."""
+    return TOOLS_BY_NAME.get(name)
+
+
+if __name__ == "__main__":
+    with open(SCHEMAS_FILE, "w", encoding="utf-8") as out:
+        json.dump(build_schemas(), out, indent=1, sort_keys=True)
+        out.write("\n")
+    print(f"Wrote {SCHEMAS_FILE}")
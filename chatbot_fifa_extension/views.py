@@ -0,0 +1,131 @@
+"""Compact, read-only views of Match and Player records for scoring and reports.
+
+membank hands out plain dataclasses whose predictions are a dict of
+string match numbers to two-item lists - several objects per pick. Code
+that walks a whole pool converts the records once, at the store boundary,
+into slotted views: a :class:`PlayerView` packs its predictions into one
+``array('b')`` indexed by match number (two int8 slots per match, NO_PICK
+where there is none) and a :class:`MatchView` carries its kickoff epoch and
+its result as a tuple. Scores and picks are both tuples, so they compare
+directly.
+
+Goal counts must fit int8: at most MAX_GOALS, which the tools' params
+enforce; :func:`storage.migrate` lowers larger ones stored before that.
+"""
+
+from array import array
+
+from . import schedule
+
+
+NO_PICK = -1
+MAX_GOALS = 127
+
+
+class _ReadOnly:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def _init(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+
+class MatchView(_ReadOnly):
+    """A match: number, stage, teams, kickoff (string and epoch), result.
+
+    result is a (home, away) tuple, or None until played.
+    """
+
+    __slots__ = ("number", "stage", "home", "away", "kickoff", "epoch", "result")
+
+    def __init__(self, match):
+        self._init(number=match.number, stage=match.stage, home=match.home,
+                   away=match.away, kickoff=match.kickoff,
+                   epoch=schedule.kickoff_epoch(match),
+                   result=tuple(match.result) if match.result else None)
+
+    def __repr__(self):
+        return f"MatchView(#{self.number} {self.home} vs {self.away})"
+
+
+class PlayerView(_ReadOnly):
+    """A player with predictions packed as int8 pairs by match number.
+
+    :param player: the :class:`memories.Player` record.
+    :param size: match numbers the array covers (0 .. size-1); larger
+        numbers in the record are covered too.
+    :param picks: a NO_PICK-filled int8 buffer of 2 * size slots to pack
+        into (e.g. a row of a shared matrix) instead of a new array; picks
+        beyond it are dropped.
+
+    sessions counts the linked devices (primary talker plus extra ones).
+    """
+
+    __slots__ = ("name", "talker", "sessions", "pool", "timezone", "picks")
+
+    def __init__(self, player, size=0, picks=None):
+        preds = player.predictions if isinstance(player.predictions, dict) else {}
+        numbers = {int(n): pred for n, pred in preds.items() if pred}
+        if picks is None:
+            size = max(size, max(numbers, default=-1) + 1)
+            picks = array("b", [NO_PICK]) * (2 * size)
+        for number, (home, away) in numbers.items():
+            if 2 * number + 1 < len(picks):
+                picks[2 * number] = home
+                picks[2 * number + 1] = away
+        talker = getattr(player, "talker", "") or ""
+        self._init(name=player.name, talker=talker,
+                   sessions=bool(talker) + len(getattr(player, "talkers", None) or []),
+                   pool=getattr(player, "pool", "") or "",
+                   timezone=getattr(player, "timezone", "") or "", picks=picks)
+
+    @classmethod
+    def packed(cls, name, picks, pool=""):
+        """A view of already packed picks (e.g. a mapped matrix row).
+
+        Only the name and pool are known; the session fields are empty.
+        """
+        self = cls.__new__(cls)
+        self._init(name=name, talker="", sessions=0, pool=pool, timezone="",
+                   picks=picks)
+        return self
+
+    def pick(self, number):
+        """The (home, away) prediction for match number, or None."""
+        i = 2 * number
+        if i + 1 >= len(self.picks) or self.picks[i] == NO_PICK:
+            return None
+        return (self.picks[i], self.picks[i + 1])
+
+    def predicted(self):
+        """Yield (number, (home, away)) for every pick, by match number."""
+        picks = self.picks
+        for i in range(0, len(picks), 2):
+            if picks[i] != NO_PICK:
+                yield i // 2, (picks[i], picks[i + 1])
+
+    def __len__(self):
+        """Number of picks."""
+        return sum(1 for i in range(0, len(self.picks), 2)
+                   if self.picks[i] != NO_PICK)
+
+    def __repr__(self):
+        return f"PlayerView({self.name!r}, {len(self)} pick(s))"
+
+
+def match_views(matches):
+    """MatchViews of matches (records or views already), by number."""
+    return sorted((m if isinstance(m, MatchView) else MatchView(m) for m in matches),
+                  key=lambda m: m.number)
+
+
+def player_views(players, matches=()):
+    """PlayerViews of players (records or views already).
+
+    New views are sized to cover every match in matches.
+    """
+    size = max((m.number for m in matches), default=-1) + 1
+    return [p if isinstance(p, PlayerView) else PlayerView(p, size) for p in players]
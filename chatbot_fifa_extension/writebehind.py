@@ -0,0 +1,251 @@
+"""Opt-in write-behind batching of store writes (group commit).
+
+membank commits every ``put`` on its own, so in the pre-kickoff surge each
+pick costs its own sqlite commits and the commits queue up behind each
+other. A :class:`WriteBehindStore` in front of the store queues the puts of
+keyed records instead, coalescing repeated puts of the same record (last one
+wins), and a flusher thread writes whatever has queued every ``interval``
+seconds in one transaction (:func:`storage.put_many`). Store-version bumps
+queue with the records they announce (the ``bump`` of :meth:`put_many`), so
+a pick waits for one batch, not two.
+
+A ``put`` returns once its record is durable - so a pick is acknowledged only
+after its commit - unless ``max_wait`` bounds that wait, trading durability
+of the latest writes for latency. Either way this process reads its own
+writes: a lookup by key or a whole-table read sees the queued records
+(including the batch being committed), and any other read of a table with
+records pending (or a delete) flushes the queue first. Reads of other tables
+don't wait.
+
+Kickoff locks are unaffected: a tool decides whether a pick is still open
+against its request clock, stamped when the call is accepted, before the
+record is queued, so a pick accepted before kickoff stays valid when its
+batch lands after it. A :class:`scheduler.KickoffScheduler` over a batching
+context also flushes on each ``lock`` event (it registers :func:`flush_hook`).
+
+Batching pays off for write-heavy bursts such as the pre-kickoff surge of
+picks. On a mixed load the filtered reads of players still wait for the
+pending picks, and it can be slower than writing through; measure with
+``benchmarks.load --write-behind`` before turning it on.
+
+Enabled with the ``write_behind`` config key (the interval, in seconds);
+``write_behind_max_wait`` sets the bound on acknowledgements.
+"""
+
+import atexit
+import copy
+import logging
+import threading
+import time
+
+from . import storage
+
+
+LOG = logging.getLogger("chatbot_fifa_extension.writes")
+
+
+class _Get:
+    """Wraps membank's ``store.get`` to overlay the queued records."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __call__(self, table, *filters, **matching):
+        if filters or matching:
+            if self._store.queued(table):
+                self._store.flush()
+            return self._store.inner.get(table, *filters, **matching)
+        rows = self._store.inner.get(table)
+        queued = self._store.queued(table)
+        if not queued:
+            return rows
+        key = storage.key_field(next(iter(queued.values())))
+        fresh = {k: copy.deepcopy(item) for k, item in queued.items()}
+        rows = [fresh.pop(getattr(row, key), row) for row in rows]
+        return rows + list(fresh.values())
+
+    def __getattr__(self, table):
+        lookup = getattr(self._store.inner.get, table)
+
+        def get_one(**matching):
+            queued = self._store.queued(table)
+            if queued:
+                key = storage.key_field(next(iter(queued.values())))
+                if set(matching) == {key}:
+                    if matching[key] in queued:
+                        return copy.deepcopy(queued[matching[key]])
+                else:
+                    self._store.flush()
+            return lookup(**matching)
+        return get_one
+
+
+class WriteBehindStore:
+    """A membank store whose puts of keyed records are batched.
+
+    :param store: the store to write to.
+    :param interval: seconds the flusher gathers puts before committing them.
+    :param max_wait: seconds a ``put`` waits for its commit before returning
+        anyway; None waits until the record is durable.
+
+    Everything else is passed through to the wrapped store. A failed batch
+    raises its error from the puts still waiting for it, and is logged on the
+    ``chatbot_fifa_extension.writes`` logger.
+    """
+
+    def __init__(self, store, interval=0.005, max_wait=None):
+        self.inner = store
+        self.interval = interval
+        self.max_wait = max_wait
+        self.get = _Get(self)
+        self._queue = {}  # (table, key) -> record
+        self._bumps = []  # [(topics, {topic: (previous, new)} to fill)]
+        self._inflight = {}  # the batch being committed, readable until it is
+        self._tables = storage.tables(store)
+        self._queued_seq = 0  # puts queued so far
+        self._durable_seq = 0  # puts committed (or failed) so far
+        self._failures = []  # [(first seq, last seq, exception)], latest last
+        self._closed = False
+        self._cond = threading.Condition()
+        self._through = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="fifa-write-behind",
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def queued(self, table):
+        """{key: record} of the records of table awaiting commit.
+
+        Includes the batch being committed; the records are the queued objects
+        themselves, so copy before changing.
+        """
+        with self._cond:
+            pending = {**self._inflight, **self._queue}
+        return {key: item for (name, key), item in pending.items() if name == table}
+
+    def put(self, item, wait=True):
+        """Queue item (or write it through if it has no key or table yet).
+
+        With wait False the put returns at once; it is committed no later than
+        the next put that waits.
+        """
+        table, key = storage.table_name(item), storage.key_field(item)
+        if key is None or table not in self._tables:
+            with self._through:  # one creator per new table
+                if key is None or table not in self._tables:
+                    self.flush()
+                    self.inner.put(item)
+                    self._tables.add(table)
+                    return
+        self._enqueue([(table, getattr(item, key), item)], wait)
+
+    def put_many(self, items, wait=True, bump=()):
+        """Queue items as one write: they are committed in the same batch.
+
+        Written through in one transaction if any has no key or table yet.
+
+        :param bump: store-version topics to advance in that batch's commit;
+            items may be empty to queue just the bump behind earlier puts.
+        :returns: {topic: (previous, new)} of bump, empty when the put
+            returned before its commit.
+        """
+        items = list(items)
+        entries = []
+        for item in items:
+            table, key = storage.table_name(item), storage.key_field(item)
+            if key is None or table not in self._tables:
+                self.flush()
+                return storage.put_many(self.inner, items, [bump])[0]
+            entries.append((table, getattr(item, key), item))
+        return self._enqueue(entries, wait, bump)
+
+    def _enqueue(self, entries, wait, bump=()):
+        """Queue (table, key, record) entries together; wait as for put."""
+        bumped = {}
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind store is closed")
+            for table, key, item in entries:
+                self._queue[table, key] = copy.deepcopy(item)
+            if bump:
+                self._bumps.append((tuple(bump), bumped))
+            self._queued_seq += 1
+            seq = self._queued_seq
+            self._cond.notify_all()
+        if not wait:
+            return {}
+        failure = self._wait(seq, self.max_wait)
+        if failure is not None:
+            raise failure
+        with self._cond:
+            return dict(bumped) if self._durable_seq >= seq else {}
+
+    def delete(self, item):
+        """Flush the queue, then delete item."""
+        self.flush()
+        self.inner.delete(item)
+
+    def flush(self):
+        """Wait until every put queued so far is committed (or has failed)."""
+        with self._cond:
+            seq = self._queued_seq
+        self._wait(seq, None)
+
+    def close(self):
+        """Commit what is queued and stop the flusher."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _wait(self, seq, timeout):
+        """Wait for put number seq; returns the error of its batch, if any."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._durable_seq >= seq, timeout):
+                return None  # acknowledged before durable (bounded wait)
+            return next((exc for first, last, exc in self._failures
+                         if first <= seq <= last), None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._bumps or self._closed)
+                if not (self._queue or self._bumps):
+                    return  # closed and drained
+            if not self._closed:
+                time.sleep(self.interval)  # let the batch gather
+            with self._cond:
+                batch, self._queue = self._queue, {}
+                bumps, self._bumps = self._bumps, []
+                self._inflight = batch
+                first, last = self._durable_seq + 1, self._queued_seq
+            try:
+                done = storage.put_many(self.inner, batch.values(),
+                                        [topics for topics, _ in bumps])
+            except Exception as exc:  # pylint: disable=broad-except
+                LOG.exception("write-behind batch of %d record(s) failed", len(batch))
+                failure = (first, last, exc)
+            else:
+                failure = None
+            with self._cond:
+                if not failure:
+                    for (_, bumped), versions in zip(bumps, done):
+                        bumped.update(versions)
+                if failure:
+                    self._failures = self._failures[-63:] + [failure]
+                self._durable_seq = last
+                self._inflight = {}
+                self._cond.notify_all()
+
+
+def flush_hook(ctx):
+    """Scheduler hook committing the context's pending writes (if batched)."""
+    def hook(_event, _match):
+        if ctx.writes is not None:
+            ctx.writes.flush()
+    return hook
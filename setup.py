@@ -24,6 +24,7 @@ with open("README.md", "r", encoding="utf-8") as fh:
         ],
         extras_require={
             "report": ["reportlab>=4", "tzdata"],
+            "export": ["pyarrow>=12"],
         },
         python_requires=">=3.10",
     )
@@ -0,0 +1,56 @@
+"""Shared helpers for building small in-memory tournaments in tests."""
+
+import membank
+
+from chatbot_fifa_extension import memories, storage
+from chatbot_fifa_extension.context import FifaContext
+from chatbot_fifa_extension.scoring import DEFAULT_RULES
+from chatbot_fifa_extension.writebehind import WriteBehindStore
+
+
+def make_context(matches=(), players=(), admin_secret="secret", path=None,
+                 rules=DEFAULT_RULES, instruments=None, matrix_path="",
+                 write_behind=None, max_wait=None, backup_path=""):
+    """Return a FifaContext over a fresh store.
+
+    :param matches: iterable of (number, home, away, kickoff, result) tuples.
+    :param players: iterable of (name, talker, predictions) tuples.
+    :param path: directory for an sqlite file store (needed when the store is
+        used from several threads); in-memory when None.
+    :param rules: the scoring rules of the context.
+    :param instruments: instrumentation to measure the context with.
+    :param matrix_path: directory to mirror the picks to matrix files in.
+    :param write_behind: batch the store's writes at this interval (seconds),
+        acknowledging after at most max_wait; the caller closes ``ctx.writes``.
+    :param backup_path: directory for the ``backup_store`` tool.
+    """
+    store = membank.LoadMemory(f"sqlite://{path}/db" if path else False)
+    for number, home, away, kickoff, result in matches:
+        store.put(memories.Match(number=number, home=home, away=away,
+                                 kickoff=kickoff, result=list(result)))
+    for name, talker, predictions in players:
+        store.put(memories.Player(name=name, talker=talker,
+                                  predictions=dict(predictions)))
+    storage.migrate(store)
+    writes = None
+    if write_behind is not None:
+        store = writes = WriteBehindStore(store, write_behind, max_wait)
+    if instruments:
+        store = instruments.wrap(store)
+    return FifaContext(store=store, admin_secret=admin_secret, rules=rules,
+                       instruments=instruments, writes=writes,
+                       backup_path=backup_path, matrix_path=matrix_path)
+
+
+MATCHES = (
+    (1, "Mexico", "South Africa", "2026-06-11T20:00:00+00:00", (2, 1)),
+    (2, "South Korea", "Czechia", "2026-06-12T02:00:00+00:00", (0, 0)),
+    (3, "Canada", "Bosnia", "2026-06-12T19:00:00+00:00", ()),
+    (4, "United States", "Paraguay", "2099-06-13T01:00:00+00:00", ()),
+)
+
+PLAYERS = (
+    ("Anna", "t-anna", {"1": [2, 1], "2": [1, 1], "3": [1, 0]}),
+    ("Bob", "t-bob", {"1": [1, 0], "2": [2, 0]}),
+    ("Cara", "t-cara", {"1": [3, 1], "3": [0, 2]}),
+)
@@ -0,0 +1,275 @@
+"""Testcases on the scoring report and its exports"""
+
+import contextlib
+import csv
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from chatbot_fifa_extension import matrix, memories, report, scoring, views
+
+from ._fixtures import MATCHES, PLAYERS, make_context
+
+
+class Compute(unittest.TestCase):
+    """Scoring the store for the report"""
+
+    def test(self):
+        """exact, outcome and closest bonus"""
+        ctx = make_context(MATCHES, PLAYERS)
+        ranking, before, delta, match_rows = report.compute(ctx)
+        self.assertEqual(["Anna", "Bob", "Cara"], ranking)
+        self.assertEqual({"Anna": 11, "Bob": 3, "Cara": 3}, before)
+        self.assertEqual({"Anna": 0, "Bob": 0, "Cara": 0}, delta)
+        self.assertEqual([1, 2], [m.number for m, _ in match_rows])
+
+    def test_since(self):
+        """update mode splits points into before and delta"""
+        ctx = make_context(MATCHES, PLAYERS)
+        _, before, delta, _ = report.compute(ctx, since=2)
+        self.assertEqual({"Anna": 6, "Bob": 3, "Cara": 3}, before)
+        self.assertEqual({"Anna": 5, "Bob": 0, "Cara": 0}, delta)
+
+
+class Views(unittest.TestCase):
+    """Slotted read-only views built at the store boundary"""
+
+    def test_player(self):
+        """picks packed by match number, NO_PICK where missing"""
+        player = memories.Player(name="Anna", talker="t-anna",
+                                 predictions={"1": [2, 1], "3": [0, 4]})
+        view = views.PlayerView(player, size=5)
+        self.assertEqual(10, len(view.picks))
+        self.assertEqual((2, 1), view.pick(1))
+        self.assertIsNone(view.pick(2))
+        self.assertIsNone(view.pick(50))
+        self.assertEqual((0, 4), view.pick(3))
+        self.assertEqual([(1, (2, 1)), (3, (0, 4))], list(view.predicted()))
+        self.assertEqual(2, len(view))
+
+    def test_read_only(self):
+        """no per-instance dict, no assignment"""
+        match = views.MatchView(memories.Match(number=1, kickoff="2026-06-11T20:00:00",
+                                               result=[2, 1]))
+        self.assertEqual((2, 1), match.result)
+        self.assertFalse(hasattr(match, "__dict__"))
+        with self.assertRaises(AttributeError):
+            match.result = (0, 0)
+
+
+class Rules(unittest.TestCase):
+    """Configurable, stage-aware scoring shared by the report and the tools"""
+
+    RULES = scoring.ScoringRules.from_conf(
+        {"advance": 1, "stage_weights": {"round32": 2}})
+
+    def knockout(self):
+        """fixture with match #1 moved into the round of 32"""
+        ctx = make_context(MATCHES, PLAYERS, rules=self.RULES)
+        match = ctx.store.get.match(number=1)
+        match.stage = "round32"
+        ctx.store.put(match)
+        return ctx
+
+    def test(self):
+        """winner bonus and stage multiplier on knockout matches only"""
+        ctx = self.knockout()
+        _, before, _, match_rows = report.compute(ctx)
+        self.assertEqual({"Anna": 19, "Bob": 8, "Cara": 8}, before)
+        first = dict((n, (note, pts)) for n, _, note, pts in match_rows[0][1])
+        self.assertEqual(("exact score +1 (winner) x2", 14), first["Anna"])
+        hist = scoring.history(ctx.request())
+        self.assertEqual(before, {n: hist.total(n) for n in hist.names})
+
+    def test_defaults(self):
+        """the default rules describe the original scheme"""
+        self.assertEqual(report.SCORING, scoring.ScoringRules().describe())
+        self.assertIn("round32 x2", self.RULES.describe())
+        with self.assertRaises(ValueError):
+            scoring.ScoringRules.from_conf({"exactly": 5})
+        for weight in ("2", -1, None, True, float("nan")):
+            with self.assertRaisesRegex(ValueError, "round32"):
+                scoring.ScoringRules.from_conf({"stage_weights": {"round32": weight}})
+
+
+class Upcoming(unittest.TestCase):
+    """Preview of picks on unresolved matches"""
+
+    def test(self):
+        """started-but-unresolved included, far future left out"""
+        ctx = make_context(MATCHES, PLAYERS)
+        rows = report.upcoming(ctx, exclude=["Cara"])
+        self.assertEqual([3], [m.number for m, _ in rows])
+        self.assertEqual([("Anna", "1:0"), ("Bob", "—")], rows[0][1])
+
+    def test_index_cached(self):
+        """the pending index is built once per context"""
+        ctx = make_context(MATCHES, PLAYERS)
+        report.upcoming(ctx)
+        index = ctx.cache.peek("pending")
+        report.upcoming(ctx, hours=24 * 365 * 100)
+        self.assertIs(index, ctx.cache.peek("pending"))
+        self.assertEqual([3, 4], [m.number for m in index.before(float("inf"))])
+
+
+class Missing(unittest.TestCase):
+    """Players still owing a pick in the report"""
+
+    def test(self):
+        """only unstarted matches, excluded names left out"""
+        ctx = make_context(MATCHES, PLAYERS)
+        rows = report.missing(ctx, exclude=["Bob"], hours=24 * 365 * 100)
+        self.assertEqual([(4, ["Anna", "Cara"])],
+                         [(m.number, names) for m, names in rows])
+        text = report.to_markdown(*report.compute(ctx), missing_rows=rows)
+        self.assertIn("## Missing picks", text)
+        self.assertIn("Anna, Cara", text)
+
+
+class RankHistory(unittest.TestCase):
+    """Chart-ready rank history"""
+
+    def test(self):
+        """one rank per player per scored match, in kickoff order"""
+        ctx = make_context(MATCHES, PLAYERS)
+        hist = report.rank_history(ctx)
+        self.assertIs(hist, report.rank_history(ctx))
+        self.assertEqual({"matches": [1, 2],
+                          "series": {"Anna": [1, 1], "Bob": [2, 2], "Cara": [2, 2]}},
+                         report.rank_series(hist))
+        self.assertEqual([(1, 6, 1), (2, 11, 1)], hist.timeline("Anna"))
+        rows = [r for r in report.records(*report.compute(ctx), hist=hist)
+                if r["section"] == "rank"]
+        self.assertEqual(6, len(rows))
+        text = report.to_markdown(*report.compute(ctx),
+                                  series=report.rank_series(hist))
+        self.assertIn("| Anna | 1 | 1 |", text)
+
+    def test_exclude(self):
+        """excluded players are not ranked"""
+        ctx = make_context(MATCHES, PLAYERS)
+        hist = report.rank_history(ctx, exclude=["Anna"])
+        self.assertEqual(["Bob", "Cara"], hist.names)
+        self.assertEqual((2, 1), (hist.rank("Bob"), hist.rank("Cara")))
+
+
+class Profiling(unittest.TestCase):
+    """--timings and --profile on the command line"""
+
+    def test(self):
+        """stage table, peak memory and a loadable profile dump"""
+        with tempfile.TemporaryDirectory() as path:
+            make_context(MATCHES, PLAYERS, path=path)
+            dump = os.path.join(path, "report.prof")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                report.main(["--db", path, "--pdf", os.path.join(path, "r.pdf"),
+                             "--md", os.path.join(path, "r.md"),
+                             "--timings", "--profile", dump])
+            pstats.Stats(dump)
+        text = out.getvalue()
+        for stage in ("open", "compute", "upcoming", "markdown", "pdf"):
+            self.assertRegex(text, rf"\n{stage} +\d")
+        self.assertIn("Peak traced memory:", text)
+        self.assertIn("top functions", text)
+
+
+class Matrix(unittest.TestCase):
+    """--matrix reads the picks from the mapped matrix file"""
+
+    def test(self):
+        """same standings as from the store"""
+        outputs = []
+        with tempfile.TemporaryDirectory() as path:
+            make_context(MATCHES, PLAYERS, path=path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                matrix.main(["--db", path])
+            for extra in ([], ["--matrix", path]):
+                out = io.StringIO()
+                with contextlib.redirect_stdout(out):
+                    report.main(["--db", path, "--pdf", os.path.join(path, "r.pdf"),
+                                 "--upcoming", "0"] + extra)
+                outputs.append(out.getvalue().partition("Standings:")[2])
+        self.assertIn("1. Anna - 11", outputs[0])
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_stale(self):
+        """a file behind the store is not trusted"""
+        with tempfile.TemporaryDirectory() as path:
+            ctx = make_context(MATCHES, PLAYERS, path=path)
+            with contextlib.redirect_stdout(io.StringIO()):
+                matrix.main(["--db", path])
+            player = ctx.store.get.player(id=":Bob")
+            player.predictions["1"] = [2, 1]
+            ctx.store.put(player)
+            ctx.changed("player")  # no matrix_path: the file is not updated
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                report.main(["--db", path, "--pdf", os.path.join(path, "r.pdf"),
+                             "--upcoming", "0", "--matrix", path])
+        self.assertIn("is behind the store", out.getvalue())
+        self.assertIn("1. Anna - 11", out.getvalue())
+        self.assertIn("2. Bob - 6", out.getvalue())  # 3 in the file
+
+
+class Exports(unittest.TestCase):
+    """Machine-readable exports of the computed report"""
+
+    def setUp(self):
+        ctx = make_context(MATCHES, PLAYERS)
+        self.result = report.compute(ctx)
+        self.upcoming = [(m, [("Anna", "1:0"), ("Bob", "—")])
+                         for m in ctx.store.get("match") if m.number == 3]
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rows(self):
+        """fresh record stream for the fixture"""
+        return report.records(*self.result, upcoming_rows=self.upcoming)
+
+    def test_records(self):
+        """one flat schema across all sections"""
+        rows = list(self.rows())
+        self.assertTrue(all(tuple(r) == report.COLUMNS for r in rows))
+        sections = [r["section"] for r in rows]
+        self.assertEqual(3, sections.count("standings"))
+        self.assertEqual(6, sections.count("match"))
+        self.assertEqual(2, sections.count("upcoming"))
+        bob = [r for r in rows if r["section"] == "upcoming"][1]
+        self.assertEqual((None, None), (bob["pick_home"], bob["pick_away"]))
+
+    def test_jsonl(self):
+        """json lines round trip"""
+        path = os.path.join(self.tmp.name, "r.jsonl")
+        count = report.to_jsonl(self.rows(), path)
+        with open(path, encoding="utf-8") as handle:
+            loaded = [json.loads(line) for line in handle]
+        self.assertEqual(count, len(loaded))
+        self.assertEqual(list(self.rows()), loaded)
+
+    def test_csv(self):
+        """csv carries the shared header"""
+        path = os.path.join(self.tmp.name, "r.csv")
+        count = report.to_csv(self.rows(), path)
+        with open(path, encoding="utf-8", newline="") as handle:
+            loaded = list(csv.DictReader(handle))
+        self.assertEqual(count, len(loaded))
+        self.assertEqual("Anna", loaded[0]["player"])
+        self.assertEqual("11", loaded[0]["total"])
+
+    def test_parquet(self):
+        """columnar export streams in batches"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        path = os.path.join(self.tmp.name, "r.parquet")
+        count = report.to_columnar(self.rows(), path, batch_rows=4)
+        table = pq.read_table(path)
+        self.assertEqual(count, table.num_rows)
+        self.assertEqual(list(report.COLUMNS), table.column_names)
@@ -0,0 +1,90 @@
+"""Testcases on the kickoff event scheduler"""
+
+import threading
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timezone
+
+from chatbot_fifa_extension import tools
+from chatbot_fifa_extension.scheduler import Event, KickoffScheduler
+
+from ._fixtures import MATCHES, PLAYERS, make_context
+
+
+KICKOFF_3 = int(datetime.fromisoformat(MATCHES[2][3]).timestamp())
+
+
+class Scheduler(unittest.TestCase):
+    """Events fire in time order with hooks per kind"""
+
+    def setUp(self):
+        self.ctx = make_context(MATCHES, PLAYERS)
+        self.scheduler = KickoffScheduler(self.ctx, reminder=600, warm=60,
+                                          result_due=7200)
+        self.fired = []
+        for kind in ("warm", "reminder", "lock", "result_due"):
+            self.scheduler.on(kind, lambda e, m: self.fired.append((e.kind, m.number)))
+
+    def test(self):
+        """only events ahead of load time are scheduled"""
+        self.scheduler.load(now=KICKOFF_3 - 3600)
+        self.assertEqual(KICKOFF_3 - 660, self.scheduler.next_at())
+        self.scheduler.run_due(now=KICKOFF_3 - 600)
+        self.assertEqual([("warm", 3), ("reminder", 3)], self.fired)
+        fired = self.scheduler.run_due(now=KICKOFF_3 + 7200)
+        self.assertEqual([Event(KICKOFF_3, "lock", 3),
+                          Event(KICKOFF_3 + 7200, "result_due", 3)], fired)
+
+    def test_result_entered(self):
+        """result_due is skipped once the result is in"""
+        self.scheduler.load(now=KICKOFF_3 - 1)
+        spec = tools.get_toolspec("set_result")
+        request = self.ctx.request(
+            "t-admin", datetime.fromtimestamp(KICKOFF_3 + 60, timezone.utc))
+        spec.handler(request, spec.params(admin_secret="secret", home="Canada",
+                                          away="Bosnia", home_score=2, away_score=2))
+        self.scheduler.run_due(now=KICKOFF_3 + 7200)
+        self.assertEqual([("lock", 3)], self.fired)
+
+    def test_failing_hook(self):
+        """a raising hook is logged; later hooks and events still fire"""
+        def failing(_event, _match):
+            raise RuntimeError("push service down")
+        self.scheduler.hooks["warm"].insert(0, failing)
+        self.scheduler.load(now=KICKOFF_3 - 3600)
+        with self.assertLogs("chatbot_fifa_extension.scheduler", "ERROR") as logs:
+            fired = self.scheduler.run_due(now=KICKOFF_3 - 600)
+        self.assertIn("push service down", logs.output[0])
+        self.assertEqual(2, len(fired))
+        self.assertEqual([("warm", 3), ("reminder", 3)], self.fired)
+
+    def test_run_survives(self):
+        """a failing pass doesn't end the run loop"""
+        stop = threading.Event()
+        passes = []
+
+        def run_due():
+            passes.append(1)
+            if len(passes) > 1:
+                stop.set()
+            raise RuntimeError("store unreachable")
+        self.scheduler.run_due = run_due
+        with self.assertLogs("chatbot_fifa_extension.scheduler", "ERROR"):
+            self.scheduler.run(stop, idle=0.0)
+        self.assertEqual(2, len(passes))
+
+    def test_write_behind(self):
+        """with batched writes, kickoff commits the queue first"""
+        ctx = make_context(MATCHES, PLAYERS, write_behind=0.01)
+        self.addCleanup(ctx.writes.close)
+        scheduler = KickoffScheduler(ctx)
+        scheduler.load(now=KICKOFF_3 - 1)
+        with patch.object(ctx.writes, "flush") as flush:
+            scheduler.run_due(now=KICKOFF_3)
+        flush.assert_called_once()
+        self.assertEqual([], KickoffScheduler(self.ctx).hooks["lock"])
+
+    def test_unknown_kind(self):
+        """hooks are only accepted for known kinds"""
+        with self.assertRaises(ValueError):
+            self.scheduler.on("halftime", print)
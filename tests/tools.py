@@ -0,0 +1,888 @@
+"""Testcases on the framework-neutral betting tools"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import membank
+
+from chatbot_fifa_extension import (audit, backup, cache, dispatch, instrument, matrix,
+                                    memories, scoring, snapshot, storage, tools,
+                                    views)
+from chatbot_fifa_extension.context import AdminSessions, FifaContext
+
+from ._fixtures import MATCHES, PLAYERS, make_context
+
+
+NOW = datetime(2026, 6, 12, 20, 0, tzinfo=timezone.utc)
+
+
+class Abstract(unittest.TestCase):
+    """Tools against a small tournament with the clock fixed at NOW"""
+
+    def setUp(self):
+        self.ctx = make_context(MATCHES, PLAYERS)
+
+    def call(self, tool, talker="", **params):
+        """invoke a tool by name as talker"""
+        spec = tools.get_toolspec(tool)
+        return spec.handler(self.ctx.request(talker, NOW), spec.params(**params))
+
+
+class LazyImport(unittest.TestCase):
+    """Package import must not pull heavy dependencies"""
+
+    def test(self):
+        """membank and pydantic load only when their names are used"""
+        code = (
+            "import sys, chatbot_fifa_extension as pkg\n"
+            "assert 'membank' not in sys.modules and 'pydantic' not in sys.modules\n"
+            "specs = pkg.get_toolspecs()\n"
+            "assert 'membank' not in sys.modules\n"
+            "assert not specs[0].params.__pydantic_complete__\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+class Schemas(unittest.TestCase):
+    """Shipped params schemas and validators on ToolSpec"""
+
+    def test_shipped_current(self):
+        """data/tool_schemas.json matches the params models"""
+        self.assertEqual(tools.build_schemas(), tools._shipped_schemas())
+
+    def test_validate_json(self):
+        """raw JSON bytes validate straight into params"""
+        spec = next(s for s in tools.get_toolspecs() if s.name == "place_bet")
+        params = spec.validate_json(b'{"home_score": 2, "away_score": 1}')
+        self.assertEqual((2, 1), (params.home_score, params.away_score))
+        self.assertEqual(spec.json_schema, tools._shipped_schemas()["place_bet"])
+        with self.assertRaises(tools.pydantic.ValidationError):
+            spec.validate_json(b'{"home_score": -1, "away_score": 1}')
+
+    def test_goal_bound(self):
+        """scores beyond what the int8 snapshot holds are rejected"""
+        for name in ("place_bet", "update_prediction", "admin_set_prediction",
+                     "set_result"):
+            spec = tools.get_toolspec(name)
+            for field in ("home_score", "away_score"):
+                self.assertEqual(views.MAX_GOALS,
+                                 spec.json_schema["properties"][field]["maximum"])
+        ctx = make_context(MATCHES, PLAYERS)
+        answer = dispatch(ctx, "set_result", '{"home": "Canada", "away": "Bosnia", '
+                          '"home_score": 130, "away_score": 0}', now=NOW)
+        self.assertIn("home_score: Input should be less than or equal to 127", answer)
+        self.assertIn("1. Anna", dispatch(ctx, "standings", "{}", now=NOW))
+
+    def test_legacy_goals(self):
+        """goals stored before the bound are lowered to it on migrate"""
+        matches = MATCHES[:1] + ((2, "South Korea", "Czechia",
+                                  "2026-06-12T02:00:00+00:00", (130, 0)),)
+        players = PLAYERS + (("Dan", "t-dan", {"1": [200, 1], "2": [1, 1]}),)
+        with self.assertLogs("chatbot_fifa_extension.storage", "WARNING") as logs:
+            ctx = make_context(matches, players)
+        self.assertEqual(2, len(logs.output))
+        self.assertEqual({"1": [127, 1], "2": [1, 1]},
+                         ctx.store.get.player(id=":Dan").predictions)
+        self.assertEqual([127, 0], ctx.store.get.match(number=2).result)
+        self.assertIn("Dan", dispatch(ctx, "standings", "{}", now=NOW))
+        with self.assertNoLogs("chatbot_fifa_extension.storage"):
+            storage.migrate(ctx.store)
+
+
+class AdminCache(Abstract):
+    """Admin sessions are authorized from the in-process set"""
+
+    def test(self):
+        """secret once, then no admin reads per call"""
+        self.assertIn("Verified", self.call("authenticate_admin", "t-admin",
+                                            admin_secret="secret"))
+        with patch.object(AdminSessions, "refresh") as refresh:
+            for _ in range(3):
+                answer = self.call("set_result", "t-admin", home="Canada",
+                                   away="Bosnia", home_score=1, away_score=0)
+                self.assertIn("Recorded result", answer)
+        refresh.assert_not_called()
+
+    def test_add_during_refresh(self):
+        """a reload that read the store before an add doesn't drop it"""
+        reading, release = threading.Event(), threading.Event()
+        store = self.ctx.store
+
+        class SlowStore:
+            def get(self, table):
+                rows = store.get(table)
+                reading.set()
+                release.wait(2)
+                return rows
+        admins = AdminSessions(SlowStore())
+        reload = threading.Thread(target=admins.refresh)
+        reload.start()
+        reading.wait(2)
+        adding = threading.Thread(target=admins.add, args=(("", "t-new"),))
+        adding.start()
+        release.set()
+        reload.join()
+        adding.join()
+        self.assertIn(("", "t-new"), admins)
+
+    def test_other_process(self):
+        """another engine sees a new admin once its ttl lapses"""
+        other = FifaContext(store=self.ctx.store, admin_secret="secret",
+                            admins=AdminSessions(self.ctx.store, ttl=3600))
+        other.admins.refresh()
+        self.call("authenticate_admin", "t-admin", admin_secret="secret")
+        self.assertNotIn(("", "t-admin"), other.admins)
+        other.admins.ttl = 0
+        self.assertIn(("", "t-admin"), other.admins)
+
+
+class Pools(Abstract):
+    """Several pools share one store and its schedule"""
+
+    def call_in(self, pool, tool, talker="", **params):
+        """invoke a tool by name as talker in pool"""
+        spec = tools.get_toolspec(tool)
+        request = self.ctx.request(talker, NOW, pool=pool)
+        return spec.handler(request, spec.params(**params))
+
+    def test_players(self):
+        """same display name in two pools, each with own picks"""
+        answer = self.call_in("office", "register_player", "t-anna2", name="Anna")
+        self.assertIn("Registered Anna", answer)
+        self.call_in("office", "place_bet", "t-anna2", home_score=4, away_score=4)
+        self.assertIn("1 prediction(s)", self.call_in("office", "list_players"))
+        self.assertIn("Anna: 3 prediction(s)", self.call("list_players"))
+        self.assertIn("(registered as Bob)", self.call("whoami", "t-bob"))
+        self.assertIn("(not registered yet)",
+                      self.call_in("office", "whoami", "t-bob"))
+
+    def test_admins(self):
+        """admin sessions and secrets are per pool"""
+        engine = FifaContext(store=self.ctx.store, admin_secret="secret",
+                             admin_secrets={"office": "office-secret"})
+        self.ctx = engine
+        self.assertIn("not authorized", self.call_in(
+            "office", "authenticate_admin", "t-admin", admin_secret="secret"))
+        self.assertIn("Verified", self.call_in(
+            "office", "authenticate_admin", "t-admin", admin_secret="office-secret"))
+        self.assertIn("not authorized", self.call("set_result", "t-admin", home="Canada",
+                                                  away="Bosnia", home_score=1,
+                                                  away_score=0))
+
+    def test_migrate(self):
+        """records from before pools get the default pool and an id"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.ctx = make_context(MATCHES, PLAYERS, path=tmp.name)
+        self.ctx.store.put(memories.Admin(talker="t-admin"))
+        with storage.engine(self.ctx.store).begin() as conn:
+            for table in ("player", "admin"):
+                conn.exec_driver_sql(f"UPDATE {table} SET id = NULL, pool = NULL")
+        storage.migrate(self.ctx.store)
+        storage.migrate(self.ctx.store)  # idempotent
+        self.assertEqual(":Anna", self.ctx.store.get.player(name="Anna").id)
+        self.assertEqual(3, len(self.ctx.store.get("player")))
+        self.assertIn("(registered as Bob)", self.call("whoami", "t-bob"))
+        self.assertIn("Recorded result", self.call(
+            "set_result", "t-admin", home="Canada", away="Bosnia",
+            home_score=1, away_score=0))
+
+
+class StoreVersions(Abstract):
+    """Writes in one worker drop stale caches in another"""
+
+    def test(self):
+        """only caches of the written topic are dropped"""
+        other = FifaContext(store=self.ctx.store, admin_secret="secret")
+        other.request()
+        other.cache.get("players", ("player",), lambda: "cached players")
+        self.assertIn("Canada vs Bosnia", other_call(other, "tonight_picks"))
+        self.call("authenticate_admin", "t-admin", admin_secret="secret")
+        self.call("set_result", "t-admin", home="Canada", away="Bosnia",
+                  home_score=1, away_score=0)
+        self.assertIsNotNone(other.cache.peek("pending"))
+        other.request()  # next request in the other worker syncs
+        self.assertIsNone(other.cache.peek("pending"))
+        self.assertEqual("cached players", other.cache.peek("players"))
+        self.assertIn("No matches awaiting", other_call(other, "tonight_picks"))
+
+    def test_counter(self):
+        """counters only move forward"""
+        _, first = cache.bump_versions(self.ctx.store, ["match"])["match"]
+        previous, second = cache.bump_versions(self.ctx.store, ["match"])["match"]
+        self.assertEqual(first, previous)
+        self.assertGreater(second, first)
+        self.assertEqual({"match": second}, cache.read_versions(self.ctx.store))
+
+    def test_concurrent_bump(self):
+        """a bump that lost a race reports the other worker's counter"""
+        import sqlalchemy as sa
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.ctx = make_context(MATCHES, PLAYERS, path=tmp.name)
+        _, seen = cache.bump_versions(self.ctx.store, ["player"])["player"]
+        other = membank.LoadMemory(f"sqlite://{tmp.name}/db")
+        raced = []
+
+        def before(_conn, _cursor, statement, *_args):
+            if statement.startswith("UPDATE storeversion") and not raced:
+                raced.append(threading.Thread(  # the other worker commits first
+                    target=lambda: raced.append(cache.bump_versions(other, ["player"]))))
+                raced[0].start()
+                raced[0].join()
+        engine = storage.engine(self.ctx.store)
+        sa.event.listen(engine, "before_cursor_execute", before)
+        self.addCleanup(sa.event.remove, engine, "before_cursor_execute", before)
+        previous, mine = cache.bump_versions(self.ctx.store, ["player"])["player"]
+        _, theirs = raced[1]["player"]
+        self.assertNotEqual(seen, previous)
+        self.assertEqual(theirs, previous)
+        self.assertGreater(mine, theirs)
+
+
+def other_call(ctx, tool, talker="", **params):
+    """invoke a tool on another engine"""
+    spec = tools.get_toolspec(tool)
+    return spec.handler(ctx.request(talker, NOW), spec.params(**params))
+
+
+class Timezones(Abstract):
+    """Kickoff times in the player's own timezone"""
+
+    def test(self):
+        """stored preference is used when describing matches"""
+        self.assertIn("(kickoff 2099-06-13T01:00:00+00:00)",
+                      self.call("get_next_match", "t-cara"))
+        answer = self.call("set_timezone", "t-cara", timezone="Europe/Riga")
+        self.assertEqual("Kickoff times will be shown in Europe/Riga for you.", answer)
+        self.assertIn("(kickoff 2099-06-13 04:00 EEST)",
+                      self.call("get_next_match", "t-cara"))
+        self.assertIn("(kickoff 2099-06-13T01:00:00+00:00)",
+                      self.call("get_next_match", "t-bob"))
+
+    def test_unknown(self):
+        """unknown zones are refused"""
+        self.assertIn("I don't know the timezone",
+                      self.call("set_timezone", "t-cara", timezone="Mars/Base"))
+
+
+class Dispatch(Abstract):
+    """Raw-bytes entry point for hosts"""
+
+    def test(self):
+        """talker lives on the request, never the shared context"""
+        answer = dispatch(self.ctx, "whoami", b"", talker="t-bob")
+        self.assertEqual("Your session id is: t-bob (registered as Bob)", answer)
+        self.assertEqual("", self.ctx.talker)
+
+    def test_concurrent(self):
+        """one engine serves many sessions from a thread pool"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.ctx = make_context(MATCHES, PLAYERS, path=tmp.name)
+        talkers = ["t-anna", "t-bob", "t-cara"] * 20
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            answers = list(pool.map(
+                lambda t: dispatch(self.ctx, "whoami", b"{}", talker=t), talkers))
+        for talker, answer in zip(talkers, answers):
+            self.assertTrue(answer.startswith(f"Your session id is: {talker} "))
+
+    def test_place_bet(self):
+        """arguments validate from bytes"""
+        answer = dispatch(self.ctx, "place_bet",
+                          b'{"home_score": 1, "away_score": 2}', talker="t-cara",
+                          now=NOW)
+        self.assertIn("United States vs Paraguay: 1:2", answer)
+
+    def test_errors(self):
+        """unknown tools and bad arguments come back as text"""
+        self.assertEqual("Unknown tool 'nope'.", dispatch(self.ctx, "nope", b"{}"))
+        answer = dispatch(self.ctx, "place_bet", b'{"home_score": 1}')
+        self.assertEqual(
+            "Invalid arguments for place_bet: away_score: Field required", answer)
+
+
+class TonightPicks(Abstract):
+    """Who picked what for the upcoming window"""
+
+    def test(self):
+        """pending match #3 listed with everyone's pick"""
+        answer = self.call("tonight_picks", hours=12)
+        self.assertIn("Canada vs Bosnia", answer)
+        self.assertIn("Anna 1:0, Bob —, Cara 0:2", answer)
+        self.assertNotIn("Paraguay", answer)
+
+    def test_result_drops_match(self):
+        """entering a result removes the match from the preview"""
+        self.call("tonight_picks")
+        self.call("set_result", "t-admin", admin_secret="secret",
+                  home="Canada", away="Bosnia", home_score=1, away_score=1)
+        self.assertIn("No matches awaiting a result", self.call("tonight_picks"))
+
+
+class MissingPicks(Abstract):
+    """Maintained per-match sets of players without a pick"""
+
+    LATER = datetime(2099, 6, 12, 20, 0, tzinfo=timezone.utc)
+
+    def later(self, tool, talker="", **params):
+        """invoke a tool on the eve of match #4"""
+        spec = tools.get_toolspec(tool)
+        return spec.handler(self.ctx.request(talker, self.LATER), spec.params(**params))
+
+    def cached(self):
+        """the default pool's maintained sets"""
+        return self.ctx.cache.peek(("missing", ""))
+
+    def test(self):
+        """everyone owes a pick for the match kicking off tomorrow"""
+        answer = self.later("missing_picks", "t-admin", admin_secret="secret")
+        self.assertIn("United States vs Paraguay", answer)
+        self.assertIn("Anna, Bob, Cara", answer)
+        self.assertIn("No matches kick off", self.call(
+            "missing_picks", "t-admin", admin_secret="secret", hours=1))
+
+    def test_admin_only(self):
+        """players are refused"""
+        self.assertNotIn("Anna", self.later("missing_picks", "t-bob"))
+
+    def test_updated_in_place(self):
+        """picks and new players patch the cached sets instead of a rebuild"""
+        self.later("missing_picks", "t-admin", admin_secret="secret")
+        sets = self.cached()
+        self.later("place_bet", "t-bob", home_score=1, away_score=0)
+        self.later("register_player", "t-dan", name="Dan")
+        self.later("update_prediction", "t-anna", home="United States",
+                   away="Paraguay", home_score=2, away_score=2)
+        self.assertIs(sets, self.cached())
+        self.assertEqual({"Cara", "Dan"}, sets.missing[4])
+        self.assertIn("Cara, Dan", self.later("missing_picks", "t-admin"))
+
+    def test_foreign_write(self):
+        """another worker's player write drops the sets"""
+        self.later("missing_picks", "t-admin", admin_secret="secret")
+        cache.bump_versions(self.ctx.store, [self.ctx.topic("player")])
+        self.later("place_bet", "t-bob", home_score=1, away_score=0)
+        self.assertIsNone(self.cached())
+        self.assertIn("Anna, Cara", self.later("missing_picks", "t-admin"))
+
+
+class RankMovement(Abstract):
+    """Rank history kept by the scoring subsystem"""
+
+    def test_standings(self):
+        """standings read the cached history"""
+        answer = self.call("standings")
+        self.assertIn("after 2 played match(es)", answer)
+        self.assertIn("1. Anna - 11 pts\n2. Bob - 3 pts\n2. Cara - 3 pts", answer)
+
+    def test_page(self):
+        """a page lists its places, the caller's own and a pointer onward"""
+        answer = self.call("standings", "t-cara", limit=1)
+        self.assertIn("places 1-1 of 3", answer)
+        self.assertIn("1. Anna - 11 pts\nYou: 2. Cara - 3 pts", answer)
+        self.assertIn("offset=1", answer)
+        answer = self.call("standings", limit=5, offset=1)
+        self.assertIn("2. Bob - 3 pts\n2. Cara - 3 pts", answer)
+        self.assertNotIn("offset=", answer)
+        self.assertIn("only 3 player(s)", self.call("standings", offset=3))
+
+    def test_leaderboard(self):
+        """heap pages and bisect ranks agree with a full sort"""
+        totals = {f"p{i:03}": (i * 37) % 101 for i in range(300)}
+        board = scoring.Leaderboard(totals)
+        ordered = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))
+        with patch.object(board, "rank", side_effect=AssertionError("sorted")):
+            page = board.top(20, 40)
+        self.assertEqual([n for n, _ in ordered[40:60]], [n for _, n, _ in page])
+        self.assertEqual([board.rank(n) for _, n, _ in page], [r for r, _, _ in page])
+        for name, points in ordered:
+            self.assertEqual(1 + sum(p > points for p in totals.values()),
+                             board.rank(name))
+
+    def test_history_board(self):
+        """the history's leaderboard ranks from its sorted totals"""
+        board = scoring.history(self.ctx.request()).leaderboard
+        with patch("chatbot_fifa_extension.scoring.sorted", create=True,
+                   side_effect=AssertionError("sorted")):
+            self.assertEqual([1, 2, 2], [board.rank(n) for n in ("Anna", "Bob", "Cara")])
+
+    def test_after_result(self):
+        """the latest result's movers and the caller's rank path"""
+        self.assertIn("Nobody changed rank", self.call("rank_movement", "t-bob"))
+        self.call("set_result", "t-admin", admin_secret="secret",
+                  home="Canada", away="Bosnia", home_score=0, away_score=2)
+        answer = self.call("rank_movement", "t-bob")
+        self.assertIn("After Canada vs Bosnia", answer)
+        self.assertIn("You: rank 3 (down 1), 3 pts. Your rank after each "
+                      "result: 2, 2, 3", answer)
+        self.assertIn("Biggest movers: Bob down 1 (now 3)", answer)
+
+    def test_cached(self):
+        """picks on upcoming matches keep the history; a new result extends it"""
+        def cached():
+            return self.ctx.cache.peek(("ranks", ""))
+        hist = scoring.history(self.ctx.request())
+        self.call("update_prediction", "t-bob", home="United States",
+                  away="Paraguay", home_score=1, away_score=0)
+        self.assertIs(hist, cached())
+        self.call("set_result", "t-admin", admin_secret="secret",
+                  home="Canada", away="Bosnia", home_score=0, away_score=2)
+        extended = cached()
+        self.assertEqual(3, len(extended))
+        fresh = scoring.RankHistory(self.ctx.store.get("player"),
+                                    self.ctx.store.get("match"))
+        self.assertEqual([fresh.timeline(n) for n in fresh.names],
+                         [extended.timeline(n) for n in extended.names])
+        self.call("set_result", "t-admin", admin_secret="secret",
+                  home="Canada", away="Bosnia", home_score=1, away_score=0)
+        self.assertIsNone(cached())
+        scoring.history(self.ctx.request())
+        self.call("admin_set_prediction", "t-admin", admin_secret="secret",
+                  player_name="Bob", home="Canada", away="Bosnia",
+                  home_score=1, away_score=0)
+        self.assertIsNone(cached())
+
+
+class Instrumentation(unittest.TestCase):
+    """Opt-in measurements of tool calls and store access"""
+
+    def setUp(self):
+        self.instruments = instrument.from_conf(["ring", "prometheus", "logging"])
+        self.ctx = make_context(MATCHES, PLAYERS, instruments=self.instruments)
+
+    def test_ring(self):
+        """the admin tool lists the latest calls with store usage"""
+        dispatch(self.ctx, "place_bet", '{"home_score": 1, "away_score": 1}',
+                 talker="t-anna", now=datetime(2099, 6, 12, tzinfo=timezone.utc))
+        answer = dispatch(self.ctx, "recent_calls", '{"admin_secret": "secret"}',
+                          talker="t-admin", now=NOW)
+        self.assertTrue(answer.startswith("place_bet: "))
+        self.assertIn("store: ", answer)
+        call = self.instruments.sink(instrument.RingSink).recent(2)[1]
+        self.assertEqual(2, call.store["put"].rows)  # audit event, player
+        self.assertGreater(call.store["put"].bytes, 0)
+        self.assertGreaterEqual(call.store["get"].rows, 4)
+
+    def test_direct_handler(self):
+        """handlers bound without dispatch are measured once too"""
+        spec = tools.get_toolspec("standings")
+        spec.handler(self.ctx.request("t-anna", NOW), spec.params())
+        dispatch(self.ctx, "standings", "{}", talker="t-anna", now=NOW)
+        calls = self.instruments.sink(instrument.RingSink).recent(5)
+        self.assertEqual(["standings", "standings"], [c.tool for c in calls])
+        self.assertTrue(all(c.store["get"].calls for c in calls))
+
+    def test_prometheus(self):
+        """cumulative counters per tool and store operation"""
+        for _ in range(2):
+            dispatch(self.ctx, "list_players", "{}", now=NOW)
+        text = self.instruments.sink(instrument.PrometheusSink).render()
+        self.assertIn('fifa_tool_calls_total{tool="list_players"} 2', text)
+        self.assertIn('fifa_store_calls_total{tool="list_players",op="get"}', text)
+        self.assertIn("# TYPE fifa_store_rows_total counter", text)
+
+    def test_logging(self):
+        """one log line per call"""
+        with self.assertLogs("chatbot_fifa_extension.metrics") as logs:
+            dispatch(self.ctx, "whoami", "{}", talker="t-bob", now=NOW)
+        self.assertIn("tool=whoami", logs.output[0])
+
+    def test_off(self):
+        """without instrumentation the store is untouched and the tool says so"""
+        ctx = make_context(MATCHES, PLAYERS)
+        self.assertNotIsInstance(ctx.store, instrument.InstrumentedStore)
+        self.assertIn("not enabled", dispatch(
+            ctx, "recent_calls", '{"admin_secret": "secret"}', now=NOW))
+
+
+class Snapshot(Abstract):
+    """One columnar tournament snapshot serves every read until a write"""
+
+    def cached(self):
+        """the default pool's snapshot, if built"""
+        return self.ctx.cache.peek(("tournament", ""))
+
+    def test_shared(self):
+        """read handlers reuse one snapshot; a player write drops it"""
+        self.call("list_players")
+        snap = self.cached()
+        self.call("standings")
+        self.call("tonight_picks")
+        self.assertIs(snap, self.cached())
+        self.call("update_prediction", "t-bob", home="United States",
+                  away="Paraguay", home_score=1, away_score=0)
+        self.assertIsNone(self.cached())
+        self.assertIn("Bob: 3 prediction(s) (1 session(s))", self.call("list_players"))
+
+    def test_columns(self):
+        """match columns and the dense matrix behind the player views"""
+        snap = snapshot.tournament(self.ctx.request())
+        self.assertEqual([1, 2, 3, 4], list(snap.numbers))
+        self.assertEqual([2, 1, 0, 0, views.NO_PICK, views.NO_PICK],
+                         list(snap.results[:6]))
+        self.assertEqual([2, 1, 3], list(snap.column(1)))  # Anna, Bob, Cara
+        self.assertEqual(2, snap.pick_count(3))
+        self.assertEqual((0, 2), snap.player("Cara").pick(3))
+        self.assertEqual(len(snap.players) * snap.size * 2, len(snap.matrix))
+
+
+class MatrixFile(Abstract):
+    """Picks mirrored to a memory-mapped matrix file"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.ctx = make_context(MATCHES, PLAYERS, matrix_path=self.dir.name)
+        self.path = matrix.path_for(self.dir.name)
+        self.addCleanup(matrix.close)
+
+    def bet(self, talker, home_score, away_score):
+        """pick the open match 4 as talker"""
+        return self.call("update_prediction", talker, home="United States",
+                         away="Paraguay", home_score=home_score, away_score=away_score)
+
+    def test_in_place(self):
+        """the first pick writes the file, later ones patch it in place"""
+        self.bet("t-bob", 1, 0)
+        with matrix.MatrixFile(self.path) as mapped:
+            self.assertEqual(["Anna", "Bob", "Cara"], mapped.names)
+            self.assertEqual((1, 2, 3, 4), mapped.numbers)
+            self.assertEqual((1, 0), mapped.pick("Bob", 4))
+            self.assertEqual((0, 2), mapped.pick("Cara", 3))
+            self.assertIsNone(mapped.pick("Anna", 4))
+            self.bet("t-anna", 3, 3)
+            self.assertEqual((3, 3), mapped.pick("Anna", 4))  # seen through the map
+            self.assertEqual(1, mapped.generation)
+            self.assertFalse(mapped.replaced())
+
+    def test_one_map(self):
+        """picks go through one writable map per pool"""
+        self.bet("t-bob", 1, 0)
+        with patch.object(matrix, "MatrixFile", wraps=matrix.MatrixFile) as opened:
+            for score in range(3):
+                self.bet("t-anna", score, 0)
+        self.assertEqual(1, opened.call_count)
+        with matrix.MatrixFile(self.path) as mapped:
+            self.assertEqual((2, 0), mapped.pick("Anna", 4))
+
+    def test_new_player(self):
+        """a player the file has no row for rewrites it"""
+        self.bet("t-bob", 1, 0)
+        mapped = matrix.MatrixFile(self.path)
+        self.addCleanup(mapped.close)
+        self.call("register_player", "t-dan", name="Dan")
+        self.bet("t-dan", 0, 1)
+        self.assertTrue(mapped.replaced())
+        with matrix.MatrixFile(self.path) as fresh:
+            self.assertEqual((0, 1), fresh.pick("Dan", 4))
+            self.assertEqual((1, 0), fresh.pick("Bob", 4))
+            self.assertGreater(fresh.generation, mapped.generation)
+
+    def test_other_changes(self):
+        """registrations and schedule changes rewrite the file too"""
+        self.call("register_player", "t-dan", name="Dan")
+        with matrix.MatrixFile(self.path) as mapped:
+            self.assertEqual(["Anna", "Bob", "Cara", "Dan"], mapped.names)
+        self.assertEqual({""}, matrix._pools(self.dir.name))
+        self.call("authenticate_admin", "t-admin", admin_secret="secret")
+        self.call("clear_tournament", "t-admin")
+        with matrix.MatrixFile(self.path) as mapped:
+            self.assertEqual((), mapped.numbers)
+
+    def test_foreign_write(self):
+        """a pick the file missed shows as stale and is read back on the next write"""
+        self.bet("t-bob", 1, 0)
+        other = FifaContext(store=self.ctx.store, admin_secret="secret")
+        other_call(other, "update_prediction", "t-anna", home="United States",
+                   away="Paraguay", home_score=2, away_score=2)
+        with matrix.MatrixFile(self.path) as mapped:
+            self.assertFalse(mapped.current(cache.read_versions(self.ctx.store)))
+        with patch.object(matrix.fcntl, "flock", wraps=matrix.fcntl.flock) as flock:
+            self.bet("t-bob", 3, 0)
+        flock.assert_called_once()
+        with matrix.MatrixFile(self.path) as mapped:
+            self.assertTrue(mapped.current(cache.read_versions(self.ctx.store)))
+            self.assertEqual((2, 2), mapped.pick("Anna", 4))
+            self.assertEqual((3, 0), mapped.pick("Bob", 4))
+
+    def test_mapped_snapshot(self):
+        """a Tournament over the file reads like one built from the store"""
+        matrix.rebuild(self.ctx.request())
+        built = snapshot.tournament(self.ctx.request())
+        with matrix.MatrixFile(self.path) as mapped:
+            snap = snapshot.Tournament.mapped(built.matches, mapped)
+            self.assertEqual(list(built.matrix), list(snap.matrix))
+            self.assertEqual([2, 1, 3], list(snap.column(1)))
+            self.assertEqual((0, 2), snap.player("Cara").pick(3))
+            del snap
+
+
+class WriteBehind(unittest.TestCase):
+    """Batched store writes acknowledged after their commit"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.later = datetime(2099, 6, 12, tzinfo=timezone.utc)
+
+    def context(self, **kwargs):
+        """a write-behind context over a file store, closed after the test
+
+        Its tables all exist already, so writes are queued from the start.
+        """
+        ctx = make_context(MATCHES, PLAYERS, path=self.dir.name, **kwargs)
+        self.addCleanup(ctx.writes.close)
+        ctx.changed("group")
+        return ctx
+
+    def stored(self):
+        """the players as committed to the file, read by a fresh store"""
+        store = membank.LoadMemory(f"sqlite://{self.dir.name}/db")
+        return {p.name: p.predictions for p in store.get("player")}
+
+    def test_batched(self):
+        """concurrent picks share commits and are durable when acknowledged"""
+        ctx = self.context(write_behind=0.05)
+        names = [f"p{i}" for i in range(8)]
+        for name in names:
+            ctx.store.put(memories.Player(name=name, talker=f"t-{name}"))
+        with patch.object(storage, "put_many", wraps=storage.put_many) as put_many:
+            with ThreadPoolExecutor(8) as pool:
+                answers = list(pool.map(
+                    lambda name: dispatch(ctx, "place_bet",
+                                          '{"home_score": 1, "away_score": 0}',
+                                          talker=f"t-{name}", now=self.later),
+                    names))
+        self.assertTrue(all(a.startswith("Recorded") for a in answers))
+        stored = self.stored()
+        self.assertTrue(all(stored[name] == {"4": [1, 0]} for name in names))
+        self.assertLess(put_many.call_count, 2 * len(names))  # player + version each
+
+    def test_one_commit(self):
+        """a pick's version bump commits in the same batch as the pick"""
+        ctx = self.context(write_behind=0.01)
+        before = cache.read_versions(ctx.store).get("player", 0)
+        with patch.object(storage, "put_many", wraps=storage.put_many) as put_many:
+            dispatch(ctx, "place_bet", '{"home_score": 1, "away_score": 0}',
+                     talker="t-bob", now=self.later)
+        put_many.assert_called_once()
+        items, bumps = put_many.call_args.args[1:]
+        self.assertEqual(["player", "auditevent"],
+                         [storage.table_name(item) for item in items])
+        self.assertEqual([("player",)], bumps)
+        self.assertGreater(cache.read_versions(ctx.store)["player"], before)
+
+    def test_read_own_writes(self):
+        """an acknowledged but uncommitted pick is seen by the next call"""
+        ctx = self.context(write_behind=0.5, max_wait=0)
+        first = dispatch(ctx, "update_prediction", '{"home": "United States", '
+                         '"away": "Paraguay", "home_score": 2, "away_score": 2}',
+                         talker="t-bob", now=NOW)
+        self.assertTrue(first.startswith("Updated"))
+        self.assertNotIn("4", self.stored()["Bob"])  # still queued
+        self.assertIn("United States vs Paraguay: 2:2",
+                      dispatch(ctx, "my_predictions", "{}", talker="t-bob", now=NOW))
+        ctx.writes.flush()
+        self.assertEqual([2, 2], self.stored()["Bob"]["4"])
+
+    def test_read_during_commit(self):
+        """the batch being committed is still read by key"""
+        ctx = self.context(write_behind=0.01, max_wait=0)
+        committing = threading.Event()
+        real = storage.put_many
+
+        def slow(store, items, bumps=()):
+            committing.set()
+            time.sleep(0.2)
+            return real(store, items, bumps)
+
+        def pick(home, away, home_score, away_score):
+            return dispatch(ctx, "admin_set_prediction", json.dumps({
+                "admin_secret": "secret", "player_name": "Bob", "home": home,
+                "away": away, "home_score": home_score, "away_score": away_score}),
+                talker="t-admin", now=NOW)
+        with patch.object(storage, "put_many", side_effect=slow):
+            self.assertIn("Bob", pick("United States", "Paraguay", 1, 0))
+            self.assertTrue(committing.wait(2))
+            self.assertIn("Bob", pick("Canada", "Bosnia", 2, 2))
+            ctx.writes.flush()
+        stored = self.stored()["Bob"]
+        self.assertEqual(([1, 0], [2, 2]), (stored["4"], stored["3"]))
+
+    def test_unrelated_read(self):
+        """a filtered read of a table with nothing queued doesn't flush"""
+        ctx = self.context(write_behind=0.5, max_wait=0)
+        dispatch(ctx, "place_bet", '{"home_score": 1, "away_score": 0}',
+                 talker="t-bob", now=self.later)
+        with patch.object(ctx.writes, "flush") as flush:
+            matches = ctx.store.get("match", ctx.store.match.number > 2)
+            self.assertEqual(2, len(matches))
+            flush.assert_not_called()
+            ctx.store.get("player", ctx.store.player.pool == "")
+            flush.assert_called_once()
+
+    def test_failed_batch(self):
+        """a failed commit is reported to the waiting call"""
+        ctx = self.context(write_behind=0.01)
+        with patch.object(storage, "put_many", side_effect=RuntimeError("disk")), \
+                self.assertLogs("chatbot_fifa_extension.writes", "ERROR"):
+            with self.assertRaisesRegex(RuntimeError, "disk"):
+                dispatch(ctx, "place_bet", '{"home_score": 1, "away_score": 0}',
+                         talker="t-bob", now=self.later)
+
+
+class AuditTrail(Abstract):
+    """Pick and result changes are logged and replayable"""
+
+    def setUp(self):
+        super().setUp()
+        self.call("update_prediction", "t-bob", home="United States",
+                  away="Paraguay", home_score=1, away_score=0)
+        self.call("update_prediction", "t-bob", home="United States",
+                  away="Paraguay", home_score=2, away_score=0)
+        self.call("admin_set_prediction", "t-admin", admin_secret="secret",
+                  player_name="Anna", home="Canada", away="Bosnia",
+                  home_score=0, away_score=1)
+        self.call("set_result", "t-admin", home="Canada", away="Bosnia",
+                  home_score=0, away_score=2)
+
+    def test_history(self):
+        """per-player and per-match history, old -> new"""
+        answer = self.call("pick_history", "t-admin", player_name="Bob")
+        self.assertEqual(2, len(answer.splitlines()))
+        self.assertIn("#4 Bob: - -> 1:0 (update_prediction, t-bob)", answer)
+        self.assertIn("#4 Bob: 1:0 -> 2:0", answer)
+        answer = self.call("pick_history", "t-admin", home="Canada", away="Bosnia")
+        self.assertIn("#3 Anna: 1:0 -> 0:1 (admin_set_prediction, t-admin)", answer)
+        self.assertTrue(answer.endswith("#3 result: - -> 0:2 (set_result, t-admin)"))
+        self.assertIn("not authorized", self.call("pick_history", "t-bob"))
+
+    def test_commit_order(self):
+        """an event recorded early but committed late is not skipped"""
+        request = self.ctx.request()
+        replay = audit.Replay().apply(audit.events(request))
+        self.assertEqual([1, 2, 3, 4], [e.seq for e in audit.events(request)])
+        late = memories.AuditEvent(id=f"{0:020d}-late", kind="result", match=4,
+                                   new=[1, 1])  # its clock id precedes every other
+        storage.put_many(self.ctx.store, [late])
+        fresh = audit.events(request, after=replay.last)
+        self.assertEqual([(late.id, 5)], [(e.id, e.seq) for e in fresh])
+        self.assertEqual((1, 1), replay.apply(fresh).results[4])
+
+    def test_atomic(self):
+        """a failed write leaves neither the pick nor its event"""
+        before = len(audit.events(self.ctx.request()))
+        written = []
+
+        def failing(item):  # the second record's write fails
+            written.append(item)
+            if len(written) > 1:
+                raise RuntimeError("disk")
+            return "player"
+        with patch.object(storage, "table_name", side_effect=failing), \
+                self.assertRaisesRegex(RuntimeError, "disk"):
+            self.call("update_prediction", "t-bob", home="United States",
+                      away="Paraguay", home_score=3, away_score=3)
+        self.assertEqual(before, len(audit.events(self.ctx.request())))
+        self.assertEqual([2, 0], self.ctx.store.get.player(id=":Bob").predictions["4"])
+
+    def test_replay(self):
+        """the trail replays incrementally and matches the store"""
+        request = self.ctx.request()
+        replay = audit.Replay().apply(audit.events(request)[:2])
+        self.assertEqual({"Bob": {4: (2, 0)}}, replay.picks)
+        replay.apply(audit.events(request, after=replay.last))
+        self.assertEqual({3: (0, 2)}, replay.results)
+        self.assertEqual({"Bob": 0, "Anna": 5}, replay.totals(scoring.DEFAULT_RULES))
+        self.assertEqual([], audit.verify(request, replay))
+        player = self.ctx.store.get.player(id=":Bob")
+        player.predictions["4"] = [5, 5]
+        self.ctx.store.put(player)
+        self.ctx.changed("player")
+        self.assertEqual(["Bob #4: logged 2:0, stored 5:5"],
+                         audit.verify(self.ctx.request(), replay))
+
+
+class Backup(Abstract):
+    """Online snapshots of the store and restoring them"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.ctx = make_context(MATCHES, PLAYERS, path=self.dir.name,
+                                backup_path=self.dir.name)
+        self.call("update_prediction", "t-bob", home="United States",
+                  away="Paraguay", home_score=1, away_score=0)
+
+    def state(self, ctx):
+        """players' picks and the results, as the store has them"""
+        return ({p.name: p.predictions for p in ctx.store.get("player")},
+                {m.number: m.result for m in ctx.store.get("match")})
+
+    def test_export(self):
+        """the tool's export restores the store as it was"""
+        answer = self.call("backup_store", "t-admin", admin_secret="secret")
+        self.assertIn("(0 group, 4 match, 3 player, 1 admin, 1 auditevent)", answer)
+        path = answer.split()[3]
+        self.assertTrue(path.endswith(".jsonl.gz"))
+        before = self.state(self.ctx)
+        self.call("set_result", "t-admin", home="Canada", away="Bosnia",
+                  home_score=0, away_score=2)
+        self.ctx.store.delete(self.ctx.store.get.player(id=":Anna"))
+        self.assertIn("not authorized", self.call("backup_store", "t-bob"))
+        counts = backup.restore(self.ctx, path)
+        self.assertEqual(3, counts["player"])
+        self.assertEqual(before, self.state(self.ctx))
+        self.assertIn("Anna", self.call("list_players"))  # caches were dropped
+
+    def test_consistent(self):
+        """a write made while the export reads lands after the snapshot"""
+        rows = storage.dump(self.ctx.store, ("match", "player"))
+        self.assertEqual("match", next(rows)[0])
+        written = threading.Event()
+
+        def register():
+            other = membank.LoadMemory(f"sqlite://{self.dir.name}/db")
+            other.put(memories.Player(name="Zed", talker="t-zed", id=":Zed"))
+            written.set()
+        writer = threading.Thread(target=register)
+        writer.start()
+        written.wait(0.5)
+        names = [row["name"] for table, row in rows if table == "player"]
+        writer.join()
+        self.assertEqual(["Anna", "Bob", "Cara"], sorted(names))
+        self.assertIsNotNone(self.ctx.store.get.player(id=":Zed"))
+
+    def test_sqlite(self):
+        """a sqlite copy restores into another store"""
+        answer = self.call("backup_store", "t-admin", admin_secret="secret",
+                           format="sqlite")
+        path = answer.split()[3]
+        self.assertTrue(path.endswith(".db"))
+        with tempfile.TemporaryDirectory() as other:
+            fresh = make_context(path=other)
+            backup.restore(fresh, path)
+            self.assertEqual(self.state(self.ctx), self.state(fresh))
+            self.assertIn("Bob", self.call("list_players"))
+
+    def test_in_memory(self):
+        """an in-memory store can be exported but not copied"""
+        self.ctx = make_context(MATCHES, PLAYERS, backup_path=self.dir.name)
+        self.assertIn("failed", self.call("backup_store", "t-admin",
+                                          admin_secret="secret", format="sqlite"))
+        self.assertIn("Backup written", self.call("backup_store", "t-admin"))
+
+    def test_not_configured(self):
+        """without a backup directory the tool says so"""
+        self.ctx = make_context(MATCHES, PLAYERS)
+        self.assertIn("not configured", self.call("backup_store", "t-admin",
+                                                  admin_secret="secret"))